@@ -0,0 +1,281 @@
+import json
+import os
+import random
+import queue
+import threading
+import itertools
+from collections import OrderedDict
+from pathlib import Path
+import pygame
+from ..common.tiles import Tile, TileType
+from ..common.constants import CHUNK_SIZE
+
+# Rough size of one Tile object and its attributes, used for the memory budget
+TILE_MEMORY_ESTIMATE = 512
+
+class BakedChunk:
+    """Pre-rendered static tiles of one chunk plus the tiles that still animate"""
+    def __init__(self, surface, animated):
+        self.surface = surface
+        self.animated = animated  # List of (offset_x, offset_y, tile) drawn every frame
+
+    def memory_size(self):
+        """Approximate number of bytes held by the baked surface"""
+        return self.surface.get_width() * self.surface.get_height() * self.surface.get_bytesize()
+
+def bake_chunk(game_map, chunk_x, chunk_y):
+    """Render the static tiles and transitions of a chunk into a single surface"""
+    tile_size = game_map.tile_size
+    start_x = chunk_x * game_map.chunk_size
+    start_y = chunk_y * game_map.chunk_size
+    end_x = min(game_map.width, start_x + game_map.chunk_size)
+    end_y = min(game_map.height, start_y + game_map.chunk_size)
+
+    surface = pygame.Surface(((end_x - start_x) * tile_size, (end_y - start_y) * tile_size))
+    animated = []
+    sprite_manager = game_map.sprite_manager
+
+    for y in range(start_y, end_y):
+        for x in range(start_x, end_x):
+            tile = game_map._tile_at(x, y)
+            if tile is None:
+                continue
+            offset_x = (x - start_x) * tile_size
+            offset_y = (y - start_y) * tile_size
+
+            # Animated tiles are drawn per frame on top of the baked surface
+            if tile.animated:
+                animated.append((offset_x, offset_y, tile))
+                continue
+
+            sprite = sprite_manager.get_sprite(tile.sprite_name)
+            if sprite:
+                surface.blit(sprite, (offset_x, offset_y))
+            for transition_sprite_name in tile.transition_sprites:
+                transition_sprite = sprite_manager.get_sprite(transition_sprite_name)
+                if transition_sprite:
+                    surface.blit(transition_sprite, (offset_x, offset_y))
+
+    return BakedChunk(surface, animated)
+
+class Chunk:
+    """A square block of tiles that is loaded and evicted as a unit"""
+    def __init__(self, chunk_x, chunk_y, origin_x, origin_y, tiles):
+        self.chunk_x = chunk_x
+        self.chunk_y = chunk_y
+        self.origin_x = origin_x  # Tile coordinate of the top-left tile
+        self.origin_y = origin_y
+        self.tiles = tiles  # Rows of Tile objects, indexed [y][x] relative to the origin
+        self.height = len(tiles)
+        self.width = len(tiles[0]) if tiles else 0
+        self.baked = None
+        self.dirty = False  # Modified since loading and must be written back
+
+    def to_bytes(self):
+        """Serialize the tile types of the chunk, one byte per tile"""
+        return bytes(tile.tile_type.value for row in self.tiles for tile in row)
+
+    def memory_size(self):
+        """Approximate number of bytes held by this chunk"""
+        size = self.width * self.height * TILE_MEMORY_ESTIMATE
+        if self.baked:
+            size += self.baked.memory_size()
+        return size
+
+class ChunkStore:
+    """A chunked world on disk: a manifest plus one file of tile types per chunk"""
+    MANIFEST_NAME = 'world.json'
+
+    def __init__(self, root):
+        self.root = Path(root)
+        with open(self.root / self.MANIFEST_NAME) as manifest_file:
+            manifest = json.load(manifest_file)
+        self.width = manifest['width']
+        self.height = manifest['height']
+        self.tile_size = manifest['tile_size']
+        self.chunk_size = manifest['chunk_size']
+        self.default_tile = TileType[manifest.get('default_tile', 'GRASS')]
+        self.chunks_x = (self.width + self.chunk_size - 1) // self.chunk_size
+        self.chunks_y = (self.height + self.chunk_size - 1) // self.chunk_size
+        self._tile_types = {tile_type.value: tile_type for tile_type in TileType}
+
+    @classmethod
+    def create(cls, root, width, height, tile_size=32, chunk_size=CHUNK_SIZE, default_tile=TileType.GRASS):
+        """Create an empty world on disk and open it"""
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            'width': width,
+            'height': height,
+            'tile_size': tile_size,
+            'chunk_size': chunk_size,
+            'default_tile': default_tile.name
+        }
+        with open(root / cls.MANIFEST_NAME, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+        return cls(root)
+
+    @classmethod
+    def save_map(cls, game_map, root, chunk_size=CHUNK_SIZE):
+        """Write an in-memory GameMap out as a chunked world"""
+        store = cls.create(root, game_map.width, game_map.height, game_map.tile_size, chunk_size)
+        for chunk_y in range(store.chunks_y):
+            for chunk_x in range(store.chunks_x):
+                start_x, start_y, width, height = store.chunk_bounds(chunk_x, chunk_y)
+                data = bytes(game_map._tile_at(x, y).tile_type.value
+                             for y in range(start_y, start_y + height)
+                             for x in range(start_x, start_x + width))
+                store.write_chunk(chunk_x, chunk_y, data)
+        return store
+
+    @classmethod
+    def save_grid(cls, grid, root, tile_size=32, chunk_size=CHUNK_SIZE):
+        """Write a 2D array of TileType values (such as WorldGenerator output) as a chunked world"""
+        height, width = grid.shape
+        store = cls.create(root, width, height, tile_size, chunk_size)
+        for chunk_y in range(store.chunks_y):
+            for chunk_x in range(store.chunks_x):
+                start_x, start_y, chunk_width, chunk_height = store.chunk_bounds(chunk_x, chunk_y)
+                block = grid[start_y:start_y + chunk_height, start_x:start_x + chunk_width]
+                store.write_chunk(chunk_x, chunk_y, block.tobytes())
+        return store
+
+    def chunk_bounds(self, chunk_x, chunk_y):
+        """Get (start_x, start_y, width, height) of a chunk in tiles"""
+        start_x = chunk_x * self.chunk_size
+        start_y = chunk_y * self.chunk_size
+        width = min(self.chunk_size, self.width - start_x)
+        height = min(self.chunk_size, self.height - start_y)
+        return start_x, start_y, width, height
+
+    def _chunk_path(self, chunk_x, chunk_y):
+        return self.root / f'chunk_{chunk_x}_{chunk_y}.bin'
+
+    def write_chunk(self, chunk_x, chunk_y, data):
+        """Write the tile types of a chunk, replacing the file atomically"""
+        path = self._chunk_path(chunk_x, chunk_y)
+        temp_path = path.with_suffix('.tmp')
+        with open(temp_path, 'wb') as chunk_file:
+            chunk_file.write(data)
+        os.replace(temp_path, path)
+
+    def load_chunk(self, chunk_x, chunk_y):
+        """Read a chunk from disk and build its tiles"""
+        start_x, start_y, width, height = self.chunk_bounds(chunk_x, chunk_y)
+        try:
+            with open(self._chunk_path(chunk_x, chunk_y), 'rb') as chunk_file:
+                data = chunk_file.read()
+        except FileNotFoundError:
+            data = b''
+
+        # Missing or truncated chunks are padded with the default tile
+        data = data.ljust(width * height, bytes([self.default_tile.value]))
+
+        # Sprite variants come from a generator seeded by the chunk, so loading on the worker thread
+        # never draws from the shared one (keeping replays deterministic) and reloads look the same
+        rng = random.Random(chunk_y * self.chunks_x + chunk_x)
+        tiles = []
+        for row in range(height):
+            row_data = data[row * width:(row + 1) * width]
+            tiles.append([Tile(self._tile_types.get(value, self.default_tile), rng) for value in row_data])
+        return Chunk(chunk_x, chunk_y, start_x, start_y, tiles)
+
+class ChunkStreamer:
+    """Keeps an LRU set of chunks resident, loading new ones on a background thread"""
+    # Request priorities, lower loads first
+    PRIORITY_NEEDED = 0
+    PRIORITY_PREFETCH = 1
+
+    def __init__(self, store, memory_budget=64 * 1024 * 1024, max_loads_per_poll=4):
+        self.store = store
+        self.memory_budget = memory_budget
+        self.max_loads_per_poll = max_loads_per_poll
+        self.chunks = OrderedDict()  # Dictionary of {(chunk_x, chunk_y): Chunk}, oldest first
+        self.pending = set()
+
+        self._sequence = itertools.count()
+        self._requests = queue.PriorityQueue()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def _worker(self):
+        """Load requested chunks from disk until stopped"""
+        while True:
+            _, _, key = self._requests.get()
+            if key is None:
+                return
+            try:
+                self._results.put(self.store.load_chunk(*key))
+            except OSError as e:
+                print(f"Error loading chunk {key}: {e}")
+                self._results.put(key)
+
+    def request(self, key, priority=PRIORITY_PREFETCH):
+        """Queue a chunk for background loading if it is not resident or queued"""
+        if key in self.chunks or key in self.pending:
+            return
+        self.pending.add(key)
+        self._requests.put((priority, next(self._sequence), key))
+
+    def load_now(self, key):
+        """Load a chunk synchronously, for chunks that are needed this frame"""
+        chunk = self.store.load_chunk(*key)
+        self.chunks[key] = chunk
+        return chunk
+
+    def poll(self):
+        """Take finished loads from the worker and make them resident"""
+        loaded = []
+        while len(loaded) < self.max_loads_per_poll:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(result, tuple):  # Failed load, allow it to be requested again
+                self.pending.discard(result)
+                continue
+            key = (result.chunk_x, result.chunk_y)
+            self.pending.discard(key)
+            if key in self.chunks:  # Already loaded synchronously
+                continue
+            self.chunks[key] = result
+            loaded.append(result)
+        return loaded
+
+    def touch(self, keys):
+        """Mark chunks as recently used"""
+        for key in keys:
+            if key in self.chunks:
+                self.chunks.move_to_end(key)
+
+    def memory_size(self):
+        """Approximate number of bytes held by resident chunks"""
+        return sum(chunk.memory_size() for chunk in self.chunks.values())
+
+    def evict(self, protected=()):
+        """Drop least recently used chunks until the memory budget is met"""
+        evicted = []
+        total = self.memory_size()
+        for key in list(self.chunks):
+            if total <= self.memory_budget:
+                break
+            if key in protected:
+                continue
+            chunk = self.chunks.pop(key)
+            total -= chunk.memory_size()
+            self._write_back(chunk)
+            evicted.append(chunk)
+        return evicted
+
+    def _write_back(self, chunk):
+        """Persist runtime edits of a chunk before it leaves memory"""
+        if chunk.dirty:
+            self.store.write_chunk(chunk.chunk_x, chunk.chunk_y, chunk.to_bytes())
+            chunk.dirty = False
+
+    def close(self):
+        """Write back modified chunks and stop the loader thread"""
+        for chunk in self.chunks.values():
+            self._write_back(chunk)
+        self._requests.put((-1, next(self._sequence), None))
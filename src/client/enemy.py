@@ -2,7 +2,46 @@ import pygame
 import math
 import random
 from pathlib import Path
-from ..common.constants import PLAYER_SIZE
+from ..common.constants import PLAYER_SIZE, HITBOX_SIZE
+from ..common.collision import move_and_slide
+from ..common.pathfinding import find_path
+from ..common.line_of_sight import tile_line_of_sight
+from ..common import events
+from .enemy_behaviour import BehaviourContext, get_behaviour
+
+class ArchetypeField:
+    """Read-only descriptor exposing a field of an enemy's archetype as an attribute of the enemy"""
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, enemy, owner=None):
+        if enemy is None:
+            return self
+        return getattr(enemy.archetype, self.name)
+
+class EnemyArchetype:
+    """Stats, behaviour and sprites of one enemy type, shared by every enemy of it"""
+    __slots__ = ('enemy_type', 'max_health', 'strength', 'defense', 'attack_range', 'aggro_range', 'speed',
+                 'exp_value', 'flee_health', 'patrol_radius', 'patrol_speed', 'patrol_time', 'idle_time',
+                 'behaviour', 'sprites', 'sprite_variants')
+
+    def __init__(self, enemy_type, config, sprites, sprite_variants):
+        self.enemy_type = enemy_type
+        self.max_health = config["health"]
+        self.strength = config["strength"]
+        self.defense = config["defense"]
+        self.attack_range = config["attack_range"]
+        self.aggro_range = config["aggro_range"]
+        self.speed = config["speed"]
+        self.exp_value = config["exp_value"]
+        self.flee_health = config.get("flee_health", 0)  # Fraction of max health below which it runs away
+        self.patrol_radius = config.get("patrol_radius", 0)
+        self.patrol_speed = config.get("patrol_speed", 0.5)  # Fraction of speed when not chasing
+        self.patrol_time = config.get("patrol_time", 5.0)  # Seconds before giving up on a patrol point
+        self.idle_time = config.get("idle_time", 3.0)  # Seconds idle before patrolling
+        self.behaviour = get_behaviour(config.get("behaviour", "brute"))
+        self.sprites = sprites  # Dictionary of {animation: [frames]}
+        self.sprite_variants = sprite_variants  # Dictionary of {(animation, facing_left, is_hit): [frames]}
 
 class Enemy:
     # Enemy type configurations
@@ -14,7 +53,10 @@ class Enemy:
             "speed": 100,  # Increased speed
             "attack_range": 50,
             "aggro_range": 300,  # Increased range
-            "exp_value": 10
+            "exp_value": 10,
+            "behaviour": "skirmisher",  # Table in enemy_behaviour.BEHAVIOURS
+            "flee_health": 0.25,  # Fraction of max health below which it runs away
+            "patrol_radius": 160  # Pixels from home it wanders while idle
         },
         "zombie": {
             "health": 75,
@@ -23,29 +65,57 @@ class Enemy:
             "speed": 80,  # Increased speed
             "attack_range": 40,
             "aggro_range": 350,  # Increased range
-            "exp_value": 15
+            "exp_value": 15,
+            "behaviour": "brute"
         }
     }
 
+    _archetypes = {}  # Dictionary of {enemy_type: EnemyArchetype}, built on first spawn
+    _shadow = None
+
+    # Per-instance state; everything fixed per type is read through the archetype
+    __slots__ = ('x', 'y', 'enemy_type', 'archetype', 'rect', 'level', 'current_health',
+                 'attack_range', 'aggro_range', 'speed',
+                 'animation_frame', 'animation_timer', 'animation_speed', 'facing_left',
+                 'is_alive', 'is_attacking', 'attack_timer', 'hit_timer', 'is_hit',
+                 'knockback_distance', 'knockback_direction',
+                 'is_aggroed', 'aggro_duration', 'aggro_timer', 'last_seen_pos',
+                 'stuck_timer', 'last_position', 'stuck_cooldown', 'path', 'path_goal',
+                 'home_x', 'home_y', 'patrol_target', 'state', 'state_time', 'think_timer', 'events')
+
+    max_health = ArchetypeField()
+    strength = ArchetypeField()
+    defense = ArchetypeField()
+    exp_value = ArchetypeField()
+    flee_health = ArchetypeField()
+    patrol_radius = ArchetypeField()
+    patrol_speed = ArchetypeField()
+    patrol_time = ArchetypeField()
+    idle_time = ArchetypeField()
+    behaviour = ArchetypeField()
+    sprites = ArchetypeField()
+    sprite_variants = ArchetypeField()
+
+    attack_cooldown = 1.0  # Seconds
+    hit_cooldown = 0.5  # Invulnerability time after being hit
+    stuck_threshold = 0.5  # Time before considering enemy stuck
+
     def __init__(self, x, y, enemy_type="goblin"):
         self.x = x
         self.y = y
         self.enemy_type = enemy_type
         self.rect = pygame.Rect(x, y, PLAYER_SIZE, PLAYER_SIZE)
+        self.events = None  # EventBus that combat events are emitted to (set by GameClient)
         
-        # Get enemy configuration
-        config = self.ENEMY_TYPES.get(enemy_type, self.ENEMY_TYPES["goblin"])
+        # Stats, behaviour and sprites are loaded once per enemy type and shared by every enemy of it
+        self.archetype = self._get_archetype(enemy_type)
         
-        # Stats
+        # Stats (the ranges and speed are copied so the batch store can hold them)
         self.level = 1
-        self.max_health = config["health"]
         self.current_health = self.max_health
-        self.strength = config["strength"]
-        self.defense = config["defense"]
-        self.attack_range = config["attack_range"]
-        self.aggro_range = config["aggro_range"]
-        self.speed = config["speed"]
-        self.exp_value = config["exp_value"]
+        self.attack_range = self.archetype.attack_range
+        self.aggro_range = self.archetype.aggro_range
+        self.speed = self.archetype.speed
         
         # Animation state
         self.animation_frame = 0
@@ -56,9 +126,7 @@ class Enemy:
         # State
         self.is_alive = True
         self.is_attacking = False
-        self.attack_cooldown = 1.0  # Seconds
         self.attack_timer = 0
-        self.hit_cooldown = 0.5  # Invulnerability time after being hit
         self.hit_timer = 0
         self.is_hit = False
         self.knockback_distance = 0
@@ -72,26 +140,49 @@ class Enemy:
         
         # Pathfinding state
         self.stuck_timer = 0
-        self.stuck_threshold = 0.5  # Time before considering enemy stuck
         self.last_position = (x, y)
         self.stuck_cooldown = 0
-        
-        # Load sprite sheet
-        self.sprites = {}
-        self._load_sprites()
-        
-        # Combat text
-        self.damage_numbers = []  # List of (damage, x, y, timer, color) tuples
-        self.damage_number_duration = 1.0  # How long damage numbers stay on screen
-        
-    def _load_sprites(self):
-        """Load the appropriate sprite sheet based on enemy type"""
-        if self.enemy_type == "zombie":
-            self._load_zombie_sprites()
-        else:
-            self._load_goblin_sprites()
+        self.path = []  # Tiles still to walk through, planned by A*
+        self.path_goal = None  # Tile the current path (or pending request) leads to
+        
+        # Behaviour state machine, shared by every enemy of this type
+        self.home_x = x  # Where the enemy returns once it loses the player
+        self.home_y = y
+        self.patrol_target = None
+        self.behaviour.start(self)
+        
+    @classmethod
+    def _get_archetype(cls, enemy_type):
+        """Get the shared archetype of an enemy type, loading its sprites on first use"""
+        archetype = cls._archetypes.get(enemy_type)
+        if archetype is None:
+            config = cls.ENEMY_TYPES.get(enemy_type, cls.ENEMY_TYPES["goblin"])
+            sprites = {}
+            if enemy_type == "zombie":
+                cls._load_zombie_sprites(sprites)
+            else:
+                cls._load_goblin_sprites(sprites)
             
-    def _load_zombie_sprites(self):
+            # Precompute the flipped and hit-flash frames draw picks from
+            variants = {}
+            for animation, frames in sprites.items():
+                for facing_left in (False, True):
+                    turned = [pygame.transform.flip(frame, True, False) if facing_left else frame
+                              for frame in frames]
+                    variants[(animation, facing_left, False)] = turned
+                    variants[(animation, facing_left, True)] = [cls._create_hit_flash(frame) for frame in turned]
+            archetype = cls._archetypes[enemy_type] = EnemyArchetype(enemy_type, config, sprites, variants)
+        return archetype
+    
+    @staticmethod
+    def _create_hit_flash(sprite):
+        """Get a faded copy of a sprite shown while the enemy is hit"""
+        white_sprite = sprite.copy()
+        white_sprite.fill((255, 255, 255, 180), special_flags=pygame.BLEND_RGBA_MULT)
+        return white_sprite
+            
+    @classmethod
+    def _load_zombie_sprites(cls, sprites):
         """Load zombie sprite sheet and extract animation frames"""
         # Load the sprite sheet
         try:
@@ -102,30 +193,31 @@ class Enemy:
             frame_height = 32
             
             # Extract walking animation frames (first row)
-            self.sprites['walk'] = []
+            sprites['walk'] = []
             for i in range(3):  # 3 frames of walking animation
                 frame = pygame.Surface((frame_width, frame_height), pygame.SRCALPHA)
                 frame.blit(sprite_sheet, (0, 0), (i * frame_width, 0, frame_width, frame_height))
                 # Scale up the frame to match player size
                 frame = pygame.transform.scale(frame, (PLAYER_SIZE, PLAYER_SIZE))
-                self.sprites['walk'].append(frame)
+                sprites['walk'].append(frame)
                 
             # Extract attack animation frames (second row)
-            self.sprites['attack'] = []
+            sprites['attack'] = []
             for i in range(2):  # 2 frames of attack animation
                 frame = pygame.Surface((frame_width, frame_height), pygame.SRCALPHA)
                 frame.blit(sprite_sheet, (0, 0), (i * frame_width, frame_height, frame_width, frame_height))
                 # Scale up the frame to match player size
                 frame = pygame.transform.scale(frame, (PLAYER_SIZE, PLAYER_SIZE))
-                self.sprites['attack'].append(frame)
+                sprites['attack'].append(frame)
                 
         except pygame.error as e:
             print(f"Error loading zombie sprites: {e}")
             # Fallback to basic rectangle if sprite loading fails
-            self.sprites['walk'] = [self._create_basic_sprite()]
-            self.sprites['attack'] = [self._create_basic_sprite()]
+            sprites['walk'] = [cls._create_basic_sprite()]
+            sprites['attack'] = [cls._create_basic_sprite()]
             
-    def _load_goblin_sprites(self):
+    @staticmethod
+    def _load_goblin_sprites(sprites):
         """Create basic goblin sprite"""
         sprite = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE), pygame.SRCALPHA)
         
@@ -155,179 +247,179 @@ class Enemy:
                           (PLAYER_SIZE-14, 12, 4, 4))
         
         # Store the sprite for both walk and attack animations
-        self.sprites['walk'] = [sprite]
-        self.sprites['attack'] = [sprite]
+        sprites['walk'] = [sprite]
+        sprites['attack'] = [sprite]
         
-    def _create_basic_sprite(self):
+    @staticmethod
+    def _create_basic_sprite():
         """Create a basic rectangular sprite as fallback"""
         sprite = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE), pygame.SRCALPHA)
         pygame.draw.rect(sprite, (255, 0, 0), 
                         (4, 4, PLAYER_SIZE-8, PLAYER_SIZE-8))
         return sprite
         
-    def update(self, dt, player, game_map):
+    def update(self, dt, player, game_map, field_of_view=None, path_planner=None, flow_field=None,
+               line_of_sight=None):
         """Update enemy state"""
         if not self.is_alive:
             return
             
         # Update timers
-        if self.attack_timer > 0:
-            self.attack_timer -= dt
-        if self.hit_timer > 0:
-            self.hit_timer -= dt
-            if self.hit_timer <= 0:
-                self.is_hit = False
+        self.update_timers(dt)
                 
         # Handle knockback
         if self.knockback_distance > 0:
             move_distance = min(self.knockback_distance, 10 * dt)
-            new_x = self.x + self.knockback_direction[0] * move_distance
-            new_y = self.y + self.knockback_direction[1] * move_distance
-            
-            if game_map.is_walkable(new_x + PLAYER_SIZE/2, new_y + PLAYER_SIZE/2):
-                self.x = new_x
-                self.y = new_y
-                self.rect.x = new_x
-                self.rect.y = new_y
-            else:
+            if any(self._slide(self.knockback_direction[0] * move_distance,
+                               self.knockback_direction[1] * move_distance, game_map)):
                 # If we hit a wall, stop knockback
                 self.knockback_distance = 0
             
             self.knockback_distance -= move_distance
             
         else:
-            # Normal movement and combat
-            dist_to_player = math.sqrt((player.x - self.x)**2 + (player.y - self.y)**2)
+            # Idle, patrol, chase, attack, flee or return home, as the behaviour table decides
+            context = BehaviourContext(player, game_map, field_of_view, path_planner, flow_field, line_of_sight)
+            self.behaviour.update(self, context, dt)
+
+    def _move_toward(self, target_x, target_y, dt, game_map, speed_scale=1.0):
+        """Step toward a position, sliding along or backing off walls when the direct move is blocked"""
+        dx = target_x - self.x
+        dy = target_y - self.y
+        length = math.sqrt(dx**2 + dy**2)
+        if length > 0:
+            dx = dx / length
+            dy = dy / length
             
-            # Check if player is in line of sight (simple raycast)
-            has_line_of_sight = self._check_line_of_sight(player, game_map)
+            # Check if stuck
+            current_pos = (self.x, self.y)
+            if (abs(current_pos[0] - self.last_position[0]) < 1 and
+                abs(current_pos[1] - self.last_position[1]) < 1):
+                self.stuck_timer += dt
+            else:
+                self.stuck_timer = 0
+                self.last_position = current_pos
             
-            # Update aggro state
-            if dist_to_player < self.aggro_range and has_line_of_sight:
-                self.is_aggroed = True
-                self.aggro_timer = self.aggro_duration
-                self.last_seen_pos = (player.x, player.y)
-            elif self.is_aggroed:
-                self.aggro_timer -= dt
-                if self.aggro_timer <= 0:
-                    self.is_aggroed = False
-                    self.last_seen_pos = None
+            # If stuck, try alternative movement patterns
+            if self.stuck_timer >= self.stuck_threshold and self.stuck_cooldown <= 0:
+                # Try moving perpendicular to the stuck direction
+                attempted_moves = [
+                    (-dy, dx),  # 90 degrees right
+                    (dy, -dx),  # 90 degrees left
+                    (-dx, -dy), # Backwards
+                    (dx, 0),    # Horizontal only
+                    (0, dy)     # Vertical only
+                ]
+                self.stuck_cooldown = 1.0  # Wait before trying again
+            else:
+                # Normal movement patterns
+                attempted_moves = [
+                    (dx, dy),  # Try direct path first
+                    (dx, 0),   # Try horizontal movement
+                    (0, dy),   # Try vertical movement
+                    (-dy, dx), # Try perpendicular movement (right)
+                    (dy, -dx)  # Try perpendicular movement (left)
+                ]
             
-            # Movement logic
-            if self.is_aggroed:
-                # Update facing direction
-                self.facing_left = player.x < self.x
-                
-                if dist_to_player > self.attack_range:  # Only move if not in attack range
-                    # Calculate direction to target (either player or last seen position)
-                    target_x = player.x if has_line_of_sight else self.last_seen_pos[0]
-                    target_y = player.y if has_line_of_sight else self.last_seen_pos[1]
-                    
-                    dx = target_x - self.x
-                    dy = target_y - self.y
-                    length = math.sqrt(dx**2 + dy**2)
-                    if length > 0:
-                        dx = dx / length
-                        dy = dy / length
-                        
-                        # Check if stuck
-                        current_pos = (self.x, self.y)
-                        if (abs(current_pos[0] - self.last_position[0]) < 1 and
-                            abs(current_pos[1] - self.last_position[1]) < 1):
-                            self.stuck_timer += dt
-                        else:
-                            self.stuck_timer = 0
-                            self.last_position = current_pos
-                        
-                        # If stuck, try alternative movement patterns
-                        if self.stuck_timer >= self.stuck_threshold and self.stuck_cooldown <= 0:
-                            # Try moving perpendicular to the stuck direction
-                            attempted_moves = [
-                                (-dy, dx),  # 90 degrees right
-                                (dy, -dx),  # 90 degrees left
-                                (-dx, -dy), # Backwards
-                                (dx, 0),    # Horizontal only
-                                (0, dy)     # Vertical only
-                            ]
-                            self.stuck_cooldown = 1.0  # Wait before trying again
-                        else:
-                            # Normal movement patterns
-                            attempted_moves = [
-                                (dx, dy),  # Try direct path first
-                                (dx, 0),   # Try horizontal movement
-                                (0, dy),   # Try vertical movement
-                                (-dy, dx), # Try perpendicular movement (right)
-                                (dy, -dx)  # Try perpendicular movement (left)
-                            ]
-                        
-                        # Update stuck cooldown
-                        if self.stuck_cooldown > 0:
-                            self.stuck_cooldown -= dt
-                        
-                        # Try each movement pattern
-                        moved = False
-                        for move_dx, move_dy in attempted_moves:
-                            # Scale movement by speed and time
-                            new_x = self.x + move_dx * self.speed * dt
-                            new_y = self.y + move_dy * self.speed * dt
-                            
-                            # Check if new position is walkable
-                            if game_map.is_walkable(new_x + PLAYER_SIZE/2, new_y + PLAYER_SIZE/2):
-                                # Move to new position
-                                self.x = new_x
-                                self.y = new_y
-                                self.rect.x = new_x
-                                self.rect.y = new_y
-                                moved = True
-                                break
-                        
-                        # Update animation if we moved
-                        if moved:
-                            self.animation_timer += dt
-                            if self.animation_timer >= self.animation_speed:
-                                self.animation_timer = 0
-                                self.animation_frame = (self.animation_frame + 1) % len(self.sprites['walk'])
-                
-                # Attack if in range and cooldown is ready
-                if dist_to_player <= self.attack_range and self.attack_timer <= 0 and has_line_of_sight:
-                    self.attack(player)
-                    
-        # Update damage numbers
-        self.damage_numbers = [(dmg, x, y, timer - dt, color) 
-                             for dmg, x, y, timer, color in self.damage_numbers 
-                             if timer > 0]
-                             
-    def _check_line_of_sight(self, player, game_map):
-        """Check if there's a clear line of sight to the player"""
-        # Get start and end points
+            # Update stuck cooldown
+            if self.stuck_cooldown > 0:
+                self.stuck_cooldown -= dt
+            
+            # Try each movement pattern until one gets anywhere, sliding along walls
+            moved = False
+            for move_dx, move_dy in attempted_moves:
+                # Scale movement by speed and time
+                start_x, start_y = self.x, self.y
+                self._slide(move_dx * self.speed * speed_scale * dt,
+                            move_dy * self.speed * speed_scale * dt, game_map)
+                if abs(self.x - start_x) > 0.01 or abs(self.y - start_y) > 0.01:
+                    moved = True
+                    break
+            
+            # Update animation if we moved
+            if moved:
+                self.animation_timer += dt
+                if self.animation_timer >= self.animation_speed:
+                    self.animation_timer = 0
+                    self.animation_frame = (self.animation_frame + 1) % len(self.sprites['walk'])
+    
+    def _slide(self, dx, dy, game_map):
+        """Move by (dx, dy), sliding the footprint along walls, returning (blocked_x, blocked_y)"""
+        inset = (PLAYER_SIZE - HITBOX_SIZE) / 2
+        x, y, blocked_x, blocked_y = move_and_slide(self.x + inset, self.y + inset, HITBOX_SIZE, HITBOX_SIZE,
+                                                    dx, dy, game_map.is_walkable_tile, game_map.tile_size)
+        self.x = x - inset
+        self.y = y - inset
+        self.rect.x = self.x
+        self.rect.y = self.y
+        return blocked_x, blocked_y
+    
+    def _flow_waypoint(self, flow_field, game_map, target_x, target_y):
+        """Get the position of the next tile toward a target from the shared flow field,
+        or None when the field leads to another tile"""
+        tile_size = game_map.tile_size
+        goal = (int((target_x + PLAYER_SIZE/2) // tile_size), int((target_y + PLAYER_SIZE/2) // tile_size))
+        if goal != flow_field.target:
+            return None
+        next_tile = flow_field.next_tile(int((self.x + PLAYER_SIZE/2) // tile_size),
+                                         int((self.y + PLAYER_SIZE/2) // tile_size))
+        if next_tile is None:
+            return None
+        return (next_tile[0] * tile_size + tile_size/2 - PLAYER_SIZE/2,
+                next_tile[1] * tile_size + tile_size/2 - PLAYER_SIZE/2)
+    
+    def _next_waypoint(self, target_x, target_y, game_map, path_planner=None):
+        """Get the position to head for along the cached path, replanning when the goal tile changes"""
+        tile_size = game_map.tile_size
+        start = (int((self.x + PLAYER_SIZE/2) // tile_size), int((self.y + PLAYER_SIZE/2) // tile_size))
+        goal = (int((target_x + PLAYER_SIZE/2) // tile_size), int((target_y + PLAYER_SIZE/2) // tile_size))
+        
+        # Skip the waypoints already reached
+        if start in self.path:
+            del self.path[:self.path.index(start) + 1]
+        
+        # Replan only when the target changed tile or the map blocked the path
+        blocked = self.path and not game_map.is_walkable_tile(*self.path[0])
+        if goal != self.path_goal or blocked:
+            self.path_goal = goal
+            if blocked:
+                self.path = []
+            if path_planner is not None:
+                path_planner.request(self, start, goal, self._set_path)
+            else:
+                self._set_path(find_path(start, goal, game_map.is_walkable_tile))
+        
+        if start == goal or not self.path:
+            return None
+        tile_x, tile_y = self.path[0]
+        return (tile_x * tile_size + tile_size/2 - PLAYER_SIZE/2,
+                tile_y * tile_size + tile_size/2 - PLAYER_SIZE/2)
+    
+    def _set_path(self, path):
+        """Store a planned path; None (no route) falls back to steering straight at the target"""
+        self.path = path or []
+    
+    def update_timers(self, dt):
+        """Count down the attack and hit cooldowns"""
+        if self.attack_timer > 0:
+            self.attack_timer -= dt
+        if self.hit_timer > 0:
+            self.hit_timer -= dt
+            if self.hit_timer <= 0:
+                self.is_hit = False
+    
+    def _check_line_of_sight(self, player, game_map, line_of_sight=None):
+        """Check that no wall lies on the tiles between this enemy and the player"""
         start_x = self.x + PLAYER_SIZE/2
         start_y = self.y + PLAYER_SIZE/2
         end_x = player.x + PLAYER_SIZE/2
         end_y = player.y + PLAYER_SIZE/2
         
-        # Calculate direction and distance
-        dx = end_x - start_x
-        dy = end_y - start_y
-        distance = math.sqrt(dx*dx + dy*dy)
-        
-        if distance == 0:
-            return True
-            
-        # Normalize direction
-        dx = dx / distance
-        dy = dy / distance
-        
-        # Check points along the line
-        steps = int(distance / (PLAYER_SIZE/2))  # Check every half player size
-        for i in range(steps):
-            check_x = start_x + dx * i * (PLAYER_SIZE/2)
-            check_y = start_y + dy * i * (PLAYER_SIZE/2)
-            
-            # If any point is not walkable, there's no line of sight
-            if not game_map.is_walkable(check_x, check_y):
-                return False
-                
-        return True
+        # Enemies sharing a tile share the answer for the rest of the tick
+        if line_of_sight is not None:
+            return line_of_sight.check(start_x, start_y, end_x, end_y)
+        return tile_line_of_sight(start_x, start_y, end_x, end_y,
+                                  game_map.is_opaque_tile, game_map.tile_size)
     
     def take_damage(self, damage, knockback_direction=None, damage_color=(255, 255, 255), player=None):
         """Take damage and handle knockback"""
@@ -339,13 +431,9 @@ class Enemy:
         self.current_health -= actual_damage
         
         # Add damage number with color
-        self.damage_numbers.append((
-            actual_damage,
-            self.x + random.randint(-10, 10),
-            self.y - 20,
-            self.damage_number_duration,
-            damage_color
-        ))
+        if self.events:
+            self.events.emit(events.DAMAGE, target='enemy', x=self.x, y=self.y,
+                             amount=actual_damage, color=tuple(damage_color))
         
         # Apply knockback
         if knockback_direction:
@@ -359,9 +447,12 @@ class Enemy:
         if self.current_health <= 0:
             self.current_health = 0
             self.is_alive = False
+            scaled_xp = int(self.exp_value * (1 + (self.level - 1) * 0.1))  # 10% more XP per level
+            if self.events:
+                self.events.emit(events.DEATH, x=self.x + PLAYER_SIZE/2, y=self.y + PLAYER_SIZE/2,
+                                 kind=self.enemy_type, exp=scaled_xp)
             # Grant XP to player when defeated
             if player and hasattr(player, 'gain_xp'):
-                scaled_xp = int(self.exp_value * (1 + (self.level - 1) * 0.1))  # 10% more XP per level
                 player.gain_xp(scaled_xp)
             
     def attack(self, player):
@@ -390,6 +481,16 @@ class Enemy:
         )  # Add some randomness
         player.take_damage(damage, knockback_direction)
     
+    @classmethod
+    def _get_shadow(cls):
+        """Get the shadow drawn under every enemy, creating it on first use"""
+        if cls._shadow is None:
+            shadow_height = 4
+            cls._shadow = pygame.Surface((PLAYER_SIZE, shadow_height), pygame.SRCALPHA)
+            pygame.draw.ellipse(cls._shadow, (0, 0, 0, 128), 
+                              (0, 0, PLAYER_SIZE, shadow_height))
+        return cls._shadow
+    
     def draw(self, screen, camera_x=0, camera_y=0):
         """Draw the enemy"""
         if not self.is_alive:
@@ -399,30 +500,16 @@ class Enemy:
         screen_y = self.rect.y - camera_y
         
         # Draw shadow
-        shadow_height = 4
-        shadow_surface = pygame.Surface((PLAYER_SIZE, shadow_height), pygame.SRCALPHA)
-        pygame.draw.ellipse(shadow_surface, (0, 0, 0, 128), 
-                          (0, 0, PLAYER_SIZE, shadow_height))
+        shadow_surface = self._get_shadow()
         screen.blit(shadow_surface, (
             screen_x,
-            screen_y + PLAYER_SIZE - shadow_height/2
+            screen_y + PLAYER_SIZE - shadow_surface.get_height()/2
         ))
         
-        # Get current sprite based on state
-        sprite_list = self.sprites['attack'] if self.is_attacking else self.sprites['walk']
-        current_sprite = sprite_list[self.animation_frame % len(sprite_list)]
-        
-        # Flip sprite if facing left
-        if self.facing_left:
-            current_sprite = pygame.transform.flip(current_sprite, True, False)
-        
-        # Flash white when hit
-        if self.is_hit:
-            white_sprite = current_sprite.copy()
-            white_sprite.fill((255, 255, 255, 180), special_flags=pygame.BLEND_RGBA_MULT)
-            screen.blit(white_sprite, (screen_x, screen_y))
-        else:
-            screen.blit(current_sprite, (screen_x, screen_y))
+        # Get current sprite based on state, already flipped if facing left and flashed when hit
+        animation = 'attack' if self.is_attacking else 'walk'
+        sprite_list = self.sprite_variants[(animation, self.facing_left, self.is_hit)]
+        screen.blit(sprite_list[self.animation_frame % len(sprite_list)], (screen_x, screen_y))
             
         # Draw health bar with improved visuals
         health_pct = self.current_health / self.max_health
@@ -447,43 +534,3 @@ class Enemy:
             highlight_height = max(1, int(bar_height * 0.3))
             pygame.draw.rect(screen, (min(red + 50, 255), min(green + 50, 255), 50),
                            (bar_x, bar_y, bar_width * health_pct, highlight_height))
-                        
-        # Draw damage numbers with improved visuals
-        font = pygame.font.Font(None, 24)
-        for damage, x, y, timer, color in self.damage_numbers:
-            # Float up and fade out with bounce effect
-            progress = (self.damage_number_duration - timer) / self.damage_number_duration
-            y_offset = -30 * progress  # Base upward movement
-            
-            # Add bounce effect
-            bounce = math.sin(progress * math.pi * 2) * 5 * (1 - progress)
-            y_offset += bounce
-            
-            # Scale based on damage
-            scale = min(1.5, 1 + damage / 50)  # Max 1.5x size for big hits
-            
-            # Fade out
-            alpha = int(255 * (1 - progress))
-            
-            # Render with outline for better visibility
-            text = font.render(str(damage), True, color)
-            text = pygame.transform.scale(text, 
-                (int(text.get_width() * scale), 
-                 int(text.get_height() * scale)))
-            
-            # Create outline
-            outline = font.render(str(damage), True, (0, 0, 0))
-            outline = pygame.transform.scale(outline, 
-                (int(outline.get_width() * scale), 
-                 int(outline.get_height() * scale)))
-            
-            # Position for centered text
-            text_x = x - text.get_width()/2 - camera_x
-            text_y = y + y_offset - text.get_height()/2 - camera_y
-            
-            # Draw outline then text
-            for dx, dy in [(-1,-1), (-1,1), (1,-1), (1,1)]:
-                outline.set_alpha(alpha)
-                screen.blit(outline, (text_x + dx, text_y + dy))
-            text.set_alpha(alpha)
-            screen.blit(text, (text_x, text_y))
\ No newline at end of file
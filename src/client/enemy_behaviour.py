@@ -0,0 +1,330 @@
+import math
+import random
+
+# Behaviour tables: each state names the action run every update, an optional action run on
+# entering it, how many seconds pass between checks of its transitions, and its transitions
+# as (guard, next state) pairs tried in order. Enemy types pick a table by name and tune it
+# through the numbers in Enemy.ENEMY_TYPES
+BEHAVIOURS = {
+    "skirmisher": {
+        "initial": "idle",
+        "states": {
+            "idle": {
+                "think_interval": 0.5,
+                "transitions": [("sees_player", "chase"), ("was_hit", "chase"), ("idle_expired", "patrol")],
+            },
+            "patrol": {
+                "action": "patrol",
+                "enter": "pick_patrol_point",
+                "think_interval": 0.25,
+                "transitions": [("sees_player", "chase"), ("was_hit", "chase"), ("reached_patrol_point", "idle")],
+            },
+            "chase": {
+                "action": "chase",
+                "enter": "aggro",
+                "think_interval": 0,
+                "transitions": [("low_health", "flee"), ("in_attack_range", "attack"), ("lost_player", "return_home")],
+            },
+            "attack": {
+                "action": "attack",
+                "think_interval": 0,
+                "transitions": [("low_health", "flee"), ("lost_player", "return_home"),
+                                ("out_of_attack_range", "chase")],
+            },
+            "flee": {
+                "action": "flee",
+                "think_interval": 0.25,
+                "transitions": [("out_of_aggro_range", "return_home")],
+            },
+            "return_home": {
+                "action": "return_home",
+                "enter": "calm",
+                "think_interval": 0.25,
+                "transitions": [("sees_player", "chase"), ("was_hit", "chase"), ("at_home", "idle")],
+            },
+        },
+    },
+    "brute": {
+        "initial": "idle",
+        "states": {
+            "idle": {
+                "think_interval": 0.5,
+                "transitions": [("sees_player", "chase"), ("was_hit", "chase")],
+            },
+            "chase": {
+                "action": "chase",
+                "enter": "aggro",
+                "think_interval": 0,
+                "transitions": [("in_attack_range", "attack"), ("lost_player", "return_home")],
+            },
+            "attack": {
+                "action": "attack",
+                "think_interval": 0,
+                "transitions": [("lost_player", "return_home"), ("out_of_attack_range", "chase")],
+            },
+            "return_home": {
+                "action": "return_home",
+                "enter": "calm",
+                "think_interval": 0.5,
+                "transitions": [("sees_player", "chase"), ("was_hit", "chase"), ("at_home", "idle")],
+            },
+        },
+    },
+}
+
+HOME_RADIUS = 8  # Pixels from home (or a patrol point) that count as arrived
+
+class BehaviourContext:
+    """What an enemy's behaviour can see this update, with the costly answers worked out on first use"""
+    def __init__(self, player, game_map, field_of_view=None, path_planner=None, flow_field=None,
+                 line_of_sight=None):
+        self.player = player
+        self.game_map = game_map
+        self.field_of_view = field_of_view
+        self.path_planner = path_planner
+        self.flow_field = flow_field
+        self.line_of_sight = line_of_sight
+        self.enemy = None
+        self._distance = None
+        self._has_line_of_sight = None
+
+    def begin(self, enemy):
+        """Start answering for another enemy"""
+        self.enemy = enemy
+        self._distance = None
+        self._has_line_of_sight = None
+
+    def distance(self):
+        """Distance from the enemy to the player"""
+        if self._distance is None:
+            self._distance = math.sqrt((self.player.x - self.enemy.x)**2 + (self.player.y - self.enemy.y)**2)
+        return self._distance
+
+    def has_line_of_sight(self):
+        """Check if the enemy can see the player (the player's view works both ways)"""
+        if self._has_line_of_sight is None:
+            enemy = self.enemy
+            if self.field_of_view is not None:
+                self._has_line_of_sight = self.field_of_view.can_see(enemy.x + enemy.rect.width/2,
+                                                                     enemy.y + enemy.rect.height/2)
+            else:
+                self._has_line_of_sight = enemy._check_line_of_sight(self.player, self.game_map,
+                                                                     self.line_of_sight)
+        return self._has_line_of_sight
+
+    def sees_player(self):
+        """Check if the player is within aggro range and in sight"""
+        return self.distance() < self.enemy.aggro_range and self.has_line_of_sight()
+
+# Guards: (enemy, context) -> bool
+def _guard_sees_player(enemy, context):
+    return context.sees_player()
+
+def _guard_was_hit(enemy, context):
+    return enemy.is_hit
+
+def _guard_idle_expired(enemy, context):
+    return enemy.state_time >= enemy.idle_time
+
+def _guard_reached_patrol_point(enemy, context):
+    # Give up on points that cannot be reached in time
+    if enemy.patrol_target is None or enemy.state_time >= enemy.patrol_time:
+        return True
+    return math.hypot(enemy.patrol_target[0] - enemy.x, enemy.patrol_target[1] - enemy.y) <= HOME_RADIUS
+
+def _guard_low_health(enemy, context):
+    return enemy.current_health <= enemy.max_health * enemy.flee_health
+
+def _guard_in_attack_range(enemy, context):
+    return context.distance() <= enemy.attack_range
+
+def _guard_out_of_attack_range(enemy, context):
+    return context.distance() > enemy.attack_range
+
+def _guard_out_of_aggro_range(enemy, context):
+    return context.distance() >= enemy.aggro_range
+
+def _guard_lost_player(enemy, context):
+    return not enemy.is_aggroed
+
+def _guard_at_home(enemy, context):
+    return math.hypot(enemy.home_x - enemy.x, enemy.home_y - enemy.y) <= HOME_RADIUS
+
+GUARDS = {
+    "sees_player": _guard_sees_player,
+    "was_hit": _guard_was_hit,
+    "idle_expired": _guard_idle_expired,
+    "reached_patrol_point": _guard_reached_patrol_point,
+    "low_health": _guard_low_health,
+    "in_attack_range": _guard_in_attack_range,
+    "out_of_attack_range": _guard_out_of_attack_range,
+    "out_of_aggro_range": _guard_out_of_aggro_range,
+    "lost_player": _guard_lost_player,
+    "at_home": _guard_at_home,
+}
+
+# Actions: (enemy, context, dt)
+def _refresh_aggro(enemy, context, dt):
+    """Keep the aggro timer full while the player is seen, forgetting them once it runs out"""
+    if context.sees_player():
+        enemy.is_aggroed = True
+        enemy.aggro_timer = enemy.aggro_duration
+        enemy.last_seen_pos = (context.player.x, context.player.y)
+    elif enemy.is_aggroed:
+        enemy.aggro_timer -= dt
+        if enemy.aggro_timer <= 0:
+            enemy.is_aggroed = False
+            enemy.last_seen_pos = None
+
+def _action_aggro(enemy, context, dt):
+    # Being hit gives the player away even out of sight
+    enemy.is_aggroed = True
+    enemy.aggro_timer = enemy.aggro_duration
+    enemy.last_seen_pos = (context.player.x, context.player.y)
+
+def _action_calm(enemy, context, dt):
+    enemy.is_aggroed = False
+    enemy.last_seen_pos = None
+
+def _action_chase(enemy, context, dt):
+    _refresh_aggro(enemy, context, dt)
+    if not enemy.is_aggroed:
+        return
+    player = context.player
+    enemy.facing_left = player.x < enemy.x
+    if context.distance() <= enemy.attack_range:  # Only move if not in attack range
+        return
+
+    # Head for the player, or where they were last seen
+    if context.has_line_of_sight():
+        target_x, target_y = player.x, player.y
+    else:
+        target_x, target_y = enemy.last_seen_pos
+
+    # Walk around walls along the shared flow field, which only leads to the player's tile,
+    # or a planned path outside it or to where the player was last seen
+    waypoint = None
+    if context.flow_field:
+        waypoint = enemy._flow_waypoint(context.flow_field, context.game_map, target_x, target_y)
+    if waypoint is None:
+        waypoint = enemy._next_waypoint(target_x, target_y, context.game_map, context.path_planner)
+    if waypoint:
+        target_x, target_y = waypoint
+    enemy._move_toward(target_x, target_y, dt, context.game_map)
+
+def _action_attack(enemy, context, dt):
+    _refresh_aggro(enemy, context, dt)
+    enemy.facing_left = context.player.x < enemy.x
+    if enemy.attack_timer <= 0 and context.distance() <= enemy.attack_range and context.has_line_of_sight():
+        enemy.attack(context.player)
+
+def _action_flee(enemy, context, dt):
+    player = context.player
+    enemy.facing_left = player.x > enemy.x
+    dx = enemy.x - player.x
+    dy = enemy.y - player.y
+    length = math.sqrt(dx**2 + dy**2) or 1
+    enemy._move_toward(enemy.x + dx / length * 100, enemy.y + dy / length * 100, dt, context.game_map)
+
+def _action_pick_patrol_point(enemy, context, dt):
+    angle = random.uniform(0, math.pi * 2)
+    distance = random.uniform(0, enemy.patrol_radius)
+    x = enemy.home_x + math.cos(angle) * distance
+    y = enemy.home_y + math.sin(angle) * distance
+    size = enemy.rect.width
+    tile_size = context.game_map.tile_size
+    walkable = context.game_map.is_walkable_tile(int((x + size/2) // tile_size), int((y + size/2) // tile_size))
+    enemy.patrol_target = (x, y) if walkable else None
+
+def _action_patrol(enemy, context, dt):
+    if enemy.patrol_target is not None:
+        enemy.facing_left = enemy.patrol_target[0] < enemy.x
+        enemy._move_toward(*enemy.patrol_target, dt, context.game_map, enemy.patrol_speed)
+
+def _action_return_home(enemy, context, dt):
+    target_x, target_y = enemy.home_x, enemy.home_y
+    enemy.facing_left = target_x < enemy.x
+    waypoint = enemy._next_waypoint(target_x, target_y, context.game_map, context.path_planner)
+    if waypoint:
+        target_x, target_y = waypoint
+    enemy._move_toward(target_x, target_y, dt, context.game_map, enemy.patrol_speed)
+
+ACTIONS = {
+    "aggro": _action_aggro,
+    "calm": _action_calm,
+    "chase": _action_chase,
+    "attack": _action_attack,
+    "flee": _action_flee,
+    "pick_patrol_point": _action_pick_patrol_point,
+    "patrol": _action_patrol,
+    "return_home": _action_return_home,
+}
+
+class BehaviourState:
+    """One state of a compiled behaviour, with its guards and actions looked up"""
+    def __init__(self, name, index, action, enter, think_interval):
+        self.name = name
+        self.index = index  # Position in the table, as numbered by the batch enemy store
+        self.action = action
+        self.enter = enter
+        self.think_interval = think_interval
+        self.transitions = []  # List of (guard, BehaviourState)
+
+class Behaviour:
+    """State machine compiled from a behaviour table, shared by every enemy that uses it"""
+    def __init__(self, name, table):
+        self.name = name
+        self.table = table
+        self.states = {}  # Dictionary of {state_name: BehaviourState}
+        for index, (state_name, state_table) in enumerate(table["states"].items()):
+            self.states[state_name] = BehaviourState(
+                state_name,
+                index,
+                ACTIONS[state_table["action"]] if "action" in state_table else None,
+                ACTIONS[state_table["enter"]] if "enter" in state_table else None,
+                state_table.get("think_interval", 0)
+            )
+        # Resolve transitions once the states all exist
+        for state_name, state_table in table["states"].items():
+            self.states[state_name].transitions = [
+                (GUARDS[guard], self.states[target]) for guard, target in state_table.get("transitions", ())
+            ]
+        self.initial = self.states[table["initial"]]
+        self.order = list(self.states.values())  # States by index
+
+    def start(self, enemy):
+        """Put an enemy in the initial state, staggering its first think"""
+        enemy.state = self.initial
+        enemy.state_time = 0
+        enemy.think_timer = random.uniform(0, self.initial.think_interval)
+
+    def enter(self, enemy, state, context, dt):
+        """Switch an enemy into a state"""
+        enemy.state = state
+        enemy.state_time = 0
+        enemy.think_timer = state.think_interval
+        if state.enter:
+            state.enter(enemy, context, dt)
+
+    def update(self, enemy, context, dt):
+        """Check the current state's transitions when it is time to think, then run its action"""
+        context.begin(enemy)
+        enemy.state_time += dt
+        enemy.think_timer -= dt
+        if enemy.think_timer <= 0:
+            enemy.think_timer = enemy.state.think_interval
+            for guard, target in enemy.state.transitions:
+                if guard(enemy, context):
+                    self.enter(enemy, target, context, dt)
+                    break
+        if enemy.state.action:
+            enemy.state.action(enemy, context, dt)
+
+_compiled = {}  # Dictionary of {behaviour_name: Behaviour}
+
+def get_behaviour(name):
+    """Get the compiled state machine of a behaviour table, compiling it on first use"""
+    behaviour = _compiled.get(name)
+    if behaviour is None:
+        behaviour = _compiled[name] = Behaviour(name, BEHAVIOURS[name])
+    return behaviour
@@ -0,0 +1,178 @@
+import pygame
+from ..common.constants import PLAYER_SIZE, HITBOX_SIZE
+from ..common.enemy_store import EnemyStore, StoreField, compile_behaviour
+from .enemy import Enemy
+
+class BatchEnemy(Enemy):
+    """Enemy whose simulation state lives in a slot of an EnemyStore"""
+    __slots__ = ('store', 'slot')
+
+    # Archetype values the store reads per enemy
+    ARCHETYPE_FIELDS = ('max_health', 'flee_health', 'patrol_radius', 'patrol_speed', 'patrol_time', 'idle_time')
+
+    x = StoreField('x')
+    y = StoreField('y')
+    speed = StoreField('speed')
+    attack_range = StoreField('attack_range')
+    aggro_range = StoreField('aggro_range')
+    current_health = StoreField('health', int)
+    attack_timer = StoreField('attack_timer')
+    hit_timer = StoreField('hit_timer')
+    aggro_timer = StoreField('aggro_timer')
+    aggro_duration = StoreField('aggro_duration')
+    knockback_distance = StoreField('knockback_distance')
+    animation_timer = StoreField('animation_timer')
+    animation_speed = StoreField('animation_speed')
+    animation_frame = StoreField('animation_frame', int)
+    is_alive = StoreField('alive', bool)
+    is_aggroed = StoreField('aggroed', bool)
+    facing_left = StoreField('facing_left', bool)
+    is_hit = StoreField('is_hit', bool)
+    state_time = StoreField('state_time')
+    think_timer = StoreField('think_timer')
+    home_x = StoreField('home_x')
+    home_y = StoreField('home_y')
+    stuck_timer = StoreField('stuck_timer')
+    stuck_cooldown = StoreField('stuck_cooldown')
+
+    def __init__(self, store, x, y, enemy_type="goblin"):
+        # The slot must exist before Enemy.__init__ writes the fields through it
+        self.store = store
+        self.slot = store.add()
+        super().__init__(x, y, enemy_type)
+        store.arrays['frame_count'][self.slot] = len(self.sprites['walk'])
+        for name in self.ARCHETYPE_FIELDS:
+            store.arrays[name][self.slot] = getattr(self, name)
+
+    @property
+    def rect(self):
+        return pygame.Rect(self.x, self.y, PLAYER_SIZE, PLAYER_SIZE)
+
+    @rect.setter
+    def rect(self, rect):
+        # Keep the sub-pixel position unless the rect actually moved
+        if (rect.x, rect.y) != (int(self.x), int(self.y)):
+            self.x = rect.x
+            self.y = rect.y
+
+    @property
+    def knockback_direction(self):
+        return (self.store.arrays['knockback_x'][self.slot], self.store.arrays['knockback_y'][self.slot])
+
+    @knockback_direction.setter
+    def knockback_direction(self, direction):
+        self.store.arrays['knockback_x'][self.slot] = direction[0]
+        self.store.arrays['knockback_y'][self.slot] = direction[1]
+
+    @property
+    def state(self):
+        return self.behaviour.order[self.store.arrays['state'][self.slot]]
+
+    @state.setter
+    def state(self, state):
+        self.store.arrays['state'][self.slot] = state.index
+
+    @property
+    def patrol_target(self):
+        if not self.store.arrays['has_patrol'][self.slot]:
+            return None
+        return (float(self.store.arrays['patrol_x'][self.slot]), float(self.store.arrays['patrol_y'][self.slot]))
+
+    @patrol_target.setter
+    def patrol_target(self, position):
+        self.store.arrays['has_patrol'][self.slot] = position is not None
+        if position is not None:
+            self.store.arrays['patrol_x'][self.slot] = position[0]
+            self.store.arrays['patrol_y'][self.slot] = position[1]
+
+    @property
+    def last_position(self):
+        return (float(self.store.arrays['last_x'][self.slot]), float(self.store.arrays['last_y'][self.slot]))
+
+    @last_position.setter
+    def last_position(self, position):
+        self.store.arrays['last_x'][self.slot] = position[0]
+        self.store.arrays['last_y'][self.slot] = position[1]
+
+    @property
+    def last_seen_pos(self):
+        if not self.store.arrays['has_last_seen'][self.slot]:
+            return None
+        return (float(self.store.arrays['last_seen_x'][self.slot]),
+                float(self.store.arrays['last_seen_y'][self.slot]))
+
+    @last_seen_pos.setter
+    def last_seen_pos(self, position):
+        self.store.arrays['has_last_seen'][self.slot] = position is not None
+        if position is not None:
+            self.store.arrays['last_seen_x'][self.slot] = position[0]
+            self.store.arrays['last_seen_y'][self.slot] = position[1]
+
+    def update(self, dt, player, game_map, field_of_view=None, path_planner=None, flow_field=None,
+               line_of_sight=None):
+        """Simulation runs in EnemyManager.update"""
+
+    def detach(self):
+        """Move this enemy's state into a private store so its old slot can be reused"""
+        store = EnemyStore(1, PLAYER_SIZE, HITBOX_SIZE)
+        slot = store.add(**{name: array[self.slot] for name, array in self.store.arrays.items()})
+        self.store = store
+        self.slot = slot
+
+class EnemyManager:
+    """Runs the AI of every enemy in one NumPy pass over an EnemyStore"""
+    # Enemies follow the same behaviour tables and collide with walls the same way as in the
+    # object path, with two things left out: no A* paths are planned (outside the flow field,
+    # chasing and returning home head straight for the goal, sliding along walls), and there is
+    # no AI level of detail, since the batch is cheap enough to think for every enemy every frame
+    def __init__(self, capacity=256):
+        self.store = EnemyStore(capacity, PLAYER_SIZE, HITBOX_SIZE)
+        self.enemies = []  # BatchEnemy of each store slot, in slot order
+        self.behaviours = []  # Compiled behaviour tables, indexed by the store's 'behaviour' field
+        self.behaviour_ids = {}  # Dictionary of {behaviour_name: index into behaviours}
+
+    def __len__(self):
+        return len(self.enemies)
+
+    def create(self, x, y, enemy_type="goblin"):
+        """Create an enemy backed by the store"""
+        enemy = BatchEnemy(self.store, x, y, enemy_type)
+        self.store.arrays['behaviour'][enemy.slot] = self._behaviour_id(enemy.behaviour)
+        self.enemies.append(enemy)
+        return enemy
+
+    def _behaviour_id(self, behaviour):
+        """Get the index of a behaviour in the compiled tables, compiling it on first use"""
+        index = self.behaviour_ids.get(behaviour.name)
+        if index is None:
+            index = self.behaviour_ids[behaviour.name] = len(self.behaviours)
+            self.behaviours.append(compile_behaviour(behaviour.table))
+        return index
+
+    def remove(self, enemy):
+        """Release an enemy's slot; the enemy keeps a private copy of its state"""
+        if enemy.store is not self.store:
+            return
+        slot = enemy.slot
+        enemy.detach()
+        moved = self.store.remove(slot)
+        last = self.enemies.pop()
+        if moved is not None:
+            last.slot = slot
+            self.enemies[slot] = last
+
+    def clear(self):
+        """Drop every enemy, leaving existing views with the old arrays"""
+        self.store = EnemyStore(self.store.capacity, PLAYER_SIZE, HITBOX_SIZE)
+        self.enemies = []
+
+    def update(self, dt, player, game_map, field_of_view=None, flow_field=None):
+        """Advance every enemy at once, letting the ones in range attack"""
+        if field_of_view is not None:
+            visible, opaque = field_of_view.get_visible_mask(), None
+        else:
+            visible, opaque = None, game_map.get_opaque_grid()
+        enemies = self.enemies
+        self.store.update(dt, player.x, player.y, game_map.get_walkable_grid(), game_map.tile_size,
+                          visible, flow_field, opaque, self.behaviours,
+                          lambda slot: enemies[slot].attack(player), game_map.grid_origin)
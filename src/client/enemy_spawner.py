@@ -2,8 +2,9 @@ import random
 from .enemy import Enemy
 
 class EnemySpawner:
-    def __init__(self, game_map):
+    def __init__(self, game_map, enemy_manager=None):
         self.game_map = game_map
+        self.enemy_manager = enemy_manager  # Creates store-backed enemies when set
         self.spawn_timer = 0
         self.spawn_interval = 5.0  # Spawn every 5 seconds
         self.max_enemies = 10
@@ -26,29 +27,48 @@ class EnemySpawner:
                     return enemy
         return None
         
+    @staticmethod
+    def prepare_map(game_map):
+        """Build and cache the pixel positions (with an enemy type or None) of every tile enemies can spawn on"""
+        if game_map.spawn_points:
+            game_map.spawn_table = list(game_map.spawn_points)
+            return game_map.spawn_table
+            
+        tile_size = game_map.tile_size
+        game_map.spawn_table = [
+            (x * tile_size, y * tile_size, None)
+            for x, y, tile in game_map.iter_tiles()
+            if game_map.is_walkable_tile(x, y)
+        ]
+        return game_map.spawn_table
+        
     def _find_spawn_point(self, player):
         """Find a valid spawn point away from the player"""
+        spawn_table = self.game_map.spawn_table
+        if spawn_table is None:
+            spawn_table = self.prepare_map(self.game_map)
+        if not spawn_table:
+            return None
+            
         for _ in range(self.max_spawn_attempts):
-            # Generate random position
-            x = random.randint(0, self.game_map.width - 1) * self.game_map.tile_size
-            y = random.randint(0, self.game_map.height - 1) * self.game_map.tile_size
+            # Pick a random walkable position
+            x, y, enemy_type = random.choice(spawn_table)
             
-            # Check if position is walkable
-            if not self.game_map.is_walkable(x, y):
-                continue
-                
             # Check distance from player
             dx = x - player.x
             dy = y - player.y
             distance = (dx * dx + dy * dy) ** 0.5
             
             if distance >= self.min_distance_from_player:
-                return (x, y)
+                return (x, y, enemy_type)
                 
         return None
         
-    def _create_enemy(self, x, y):
-        """Create a random enemy type at the given position"""
-        enemy_type = random.choice(["goblin", "zombie"])
+    def _create_enemy(self, x, y, enemy_type=None):
+        """Create an enemy of the given type (a random one by default) at the given position"""
+        if enemy_type not in Enemy.ENEMY_TYPES:
+            enemy_type = random.choice(list(Enemy.ENEMY_TYPES))
+        if self.enemy_manager is not None:
+            return self.enemy_manager.create(x, y, enemy_type)
         enemy = Enemy(x, y, enemy_type)
         return enemy
\ No newline at end of file
@@ -0,0 +1,95 @@
+import pygame
+import math
+import random
+from ..common.events import DAMAGE
+
+class FloatingText:
+    """Every floating damage number on screen, drawn from glyphs rendered once per colour and size"""
+    BASE_FONT_SIZE = 24
+    MAX_SCALE = 1.5  # Biggest hits draw at this times the base size
+    SCALE_STEP = 0.1  # Scales are rounded to buckets this far apart so their glyphs can be shared
+    DURATION = 1.0  # How long numbers stay on screen
+    RISE = 30  # Pixels a number floats up over its life
+    MAX_TEXTS = 200
+    OUTLINE_COLOR = (0, 0, 0)
+    OUTLINE_OFFSETS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+    def __init__(self):
+        self.texts = []  # List of [text, x, y, timer, color, size_bucket]
+        self.fonts = {}  # Dictionary of {size_bucket: pygame.font.Font}
+        self.glyphs = {}  # Dictionary of {(char, color, size_bucket): outlined glyph surface}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def subscribe(self, event_bus):
+        """Float the damage of every dispatched damage event"""
+        event_bus.subscribe(DAMAGE, self._on_damage)
+
+    def _on_damage(self, events):
+        for event in events:
+            self.add_damage(event['amount'], event['x'] + random.randint(-10, 10), event['y'] - 20, event['color'])
+
+    def add_damage(self, damage, x, y, color=(255, 255, 255)):
+        """Float a damage number up from a point, bigger for bigger hits"""
+        scale = min(self.MAX_SCALE, 1 + damage / 50)
+        size_bucket = int(round((scale - 1) / self.SCALE_STEP))
+        self.texts.append([str(damage), x, y, self.DURATION, tuple(color), size_bucket])
+        if len(self.texts) > self.MAX_TEXTS:
+            del self.texts[0]
+
+    def clear(self):
+        """Drop every floating number"""
+        self.texts.clear()
+
+    def update(self, dt):
+        """Age every floating number and drop expired ones"""
+        if self.texts:
+            texts = []
+            for text in self.texts:
+                text[3] -= dt
+                if text[3] > 0:
+                    texts.append(text)
+            self.texts = texts
+
+    def _get_font(self, size_bucket):
+        """Get the font of a size bucket, loading it on first use"""
+        font = self.fonts.get(size_bucket)
+        if font is None:
+            size = int(self.BASE_FONT_SIZE * (1 + size_bucket * self.SCALE_STEP))
+            font = self.fonts[size_bucket] = pygame.font.Font(None, size)
+        return font
+
+    def _get_glyph(self, char, color, size_bucket):
+        """Get a character rendered in a colour with its outline baked in, rendering it on first use"""
+        key = (char, color, size_bucket)
+        glyph = self.glyphs.get(key)
+        if glyph is None:
+            font = self._get_font(size_bucket)
+            text = font.render(char, True, color)
+            outline = font.render(char, True, self.OUTLINE_COLOR)
+            glyph = pygame.Surface((text.get_width() + 2, text.get_height() + 2), pygame.SRCALPHA)
+            for dx, dy in self.OUTLINE_OFFSETS:
+                glyph.blit(outline, (1 + dx, 1 + dy))
+            glyph.blit(text, (1, 1))
+            self.glyphs[key] = glyph
+        return glyph
+
+    def draw(self, screen, camera_x, camera_y):
+        """Draw every floating number, rising with a bounce and fading out"""
+        for text, x, y, timer, color, size_bucket in self.texts:
+            progress = (self.DURATION - timer) / self.DURATION
+            bounce = math.sin(progress * math.pi * 2) * 5 * (1 - progress)
+            y_offset = -self.RISE * progress + bounce
+            alpha = int(255 * (1 - progress))
+
+            glyphs = [self._get_glyph(char, color, size_bucket) for char in text]
+            # Neighbouring glyphs overlap by their outline so digits sit as close as a rendered string
+            width = sum(glyph.get_width() - 2 for glyph in glyphs) + 2
+            height = glyphs[0].get_height()
+            glyph_x = x - width/2 - camera_x
+            glyph_y = y + y_offset - height/2 - camera_y
+            for glyph in glyphs:
+                glyph.set_alpha(alpha)
+                screen.blit(glyph, (glyph_x, glyph_y))
+                glyph_x += glyph.get_width() - 2
@@ -47,14 +47,18 @@ class Item:
             self.icon.fill((128, 128, 128))
 
 class ItemDrop:
+    PICKUP_RANGE = 50
+    bob_speed = 2  # Float speed, the same for every drop
+
+    __slots__ = ('item', 'x', 'y', 'rect', 'pickup_range', 'bob_offset', 'bob_direction')
+
     def __init__(self, item, x, y):
         self.item = item
         self.x = x
         self.y = y
         self.rect = pygame.Rect(x, y, 32, 32)  # Items are 32x32
-        self.pickup_range = 50
+        self.pickup_range = self.PICKUP_RANGE
         self.bob_offset = 0
-        self.bob_speed = 2
         self.bob_direction = 1
         
     def update(self, dt):
@@ -1,17 +1,40 @@
 import pygame
 import sys
 import random
+import time
+from pathlib import Path
+from xml.etree.ElementTree import ParseError
 from .player import Player
 from .map import GameMap
 from .map_manager import MapManager
+from .tiled_importer import MAPS_DIR
+from .streaming_map import StreamingGameMap
+from .chunks import ChunkStore
 from .ui import UI
 from .enemy import Enemy
 from .item import Item, ItemType, ItemDrop
 from .particle_system import ParticleSystem
+from .floating_text import FloatingText
 from .enemy_spawner import EnemySpawner
+from .enemy_manager import EnemyManager
 from .npc_spawner import NPCSpawner
-from ..common.constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, PLAYER_SIZE
+from .minimap import Minimap
+from .visibility import FieldOfView
+from .triggers import TriggerType
+from ..common.constants import (SCREEN_WIDTH, SCREEN_HEIGHT, FPS, PLAYER_SIZE, BATCH_ENEMY_AI,
+                                AI_FULL_RANGE, AI_REDUCED_RANGE, AI_REDUCED_INTERVAL,
+                                SIMULATION_RATE, MAX_SIMULATION_STEPS)
 from ..common.tiles import TileType
+from ..common.spatial_hash import SpatialHash
+from ..common.pathfinding import PathPlanner
+from ..common.flow_field import FlowField
+from ..common.line_of_sight import LineOfSightCache
+from ..common.ai_scheduler import AIScheduler, LOD_FULL, LOD_REDUCED, LOD_DORMANT
+from ..common.events import EventBus, EventCounter, cell_key, EFFECT, DEATH, SPAWN, PICKUP
+
+SIMULATION_DT = 1.0 / SIMULATION_RATE
+MAX_INTERPOLATION_DISTANCE = 64  # Pixels; longer moves in one step (portals, respawns) are not blended
+WILDS_PATH = Path(__file__).resolve().parent.parent / 'assets' / 'maps' / 'wilds'  # Written by src.tools.generate_world
 
 class GameClient:
     def __init__(self):
@@ -21,7 +44,6 @@ class GameClient:
         pygame.display.set_caption("MMORPG Client")
         self.clock = pygame.time.Clock()
         self.running = True
-        self._initialized = True
 
         # Create map manager and multiple maps
         self.map_manager = MapManager()
@@ -65,6 +87,9 @@ class GameClient:
             "forest", 37 * 32, 20 * 32   # Target position in forest map
         )
         
+        # Streamed generated world below the forest, when one has been generated
+        self._add_wilds()
+        
         # Create player at center of town
         player_x = SCREEN_WIDTH // 2
         player_y = SCREEN_HEIGHT // 2
@@ -83,24 +108,67 @@ class GameClient:
         # Initialize UI
         self.ui = UI()
         self.equipment_visible = True  # Track equipment menu visibility
+        self.minimaps = {}  # Dictionary of {map_id: Minimap}, built the first time a map is shown
+        self.fields_of_view = {}  # Dictionary of {map_id: FieldOfView}
+        self.line_of_sight_caches = {}  # Dictionary of {map_id: LineOfSightCache}
+        self.minimap_visible = True
+
+        # Combat and effect events are queued as they happen and dispatched once a frame
+        self.events = EventBus()
+        self.events.coalesce(EFFECT, cell_key(16, 'effect', 'color'))  # One burst per spot and colour
+        self.player.events = self.events
+        self.event_counter = EventCounter()
+        self.events.subscribe_all(self.event_counter)
+        self.events.subscribe(DEATH, self._drop_loot)
 
         # Initialize particle system
         self.particle_system = ParticleSystem()
-        self.player.particle_system = self.particle_system
+        self.particle_system.subscribe(self.events)
 
+        # Damage numbers of the player and every enemy float in one shared list
+        self.floating_text = FloatingText()
+        self.floating_text.subscribe(self.events)
+
+        # Build spawn tables of portal destinations while the player approaches
+        self.map_manager.preload_steps.append(EnemySpawner.prepare_map)
+        
         # Initialize enemy spawner and enemies list
-        self.enemy_spawner = EnemySpawner(self.map_manager.get_current_map())
+        self.enemy_manager = EnemyManager() if BATCH_ENEMY_AI else None
+        self.enemy_spawner = EnemySpawner(self.map_manager.get_current_map(), self.enemy_manager)
         self.enemies = []
         self.items = []  # List to store active items
+        
+        # Spatial indexes so hit and pickup checks only look at nearby entities
+        self.enemy_index = SpatialHash(64)
+        self.item_index = SpatialHash(64)
+        self.player.enemy_index = self.enemy_index
+        
+        # Enemies near the player share one flow field; the rest plan paths a few per frame
+        self.flow_field = FlowField(radius=12)
+        self.path_planner = PathPlanner(searches_per_tick=4)
+        
+        # Enemies far from the player think less often, and not at all beyond the reduced range
+        self.ai_scheduler = AIScheduler(AI_FULL_RANGE, AI_REDUCED_RANGE, AI_REDUCED_INTERVAL)
+        self.ai_stats_visible = False
         self._spawn_test_enemies()
         
-        # Initialize NPC spawner and spawn some NPCs
-        self.npc_spawner = NPCSpawner()
+        # Initialize NPC spawners and spawn some NPCs in town
+        self.npc_spawners = {}  # Dictionary of {map_id: NPCSpawner}
         self._spawn_npcs()
+        
+        # Add the maps made in Tiled, with their NPCs
+        self._load_tiled_maps()
 
         # Camera position
         self.camera_x = 0
         self.camera_y = 0
+        
+        # Positions at the start of the last simulation step, blended toward the current ones when rendering
+        self.previous_camera = (0, 0)
+        self.previous_positions = {}  # Dictionary of {entity: (x, y)}
+        self.frame_stats = {'steps': 0, 'simulate_ms': 0.0, 'render_ms': 0.0}  # Averaged over recent frames
+        self.last_player_x = self.player.x
+        self.last_player_y = self.player.y
 
         # Animation timer
         self.animation_timer = 0
@@ -119,6 +187,8 @@ class GameClient:
             "SPACE - Fire Gun (if equipped)",
             "I - Toggle Inventory",
             "Q - Toggle Equipment Menu",
+            "M - Toggle Minimap",
+            "F3 - Toggle AI and Frame Stats",
             "E - Interact with NPCs/Portals",
             "H - Toggle Help Menu",
             "R - Emergency Respawn",
@@ -158,82 +228,171 @@ class GameClient:
         # Add more water features
         for x in range(10, 15):
             for y in range(8, 35):
-                forest_map.tiles[y][x].tile_type = TileType.WATER
+                forest_map.set_tile(x, y, TileType.WATER)
                 
         # Add stone formations
         for x in range(25, 30):
             for y in range(15, 20):
-                forest_map.tiles[y][x].tile_type = TileType.STONE
-                
-        forest_map._calculate_transitions()
+                forest_map.set_tile(x, y, TileType.STONE)
 
     def _customize_dungeon_map(self, dungeon_map):
         """Create a dungeon-themed map with more walls and stone"""
         # Create outer walls
         for x in range(dungeon_map.width):
-            dungeon_map.tiles[0][x].tile_type = TileType.WALL
-            dungeon_map.tiles[dungeon_map.height-1][x].tile_type = TileType.WALL
+            dungeon_map.set_tile(x, 0, TileType.WALL)
+            dungeon_map.set_tile(x, dungeon_map.height-1, TileType.WALL)
             
         for y in range(dungeon_map.height):
-            dungeon_map.tiles[y][0].tile_type = TileType.WALL
-            dungeon_map.tiles[y][dungeon_map.width-1].tile_type = TileType.WALL
+            dungeon_map.set_tile(0, y, TileType.WALL)
+            dungeon_map.set_tile(dungeon_map.width-1, y, TileType.WALL)
             
         # Add stone floor
         for y in range(1, dungeon_map.height-1):
             for x in range(1, dungeon_map.width-1):
-                dungeon_map.tiles[y][x].tile_type = TileType.STONE
+                dungeon_map.set_tile(x, y, TileType.STONE)
                 
         # Add some internal walls to create rooms
         for x in range(8, 12):
             for y in range(5, 20):
                 if y != 12:  # Leave a gap for passage
-                    dungeon_map.tiles[y][x].tile_type = TileType.WALL
-                    
-        dungeon_map._calculate_transitions()
+                    dungeon_map.set_tile(x, y, TileType.WALL)
+        
+        # Only reveal what the player can see
+        dungeon_map.fog_of_war = True
+            
+    def _add_wilds(self):
+        """Add the generated world, streamed chunk by chunk from disk, behind a portal at the bottom of the forest"""
+        if not (WILDS_PATH / ChunkStore.MANIFEST_NAME).exists():
+            return
+        wilds_map = StreamingGameMap(WILDS_PATH)
+        self.map_manager.add_map("wilds", wilds_map)
+        
+        # Load the middle of the world so the portal back can be placed there
+        center_x = wilds_map.width // 2
+        center_y = wilds_map.height // 2
+        wilds_map.preload_view(center_x * 32, center_y * 32, SCREEN_WIDTH, SCREEN_HEIGHT)
+        
+        # Generated terrain may be water or wall, clear some grass around the portal
+        for y in range(center_y - 1, center_y + 2):
+            for x in range(center_x - 1, center_x + 2):
+                wilds_map.set_tile(x, y, TileType.GRASS)
+        
+        # Forest -> Wilds portal
+        self.map_manager.add_portal(
+            "forest", 20 * 32, 38 * 32,  # Position in forest map
+            "wilds", (center_x + 1) * 32, center_y * 32  # Target position in wilds map
+        )
+        
+        # Wilds -> Forest portal
+        self.map_manager.add_portal(
+            "wilds", center_x * 32, center_y * 32,  # Position in wilds map
+            "forest", 20 * 32, 37 * 32  # Target position in forest map
+        )
             
-    def __del__(self):
-        if self._initialized:
-            pygame.quit()
-            self._initialized = False
+    def close(self):
+        """Let go of the game: stop background map work and drop the event handlers bound to this client"""
+        # Enemies and the player keep the bus, so without this a finished client stays reachable
+        # through any of them that outlive it
+        self.map_manager.close()
+        self.events.clear()
+        self.events.subscribers.clear()
+        self.events.all_subscribers.clear()
             
     def _spawn_npcs(self):
         """Spawn initial set of NPCs in safe locations"""
+        npc_spawner = self.npc_spawners["town"] = NPCSpawner()
+        
         # Spawn a villager
-        self.npc_spawner.spawn_npc(
+        npc_spawner.spawn_npc(
             SCREEN_WIDTH // 2 - 100,
             SCREEN_HEIGHT // 2 - 100,
             "villager"
         )
         
         # Spawn a merchant
-        self.npc_spawner.spawn_npc(
+        npc_spawner.spawn_npc(
             SCREEN_WIDTH // 2 + 100,
             SCREEN_HEIGHT // 2 - 100,
             "merchant"
         )
         
         # Spawn a guard
-        self.npc_spawner.spawn_npc(
+        npc_spawner.spawn_npc(
             SCREEN_WIDTH // 2,
             SCREEN_HEIGHT // 2 - 150,
             "guard"
         )
         
+        # Register the talk zones in the town's trigger grid
+        for npc in npc_spawner.npcs:
+            self.map_manager.add_npc_zone("town", npc, PLAYER_SIZE)
+            
+    def _load_tiled_maps(self):
+        """Add every map made in Tiled in the maps folder under its file name, with its NPCs"""
+        for path in sorted(MAPS_DIR.glob('*.tm[jx]')):
+            map_id = path.stem
+            try:
+                compiled = self.map_manager.load_tiled_map(map_id, path)
+            except (OSError, ValueError, KeyError, ParseError) as e:
+                print(f"Error loading Tiled map {path}: {e}")
+                continue
+            if compiled.npcs:
+                npc_spawner = self.npc_spawners[map_id] = NPCSpawner()
+                for x, y, npc_type in compiled.npcs:
+                    npc = npc_spawner.spawn_npc(x, y, npc_type)
+                    self.map_manager.add_npc_zone(map_id, npc, PLAYER_SIZE)
+        
     def _spawn_test_enemies(self):
         """Spawn initial set of enemies"""
         for _ in range(5):
             if spawn_point := self.enemy_spawner._find_spawn_point(self.player):
                 enemy = self.enemy_spawner._create_enemy(*spawn_point)
                 if enemy:
-                    self.enemies.append(enemy)
-                    if self.particle_system:
-                        self.particle_system.create_spawn_effect(
-                            enemy.x + PLAYER_SIZE/2,
-                            enemy.y + PLAYER_SIZE/2
-                        )
+                    self._add_enemy(enemy)
+                    self.events.emit(SPAWN, x=enemy.x + PLAYER_SIZE/2, y=enemy.y + PLAYER_SIZE/2,
+                                     kind=enemy.enemy_type)
 
-    def handle_events(self):
-        for event in pygame.event.get():
+    def _drop_loot(self, events):
+        """Roll an item drop where each enemy died"""
+        for event in events:
+            if random.random() < 0.3:  # 30% chance for item drop
+                # 20% chance for gun, 80% chance for potion
+                if random.random() < 0.2:
+                    item = Item("Pistol", ItemType.GUN, "A basic ranged weapon", "pistol.png", {
+                        "damage": 15,
+                        "range": 300,
+                        "cooldown": 0.5,
+                        "projectile_speed": 500
+                    })
+                else:
+                    potion_type = "greater_health_potion" if random.random() < 0.3 else "health_potion"
+                    item = Item("Health Potion", ItemType.POTION, "Restores HP", "potion.png", {
+                        "heal": 60 if potion_type == "greater_health_potion" else 30
+                    })
+                item_drop = ItemDrop(item, event['x'] - PLAYER_SIZE/2, event['y'] - PLAYER_SIZE/2)
+                self.items.append(item_drop)
+                self.item_index.insert(item_drop, item_drop.x, item_drop.y)
+
+    def _add_enemy(self, enemy):
+        """Start tracking an enemy"""
+        enemy.events = self.events
+        self.enemies.append(enemy)
+        self.enemy_index.insert(enemy, enemy.x, enemy.y, PLAYER_SIZE, PLAYER_SIZE)
+
+    def _remove_enemy(self, enemy):
+        """Stop tracking an enemy"""
+        self.enemies.remove(enemy)
+        self.enemy_index.remove(enemy)
+        self.path_planner.cancel(enemy)
+        self.ai_scheduler.forget(enemy)
+        if self.enemy_manager is not None:
+            self.enemy_manager.remove(enemy)
+
+    def handle_events(self, events=None):
+        """Handle this frame's events, read from pygame unless given (as when replaying)"""
+        if events is None:
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
@@ -247,13 +406,16 @@ class GameClient:
                 elif event.key == pygame.K_q:
                     # Toggle equipment menu
                     self.equipment_visible = not self.equipment_visible
+                elif event.key == pygame.K_m:
+                    self.minimap_visible = not self.minimap_visible
+                elif event.key == pygame.K_F3:
+                    self.ai_stats_visible = not self.ai_stats_visible
                 elif event.key == pygame.K_e:
                     # Check for NPC interaction
-                    for npc in self.npc_spawner.npcs:
-                        if npc.can_interact(self.player.x, self.player.y):
-                            self.show_dialog = True
-                            self.current_dialog = npc.get_next_dialogue()
-                            break
+                    for npc in self.map_manager.get_active(TriggerType.NPC):
+                        self.show_dialog = True
+                        self.current_dialog = npc.get_next_dialogue()
+                        break
                 elif event.key == pygame.K_r:  # Emergency respawn
                     self.player.x = SCREEN_WIDTH // 2
                     self.player.y = SCREEN_HEIGHT // 2
@@ -270,16 +432,19 @@ class GameClient:
                 if event.button == 1:  # Left click
                     # Handle inventory clicks if inventory is visible
                     if self.player.inventory.visible:
-                        mouse_pos = pygame.mouse.get_pos()
                         clicked_item = self.player.inventory.handle_click(
-                            mouse_pos[0], mouse_pos[1],
+                            event.pos[0], event.pos[1],
                             self.screen.get_width(), self.screen.get_height()
                         )
                         if clicked_item:
                             self.player.equip_item(self.player.inventory.selected_slot)
 
-    def update(self):
-        dt = self.clock.get_time() / 1000.0  # Convert to seconds
+    def update(self, dt=None, keys=None):
+        """Advance the game by dt seconds with the given held keys (the clock and keyboard by default)"""
+        if dt is None:
+            dt = self.clock.get_time() / 1000.0  # Convert to seconds
+        if keys is None:
+            keys = pygame.key.get_pressed()
         
         # Update animation timer
         self.animation_timer += dt
@@ -292,9 +457,23 @@ class GameClient:
         
         # Handle player input and movement
         current_map = self.map_manager.get_current_map()
-        self.player.handle_input(current_map)
+        
+        # Keep the chunks around the view (and ahead of the player) loaded
+        current_map.set_focus(self.camera_x, self.camera_y, SCREEN_WIDTH, SCREEN_HEIGHT,
+                              self.player.x - self.last_player_x, self.player.y - self.last_player_y)
+        self.last_player_x = self.player.x
+        self.last_player_y = self.player.y
+        
+        self.player.handle_input(current_map, keys)
         self.player.update(dt, current_map)
         
+        # Warm up the destination of any nearby portal
+        self.map_manager.update_preload(
+            self.player.x + PLAYER_SIZE/2,
+            self.player.y + PLAYER_SIZE/2,
+            SCREEN_WIDTH, SCREEN_HEIGHT
+        )
+        
         # Check for portal transitions
         if not self.map_manager.is_transitioning:
             portal = self.map_manager.check_portal(
@@ -304,7 +483,6 @@ class GameClient:
             )
             if portal:
                 # Check for E key press
-                keys = pygame.key.get_pressed()
                 if keys[pygame.K_e]:
                     self.map_manager.start_transition(portal)
         
@@ -330,115 +508,107 @@ class GameClient:
                 
                 # Clear enemies when changing maps
                 self.enemies.clear()
+                self.enemy_index.clear()
+                self.path_planner.clear()
+                self.ai_scheduler.clear()
+                self.events.clear()
+                self.floating_text.clear()
+                if self.enemy_manager is not None:
+                    self.enemy_manager.clear()
                 # Update enemy spawner to use new map
-                self.enemy_spawner = EnemySpawner(self.map_manager.get_current_map())
+                self.enemy_spawner = EnemySpawner(self.map_manager.get_current_map(), self.enemy_manager)
+        
+        # Recompute what the player can see on maps with fog (cached until they change tile or
+        # the map changes). Enemies see the player through the fog where there is fog, otherwise
+        # trace tiles themselves, sharing answers with other enemies on the same tile this frame
+        field_of_view = None
+        if current_map.fog_of_war:
+            field_of_view = self._get_field_of_view()
+            field_of_view.update(self.player.x + PLAYER_SIZE/2, self.player.y + PLAYER_SIZE/2)
+        line_of_sight = self._get_line_of_sight()
+        line_of_sight.begin_tick()
+        
+        # Refresh the flow field toward the player when they cross into another tile
+        self.flow_field.update(
+            int((self.player.x + PLAYER_SIZE/2) // current_map.tile_size),
+            int((self.player.y + PLAYER_SIZE/2) // current_map.tile_size),
+            current_map.is_walkable_tile, (id(current_map), current_map.version)
+        )
         
-        # Update enemies
+        # Update enemies, all at once when they live in the batch store
+        if self.enemy_manager is not None:
+            self.enemy_manager.update(dt, self.player, current_map, field_of_view, self.flow_field)
+        else:
+            self.ai_scheduler.begin_tick()
+            targets = [(self.player.x, self.player.y)]
+            for enemy in self.enemies:
+                level, think_dt = self.ai_scheduler.schedule(enemy, dt, enemy.x, enemy.y, targets,
+                                                             enemy.is_aggroed)
+                if think_dt is not None:
+                    enemy.update(think_dt, self.player, current_map, field_of_view, self.path_planner,
+                                 self.flow_field, line_of_sight)
+                elif level == LOD_DORMANT:
+                    enemy.update_timers(dt)
+            self.path_planner.update(current_map.is_walkable_tile)
         for enemy in self.enemies:
-            enemy.update(dt, self.player, current_map)
+            self.enemy_index.update(enemy, enemy.x, enemy.y, PLAYER_SIZE, PLAYER_SIZE)
+        
+        # Find the triggers under the player (cached until they change tile or map)
+        self.map_manager.query_triggers(
+            self.player.x + PLAYER_SIZE/2,
+            self.player.y + PLAYER_SIZE/2,
+            PLAYER_SIZE
+        )
         
         # Update NPCs
-        self.npc_spawner.update(self.player.x, self.player.y)
+        npc_spawner = self.npc_spawners.get(self.map_manager.current_map_id)
+        if npc_spawner:
+            npc_spawner.update(self.map_manager.get_active(TriggerType.NPC))
         
-        # Remove dead enemies and create death effects
+        # Remove dead enemies (their death effects and loot follow from their death events)
         for enemy in self.enemies[:]:
             if not enemy.is_alive:
-                if self.particle_system:
-                    self.particle_system.create_death_effect(
-                        enemy.x + PLAYER_SIZE/2,
-                        enemy.y + PLAYER_SIZE/2
-                    )
-                if random.random() < 0.3:  # 30% chance for item drop
-                    # 20% chance for gun, 80% chance for potion
-                    if random.random() < 0.2:
-                        item = Item("Pistol", ItemType.GUN, "A basic ranged weapon", "pistol.png", {
-                            "damage": 15,
-                            "range": 300,
-                            "cooldown": 0.5,
-                            "projectile_speed": 500
-                        })
-                    else:
-                        potion_type = "greater_health_potion" if random.random() < 0.3 else "health_potion"
-                        item = Item("Health Potion", ItemType.POTION, "Restores HP", "potion.png", {
-                            "heal": 60 if potion_type == "greater_health_potion" else 30
-                        })
-                    item_drop = ItemDrop(item, enemy.x, enemy.y)
-                    self.items.append(item_drop)
-                self.enemies.remove(enemy)
+                self._remove_enemy(enemy)
                 
-        # Update items and check for pickups
-        for item in self.items[:]:
+        # Update item animations
+        for item in self.items:
             item.update(dt)
+            
+        # Check for pickups among the items near the player
+        for item in self.item_index.query_radius(self.player.x, self.player.y, ItemDrop.PICKUP_RANGE):
             dx = self.player.x - item.x
             dy = self.player.y - item.y
-            distance = (dx * dx + dy * dy) ** 0.5
             
-            if distance <= item.pickup_range:
+            if dx * dx + dy * dy <= item.pickup_range * item.pickup_range:
                 if item.item.item_type == ItemType.POTION:
                     self.player.current_health = min(
                         self.player.max_health,
                         self.player.current_health + item.item.stats['heal']
                     )
-                    if self.particle_system:
-                        self.particle_system.create_hit_effect(
-                            self.player.rect.centerx,
-                            self.player.rect.centery,
-                            color=(0, 255, 0)
-                        )
+                    self.events.emit(PICKUP, x=self.player.rect.centerx, y=self.player.rect.centery,
+                                     item=item.item.name, color=(0, 255, 0))
                     self.items.remove(item)
+                    self.item_index.remove(item)
                 else:
                     # Add non-potion items to inventory
                     if self.player.pickup_item(item.item):
-                        if self.particle_system:
-                            self.particle_system.create_hit_effect(
-                                self.player.rect.centerx,
-                                self.player.rect.centery,
-                                color=(255, 255, 0)  # Gold color for items
-                            )
+                        self.events.emit(PICKUP, x=self.player.rect.centerx, y=self.player.rect.centery,
+                                         item=item.item.name, color=(255, 255, 0))  # Gold color for items
                         self.items.remove(item)
+                        self.item_index.remove(item)
         
         # Try to spawn new enemy
         if new_enemy := self.enemy_spawner.update(dt, self.player, self.enemies):
-            self.enemies.append(new_enemy)
-            if self.particle_system:
-                self.particle_system.create_spawn_effect(
-                    new_enemy.x + PLAYER_SIZE/2,
-                    new_enemy.y + PLAYER_SIZE/2
-                )
-        
-        # Update particle system
-        self.particle_system.update(dt)
+            self._add_enemy(new_enemy)
+            self.events.emit(SPAWN, x=new_enemy.x + PLAYER_SIZE/2, y=new_enemy.y + PLAYER_SIZE/2,
+                             kind=new_enemy.enemy_type)
         
-        # Check if player is in unwalkable tile and force respawn if stuck
-        player_tile_x = int(self.player.x // current_map.tile_size)
-        player_tile_y = int(self.player.y // current_map.tile_size)
-        if not current_map.is_walkable(self.player.x + PLAYER_SIZE/2, self.player.y + PLAYER_SIZE/2):
-            # Try to find nearest walkable tile
-            for dy in [-1, 0, 1]:
-                for dx in [-1, 0, 1]:
-                    test_x = (player_tile_x + dx) * current_map.tile_size + current_map.tile_size/2
-                    test_y = (player_tile_y + dy) * current_map.tile_size + current_map.tile_size/2
-                    if current_map.is_walkable(test_x, test_y):
-                        self.player.x = test_x - PLAYER_SIZE/2
-                        self.player.y = test_y - PLAYER_SIZE/2
-                        self.player.rect.x = self.player.x
-                        self.player.rect.y = self.player.y
-                        self.player.knockback_distance = 0
-                        self.player.current_attack = None
-                        self.player.is_attacking = False
-                        break
-                else:
-                    continue
-                break
-            else:
-                # If no nearby walkable tiles found, respawn at center
-                self.player.x = SCREEN_WIDTH // 2
-                self.player.y = SCREEN_HEIGHT // 2
-                self.player.rect.x = self.player.x
-                self.player.rect.y = self.player.y
-                self.player.knockback_distance = 0
-                self.player.current_attack = None
-                self.player.is_attacking = False
+        # Hand this frame's events to particles, damage numbers, loot and stats
+        self.events.dispatch()
+        
+        # Update particle system and damage numbers
+        self.particle_system.update(dt)
+        self.floating_text.update(dt)
         
         # Update camera to follow player
         self.camera_x = self.player.x - SCREEN_WIDTH // 2
@@ -560,29 +730,145 @@ class GameClient:
         screen.blit(stats_surface,
                    (stats_x, padding))
 
-    def render(self):
+    def _get_field_of_view(self):
+        """Get the player's field of view on the current map, creating it on first use"""
+        map_id = self.map_manager.current_map_id
+        if map_id not in self.fields_of_view:
+            self.fields_of_view[map_id] = FieldOfView(self.map_manager.get_current_map())
+        return self.fields_of_view[map_id]
+
+    def _get_line_of_sight(self):
+        """Get the line of sight cache of the current map, creating it on first use"""
+        map_id = self.map_manager.current_map_id
+        if map_id not in self.line_of_sight_caches:
+            current_map = self.map_manager.get_current_map()
+            self.line_of_sight_caches[map_id] = LineOfSightCache(current_map.is_opaque_tile, current_map.tile_size)
+        return self.line_of_sight_caches[map_id]
+
+    def _get_minimap(self):
+        """Get the minimap of the current map, creating it on first use"""
+        map_id = self.map_manager.current_map_id
+        if map_id not in self.minimaps:
+            current_map = self.map_manager.get_current_map()
+            field_of_view = self._get_field_of_view() if current_map.fog_of_war else None
+            self.minimaps[map_id] = Minimap(current_map, field_of_view=field_of_view)
+        return self.minimaps[map_id]
+
+    def _get_minimap_markers(self, area):
+        """Get (world_x, world_y, color) markers for the entities inside a world rectangle"""
+        markers = []
+        hidden = self.map_manager.get_current_map().fog_of_war
+        field_of_view = self._get_field_of_view() if hidden else None
+        for item in self.item_index.query_rect(area.x, area.y, area.width, area.height):
+            markers.append((item.x, item.y, (255, 215, 0)))
+        npc_spawner = self.npc_spawners.get(self.map_manager.current_map_id)
+        if npc_spawner:
+            for npc in npc_spawner.npc_index.query_rect(area.x, area.y, area.width, area.height):
+                markers.append((npc.x + PLAYER_SIZE/2, npc.y + PLAYER_SIZE/2, (0, 220, 220)))
+        for enemy in self.enemy_index.query_rect(area.x, area.y, area.width, area.height):
+            if hidden and not field_of_view.can_see(enemy.x + PLAYER_SIZE/2, enemy.y + PLAYER_SIZE/2):
+                continue
+            markers.append((enemy.x + PLAYER_SIZE/2, enemy.y + PLAYER_SIZE/2, (230, 40, 40)))
+        markers.append((self.player.x + PLAYER_SIZE/2, self.player.y + PLAYER_SIZE/2, (255, 255, 255)))
+        return markers
+
+    def draw_minimap(self, screen):
+        """Draw the minimap in the top right corner, below the status bar"""
+        minimap = self._get_minimap()
+        center_x = self.player.x + PLAYER_SIZE/2
+        center_y = self.player.y + PLAYER_SIZE/2
+        markers = self._get_minimap_markers(minimap.get_world_rect(center_x, center_y))
+        view_rect = pygame.Rect(int(self.camera_x), int(self.camera_y), SCREEN_WIDTH, SCREEN_HEIGHT)
+        minimap.draw(screen, SCREEN_WIDTH - minimap.width - 10, 90,
+                     center_x, center_y, view_rect, markers)
+
+    def draw_ai_stats(self, screen):
+        """Draw how many enemies think at each level of detail, the frame's costs, events and line of sight
+        cache use, below the status bar"""
+        counts = self.ai_scheduler.counts
+        small_font = pygame.font.Font(None, 24)
+        stats_text = (f"AI  full: {counts[LOD_FULL]}  reduced: {counts[LOD_REDUCED]}  "
+                      f"dormant: {counts[LOD_DORMANT]}")
+        stats_surface = small_font.render(stats_text, True, (200, 200, 200))
+        screen.blit(stats_surface, (10, 90))
+        
+        stats = self.frame_stats
+        frame_text = (f"Frame  simulate: {stats['simulate_ms']:.1f} ms ({stats['steps']} steps)  "
+                      f"render: {stats['render_ms']:.1f} ms")
+        frame_surface = small_font.render(frame_text, True, (200, 200, 200))
+        screen.blit(frame_surface, (10, 110))
+        
+        counts = self.event_counter.last_frame
+        events_text = "Events  " + ("  ".join(f"{event_type}: {count}" for event_type, count in counts.items())
+                                    or "none")
+        events_surface = small_font.render(events_text, True, (200, 200, 200))
+        screen.blit(events_surface, (10, 130))
+        
+        line_of_sight = self._get_line_of_sight()
+        sight_text = f"Line of sight  cached: {line_of_sight.hits}  traced: {line_of_sight.misses}"
+        sight_surface = small_font.render(sight_text, True, (200, 200, 200))
+        screen.blit(sight_surface, (10, 150))
+
+    def _store_previous_positions(self):
+        """Remember where the camera and every moving entity are before a simulation step"""
+        self.previous_camera = (self.camera_x, self.camera_y)
+        self.previous_positions = {enemy: (enemy.x, enemy.y) for enemy in self.enemies}
+        self.previous_positions[self.player] = (self.player.x, self.player.y)
+
+    def _interpolation_offset(self, entity, interpolation):
+        """Get how far to shift the camera so an entity draws blended between its last two steps"""
+        previous = self.previous_positions.get(entity)
+        if previous is None:
+            return 0, 0
+        dx = entity.x - previous[0]
+        dy = entity.y - previous[1]
+        if abs(dx) > MAX_INTERPOLATION_DISTANCE or abs(dy) > MAX_INTERPOLATION_DISTANCE:
+            return 0, 0
+        return dx * (1 - interpolation), dy * (1 - interpolation)
+
+    def render(self, interpolation=1.0):
+        """Draw the game between the last two simulation steps (0 draws the previous step, 1 the latest)"""
+        # Blend the camera unless it jumped (a portal or a respawn)
+        camera_x, camera_y = self.camera_x, self.camera_y
+        previous_x, previous_y = self.previous_camera
+        if (abs(camera_x - previous_x) <= MAX_INTERPOLATION_DISTANCE and
+                abs(camera_y - previous_y) <= MAX_INTERPOLATION_DISTANCE):
+            camera_x = previous_x + (camera_x - previous_x) * interpolation
+            camera_y = previous_y + (camera_y - previous_y) * interpolation
+        
         # Fill background
         self.screen.fill((0, 0, 0))
         
         # Draw current map
-        self.map_manager.draw(self.screen, int(self.camera_x), int(self.camera_y))
+        self.map_manager.draw(self.screen, int(camera_x), int(camera_y))
         
         # Draw NPCs
-        self.npc_spawner.draw(self.screen, int(self.camera_x), int(self.camera_y))
+        npc_spawner = self.npc_spawners.get(self.map_manager.current_map_id)
+        if npc_spawner:
+            npc_spawner.draw(self.screen, int(camera_x), int(camera_y))
         
         # Draw items
         for item in self.items:
-            item.draw(self.screen, int(self.camera_x), int(self.camera_y))
+            item.draw(self.screen, int(camera_x), int(camera_y))
         
         # Draw enemies
         for enemy in self.enemies:
-            enemy.draw(self.screen, int(self.camera_x), int(self.camera_y))
+            offset_x, offset_y = self._interpolation_offset(enemy, interpolation)
+            enemy.draw(self.screen, int(camera_x + offset_x), int(camera_y + offset_y))
+        
+        # Cover what the player cannot see
+        if self.map_manager.get_current_map().fog_of_war:
+            self._get_field_of_view().draw(self.screen, int(camera_x), int(camera_y))
         
         # Draw player
-        self.player.draw(self.screen, int(self.camera_x), int(self.camera_y))
+        offset_x, offset_y = self._interpolation_offset(self.player, interpolation)
+        self.player.draw(self.screen, int(camera_x + offset_x), int(camera_y + offset_y))
+        
+        # Draw damage numbers above every entity
+        self.floating_text.draw(self.screen, int(camera_x), int(camera_y))
         
         # Draw particle effects
-        self.particle_system.draw(self.screen, int(self.camera_x), int(self.camera_y))
+        self.particle_system.draw(self.screen, int(camera_x), int(camera_y))
         
         # Draw UI
         if self.equipment_visible:
@@ -594,14 +880,15 @@ class GameClient:
         # Draw status bar
         self.draw_status_bar(self.screen)
         
+        # Draw minimap
+        if self.minimap_visible:
+            self.draw_minimap(self.screen)
+        if self.ai_stats_visible:
+            self.draw_ai_stats(self.screen)
+        
         # Draw portal prompt if near a portal
         if not self.map_manager.is_transitioning:
-            portal = self.map_manager.check_portal(
-                self.player.x + PLAYER_SIZE/2, 
-                self.player.y + PLAYER_SIZE/2,
-                PLAYER_SIZE
-            )
-            if portal:
+            if self.map_manager.get_active(TriggerType.PORTAL):
                 font = pygame.font.Font(None, 36)
                 prompt = font.render("Press E to enter portal", True, (255, 255, 255))
                 prompt_rect = prompt.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT - 100))
@@ -652,15 +939,45 @@ class GameClient:
         
         pygame.display.flip()
 
-    def run(self):
+    def run(self, recorder=None):
+        """Simulate in fixed steps while rendering at the display rate, handing every step's input to a replay recorder if given"""
+        accumulator = 0.0
+        events = []  # Events handled since the last simulation step
         while self.running:
-            self.handle_events()
-            self.update()
-            self.render()
+            accumulator += self.clock.get_time() / 1000.0
+            frame_events = pygame.event.get()
+            self.handle_events(frame_events)
+            events.extend(frame_events)
+            keys = pygame.key.get_pressed()
+            
+            start = time.perf_counter()
+            steps = 0
+            while accumulator >= SIMULATION_DT and steps < MAX_SIMULATION_STEPS:
+                if recorder:
+                    recorder.record(SIMULATION_DT, events, keys)
+                events = []
+                self._store_previous_positions()
+                self.update(SIMULATION_DT, keys)
+                accumulator -= SIMULATION_DT
+                steps += 1
+            if accumulator >= SIMULATION_DT:
+                # Too far behind to catch up (a hitch or a slow machine): drop the time rather than spiral
+                accumulator = 0.0
+            simulate_time = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            self.render(accumulator / SIMULATION_DT)
+            render_time = time.perf_counter() - start
+            
+            stats = self.frame_stats
+            stats['steps'] = steps
+            stats['simulate_ms'] += (simulate_time * 1000 - stats['simulate_ms']) * 0.1
+            stats['render_ms'] += (render_time * 1000 - stats['render_ms']) * 0.1
             self.clock.tick(FPS)
 
 if __name__ == "__main__":
     client = GameClient()
     client.run()
+    client.close()
     pygame.quit()
     sys.exit()
\ No newline at end of file
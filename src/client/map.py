@@ -1,25 +1,53 @@
 import pygame
+import numpy as np
 from pathlib import Path
 from ..common.tiles import Tile, TileType
+from ..common.constants import CHUNK_SIZE
 from .sprite_manager import SpriteManager
+from .chunks import bake_chunk
 
 class GameMap:
-    def __init__(self, width, height, tile_size=32):
+    def __init__(self, width, height, tile_size=32, grid=None):
         self.width = width
         self.height = height
         self.tile_size = tile_size
         self.tiles = []
+        self.grid = grid  # Optional row-major TileType values to build the map from
         
         # Initialize sprite manager
         self.sprite_manager = SpriteManager()
         self.sprites_loaded = False
         
-        # Initialize with grass
-        self.tiles = [[Tile(TileType.GRASS) for _ in range(width)] for _ in range(height)]
+        # Chunks are baked into surfaces the first time they are drawn
+        self.chunk_size = CHUNK_SIZE
+        self.baked_chunks = {}  # Dictionary of {(chunk_x, chunk_y): BakedChunk}
+        self.animation_frame = 0
+        
+        # Derived views (minimap, visibility) watch for tile changes
+        self.version = 0  # Bumped whenever a tile changes so cached results can be dropped
+        self.tile_listeners = []  # Callbacks of (tile_x, tile_y, tile) run for each changed tile
+        self.walkable_grid = None  # NumPy mirror of is_walkable_tile, built on first use
+        self.opaque_grid = None  # NumPy mirror of is_opaque_tile, built on first use
+        self.grid_origin = (0, 0)  # Tile coordinate of the grids' top-left corner
+        self.grid_size = (width, height)  # Tiles the grids cover across and down
+        
+        # Maps with fog of war only reveal what the player can see
+        self.fog_of_war = False
+        
+        # Tiles enemies may spawn on, built on demand by EnemySpawner
+        self.spawn_table = None
+        self.spawn_points = []  # Authored (x, y, enemy_type or None) spawn positions that take priority
         
-        # Initialize last safe position (center of map)
-        self.last_safe_x = (width * tile_size) / 2
-        self.last_safe_y = (height * tile_size) / 2
+        self._create_tiles()
+
+    def _create_tiles(self):
+        """Build the in-memory tile grid"""
+        if self.grid is not None:
+            self._create_tiles_from_grid()
+            return
+            
+        # Initialize with grass
+        self.tiles = [[Tile(TileType.GRASS) for _ in range(self.width)] for _ in range(self.height)]
         
         # Add some sample features (we'll make this data-driven later)
         self._create_sample_map()
@@ -46,6 +74,19 @@ class GameMap:
         for filepath in base_path.glob('*.png'):
             self.sprite_manager.load_sprite(filepath.name, str(filepath))
 
+    def _create_tiles_from_grid(self):
+        """Build tiles from row-major tile type values, one per tile"""
+        tile_types = {tile_type.value: tile_type for tile_type in TileType}
+        values = bytes(self.grid)
+        self.grid = None  # Tiles hold the data from here on
+        
+        self.tiles = [
+            [Tile(tile_types.get(value, TileType.GRASS))
+             for value in values[y * self.width:(y + 1) * self.width]]
+            for y in range(self.height)
+        ]
+        self._calculate_transitions()
+
     def _create_sample_map(self):
         """Create a sample map with various features"""
         # Add some water
@@ -68,94 +109,204 @@ class GameMap:
             for y in range(18, 22):
                 self.tiles[y][x] = Tile(TileType.SAND)
 
-    def _calculate_transitions(self):
-        """Calculate transitions between different terrain types."""
-        directions = {
-            'top': (0, -1),
-            'right': (1, 0),
-            'bottom': (0, 1),
-            'left': (-1, 0)
-        }
+    # Neighbour offsets checked for terrain transitions
+    TRANSITION_DIRECTIONS = {
+        'top': (0, -1),
+        'right': (1, 0),
+        'bottom': (0, 1),
+        'left': (-1, 0)
+    }
 
+    def _calculate_transitions(self):
+        """Calculate transitions between different terrain types for the whole map."""
         for y in range(self.height):
             for x in range(self.width):
-                current_tile = self.tiles[y][x]
-                
-                # Check each direction for different terrain types
-                for direction, (dx, dy) in directions.items():
-                    nx, ny = x + dx, y + dy
-                    
-                    if 0 <= nx < self.width and 0 <= ny < self.height:
-                        neighbor_tile = self.tiles[ny][nx]
-                        if neighbor_tile.tile_type != current_tile.tile_type:
-                            current_tile.set_transition(neighbor_tile.tile_type, direction)
+                self._update_tile_transitions(x, y)
+
+    def _update_tile_transitions(self, x, y):
+        """Recalculate the transition masks of a single tile."""
+        current_tile = self._tile_at(x, y)
+        if current_tile is None:
+            return
+        current_tile.clear_transitions()
+
+        # Check each direction for different terrain types
+        for direction, (dx, dy) in self.TRANSITION_DIRECTIONS.items():
+            neighbor_tile = self._tile_at(x + dx, y + dy)
+            if neighbor_tile and neighbor_tile.tile_type != current_tile.tile_type:
+                current_tile.set_transition(neighbor_tile.tile_type, direction)
+
+    def _tile_at(self, tile_x, tile_y):
+        """Get the tile at a tile coordinate, or None outside the map"""
+        if 0 <= tile_x < self.width and 0 <= tile_y < self.height:
+            return self.tiles[tile_y][tile_x]
+        return None
+
+    def _store_tile(self, tile_x, tile_y, tile):
+        """Place a tile at a tile coordinate, returning False if it cannot be stored"""
+        if not (0 <= tile_x < self.width and 0 <= tile_y < self.height):
+            return False
+        self.tiles[tile_y][tile_x] = tile
+        return True
+
+    def _refresh_tile(self, tile_x, tile_y):
+        """Recalculate a tile's transitions and drop the baked chunk that shows it"""
+        self._update_tile_transitions(tile_x, tile_y)
+        self.invalidate_chunk(tile_x // self.chunk_size, tile_y // self.chunk_size)
+
+    def set_tile(self, tile_x, tile_y, tile_type):
+        """Replace the tile at a tile coordinate and refresh the affected transitions"""
+        tile = Tile(tile_type)
+        if not self._store_tile(tile_x, tile_y, tile):
+            return None
+
+        # Only the changed tile and its direct neighbours can gain or lose a transition
+        self._refresh_tile(tile_x, tile_y)
+        for dx, dy in self.TRANSITION_DIRECTIONS.values():
+            self._refresh_tile(tile_x + dx, tile_y + dy)
+        self.spawn_table = None
+        self.version += 1
+        self._notify_tile_changed(tile_x, tile_y, tile)
+        return tile
+
+    def _notify_tile_changed(self, tile_x, tile_y, tile):
+        """Tell every tile listener that a tile changed"""
+        local_x = tile_x - self.grid_origin[0]
+        local_y = tile_y - self.grid_origin[1]
+        if tile is not None and 0 <= local_x < self.grid_size[0] and 0 <= local_y < self.grid_size[1]:
+            if self.walkable_grid is not None:
+                self.walkable_grid[local_y, local_x] = tile.walkable or tile.tile_type == TileType.WATER
+            if self.opaque_grid is not None:
+                self.opaque_grid[local_y, local_x] = tile.opaque
+        for listener in self.tile_listeners:
+            listener(tile_x, tile_y, tile)
+
+    def iter_tiles(self):
+        """Yield (tile_x, tile_y, tile) for every tile held in memory"""
+        for y, row in enumerate(self.tiles):
+            for x, tile in enumerate(row):
+                yield x, y, tile
+
+    def invalidate_chunk(self, chunk_x, chunk_y):
+        """Force a chunk to be baked again the next time it is drawn"""
+        self.baked_chunks.pop((chunk_x, chunk_y), None)
+
+    def get_baked_chunk(self, chunk_x, chunk_y):
+        """Get the baked surface of a chunk, baking it if needed"""
+        baked = self.baked_chunks.get((chunk_x, chunk_y))
+        if baked is None:
+            baked = bake_chunk(self, chunk_x, chunk_y)
+            self.baked_chunks[(chunk_x, chunk_y)] = baked
+        return baked
+
+    def close(self):
+        """Release what the map holds outside memory (nothing, for a map built in memory)"""
+
+    def preload_view(self, center_x, center_y, view_width, view_height):
+        """Load and bake the chunks a camera centred on a position would show"""
+        self.ensure_sprites_loaded()
+        
+        # Clamp the camera the same way the client does
+        max_x = max(0, self.width * self.tile_size - view_width)
+        max_y = max(0, self.height * self.tile_size - view_height)
+        camera_x = int(max(0, min(center_x - view_width // 2, max_x)))
+        camera_y = int(max(0, min(center_y - view_height // 2, max_y)))
+        self.set_focus(camera_x, camera_y, view_width, view_height)
+        
+        chunk_pixels = self.chunk_size * self.tile_size
+        for chunk_y in range(camera_y // chunk_pixels, (camera_y + view_height) // chunk_pixels + 1):
+            for chunk_x in range(camera_x // chunk_pixels, (camera_x + view_width) // chunk_pixels + 1):
+                if chunk_x * self.chunk_size < self.width and chunk_y * self.chunk_size < self.height:
+                    self.get_baked_chunk(chunk_x, chunk_y)
+
+    def set_focus(self, camera_x, camera_y, view_width, view_height, velocity_x=0, velocity_y=0):
+        """Tell the map which area is in view; in-memory maps are always fully resident"""
+        pass
 
     def update(self, dt):
-        """Update animated tiles."""
-        for row in self.tiles:
-            for tile in row:
-                tile.update_animation()
+        """Advance the shared animation frame of animated tiles."""
+        self.animation_frame = (self.animation_frame + 1) % 4
 
     def draw(self, screen, camera_x=0, camera_y=0):
         """Draw the visible portion of the map"""
         # Ensure sprites are loaded before drawing
         self.ensure_sprites_loaded()
         
-        # Get the visible range based on screen size
+        # Get the visible range of chunks based on screen size
         screen_width = screen.get_width()
         screen_height = screen.get_height()
+        chunk_pixels = self.chunk_size * self.tile_size
+        chunks_x = (self.width + self.chunk_size - 1) // self.chunk_size
+        chunks_y = (self.height + self.chunk_size - 1) // self.chunk_size
         
-        start_x = max(0, camera_x // self.tile_size)
-        end_x = min(self.width, (camera_x + screen_width) // self.tile_size + 1)
-        start_y = max(0, camera_y // self.tile_size)
-        end_y = min(self.height, (camera_y + screen_height) // self.tile_size + 1)
-        
-        # Draw visible tiles
-        for y in range(start_y, end_y):
-            for x in range(start_x, end_x):
-                tile = self.tiles[y][x]
-                screen_x = x * self.tile_size - camera_x
-                screen_y = y * self.tile_size - camera_y
-                
-                # Draw base tile
-                sprite = self.sprite_manager.get_sprite(tile.sprite_name)
-                if sprite:
-                    screen.blit(sprite, (screen_x, screen_y))
+        start_x = max(0, camera_x // chunk_pixels)
+        end_x = min(chunks_x, (camera_x + screen_width) // chunk_pixels + 1)
+        start_y = max(0, camera_y // chunk_pixels)
+        end_y = min(chunks_y, (camera_y + screen_height) // chunk_pixels + 1)
+        
+        # Draw visible chunks
+        for chunk_y in range(start_y, end_y):
+            for chunk_x in range(start_x, end_x):
+                baked = self.get_baked_chunk(chunk_x, chunk_y)
+                if baked is None:
+                    continue
+                origin_x = chunk_x * chunk_pixels - camera_x
+                origin_y = chunk_y * chunk_pixels - camera_y
+                screen.blit(baked.surface, (origin_x, origin_y))
                 
-                # Draw transition if exists
-                transition_sprite_name = tile.get_transition_sprite()
-                if transition_sprite_name:
-                    transition_sprite = self.sprite_manager.get_sprite(transition_sprite_name)
-                    if transition_sprite:
-                        screen.blit(transition_sprite, (screen_x, screen_y))
+                # Draw animated tiles and their transitions on top
+                for offset_x, offset_y, tile in baked.animated:
+                    position = (origin_x + offset_x, origin_y + offset_y)
+                    sprite = self.sprite_manager.get_sprite(tile.get_animation_sprite(self.animation_frame))
+                    if sprite:
+                        screen.blit(sprite, position)
+                    for transition_sprite_name in tile.transition_sprites:
+                        transition_sprite = self.sprite_manager.get_sprite(transition_sprite_name)
+                        if transition_sprite:
+                            screen.blit(transition_sprite, position)
 
     def is_walkable(self, x, y):
-        """Check if a tile position is walkable"""
-        tile_x = int(x // self.tile_size)
-        tile_y = int(y // self.tile_size)
-        
-        # Check bounds first
-        if not (0 <= tile_x < self.width and 0 <= tile_y < self.height):
-            return False
-            
-        current_tile = self.tiles[tile_y][tile_x]
-        
-        # If in water, allow movement but at reduced speed (handled in Player class)
-        if current_tile.tile_type == TileType.WATER:
-            return True  # Water is now traversable
-            
-        # Store last safe position when on solid ground
-        if current_tile.walkable:
-            self.last_safe_x = tile_x * self.tile_size + self.tile_size / 2
-            self.last_safe_y = tile_y * self.tile_size + self.tile_size / 2
-            
-        return current_tile.walkable
+        """Check if a pixel position is walkable"""
+        return self.is_walkable_tile(int(x // self.tile_size), int(y // self.tile_size))
+
+    def is_walkable_tile(self, tile_x, tile_y):
+        """Check walkability by tile coordinate; tiles outside the map (or not loaded) are not walkable"""
+        tile = self._tile_at(tile_x, tile_y)
+        # Water slows movement (handled by the tile's speed) but is traversable
+        return tile is not None and (tile.walkable or tile.tile_type == TileType.WATER)
+
+    def _iter_grid_tiles(self):
+        """Yield (tile_x, tile_y, tile) for every tile the walkable and opaque grids cover"""
+        return self.iter_tiles()
+
+    def get_walkable_grid(self):
+        """Get is_walkable_tile for the tiles from grid_origin as a (height, width) NumPy array of grid_size,
+        kept current as tiles change (the whole map, unless the map streams)"""
+        if self.walkable_grid is None:
+            origin_x, origin_y = self.grid_origin
+            grid = np.zeros((self.grid_size[1], self.grid_size[0]), dtype=bool)
+            for tile_x, tile_y, tile in self._iter_grid_tiles():
+                grid[tile_y - origin_y, tile_x - origin_x] = tile.walkable or tile.tile_type == TileType.WATER
+            self.walkable_grid = grid
+        return self.walkable_grid
+
+    def get_opaque_grid(self):
+        """Get is_opaque_tile for the tiles from grid_origin as a (height, width) NumPy array of grid_size,
+        kept current as tiles change (the whole map, unless the map streams)"""
+        if self.opaque_grid is None:
+            # Tiles not loaded yet block sight
+            origin_x, origin_y = self.grid_origin
+            grid = np.ones((self.grid_size[1], self.grid_size[0]), dtype=bool)
+            for tile_x, tile_y, tile in self._iter_grid_tiles():
+                grid[tile_y - origin_y, tile_x - origin_x] = tile.opaque
+            self.opaque_grid = grid
+        return self.opaque_grid
+
+    def is_opaque_tile(self, tile_x, tile_y):
+        """Check whether a tile blocks sight; tiles outside the map (or not loaded) do"""
+        tile = self._tile_at(tile_x, tile_y)
+        return tile is None or tile.opaque
 
     def get_tile(self, x, y):
         """Get the tile at a specific position"""
-        tile_x = int(x // self.tile_size)
-        tile_y = int(y // self.tile_size)
-        
-        if 0 <= tile_x < self.width and 0 <= tile_y < self.height:
-            return self.tiles[tile_y][tile_x]
-        return None
\ No newline at end of file
+        return self._tile_at(int(x // self.tile_size), int(y // self.tile_size))
@@ -1,6 +1,9 @@
 import pygame
+import threading
 from .map import GameMap
-from ..common.tiles import Tile, TileType
+from .triggers import Trigger, TriggerGrid, TriggerType
+from .tiled_importer import load_tiled_map
+from ..common.tiles import TileType
 
 class Portal:
     def __init__(self, target_map_id, target_x, target_y):
@@ -8,21 +11,80 @@ class Portal:
         self.target_x = target_x
         self.target_y = target_y
 
+class MapPreloader:
+    """Warms a portal's destination map on a background thread"""
+    def __init__(self, game_map, target_x, target_y, view_width, view_height, steps=()):
+        self.game_map = game_map
+        self.target_x = target_x
+        self.target_y = target_y
+        self.view_width = view_width
+        self.view_height = view_height
+        self.steps = steps
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        
+    def _run(self):
+        """Load sprites, bake the chunks around the arrival point and run extra steps"""
+        try:
+            self.game_map.preload_view(self.target_x, self.target_y,
+                                       self.view_width, self.view_height)
+            for step in self.steps:
+                step(self.game_map)
+        except Exception as e:
+            print(f"Error preloading map: {e}")
+            
+    @property
+    def ready(self):
+        """Whether the destination has finished warming up"""
+        return not self.thread.is_alive()
+        
+    def wait(self):
+        """Block until preloading finishes so the map is not used from two threads"""
+        self.thread.join()
+
 class MapManager:
+    # Transition lengths in seconds, shorter when the destination is already warm
+    TRANSITION_DURATION = 1.0
+    PRELOADED_TRANSITION_DURATION = 0.4
+    
     def __init__(self):
         self.maps = {}
         self.current_map_id = None
         self.portals = {}  # Dictionary of {(map_id, x, y): Portal}
+        self.triggers = {}  # Dictionary of {map_id: TriggerGrid}
+        self.active_triggers = ()  # Triggers under the player, cached until they change tile
+        self._trigger_cache_key = None
         self.transition_timer = 0
+        self.transition_duration = self.TRANSITION_DURATION
         self.is_transitioning = False
         self.pending_portal = None
         
+        # Portal destination preloading
+        self.preload_radius = 6  # Tiles from a portal at which its destination starts loading
+        self.preload_steps = []  # Extra callables run on a destination map while preloading
+        self.preloaders = {}  # Dictionary of {Portal: MapPreloader}
+        self.wait_for_preload = False  # Finish preloads before transitions so their length never depends on thread timing
+        
     def add_map(self, map_id, game_map):
         """Add a map to the manager"""
         self.maps[map_id] = game_map
+        self.triggers[map_id] = TriggerGrid()
         if self.current_map_id is None:
             self.current_map_id = map_id
             
+    def load_tiled_map(self, map_id, path):
+        """Add a map made in Tiled along with its portals and entrances, returning the compiled data"""
+        compiled = load_tiled_map(path)
+        self.add_map(map_id, compiled.build_map())
+        for x, y, target_map_id, target_x, target_y in compiled.portals:
+            self.add_portal(map_id, int(x), int(y), target_map_id, target_x, target_y)
+        for x, y, source_map_id, source_x, source_y in compiled.entrances:
+            if source_map_id not in self.maps:
+                print(f"Error: entrance to {map_id} from unknown map {source_map_id}")
+                continue
+            self.add_portal(source_map_id, int(source_x), int(source_y), map_id, x, y)
+        return compiled
+        
     def add_portal(self, map_id, x, y, target_map_id, target_x, target_y):
         """Add a portal at the specified location"""
         # Convert pixel coordinates to tile coordinates
@@ -32,45 +94,120 @@ class MapManager:
         # Create portal
         portal = Portal(target_map_id, target_x, target_y)
         self.portals[(map_id, tile_x, tile_y)] = portal
+        self.triggers[map_id].add_rect(Trigger(TriggerType.PORTAL, portal), tile_x, tile_y)
         
         # Set portal tile
-        self.maps[map_id].tiles[tile_y][tile_x] = Tile(TileType.PORTAL)
+        self.maps[map_id].set_tile(tile_x, tile_y, TileType.PORTAL)
+        
+    def add_npc_zone(self, map_id, npc, size):
+        """Add an interaction trigger on every tile within an NPC's interaction range"""
+        tile_size = self.maps[map_id].tile_size
+        center_x = npc.x + size / 2
+        center_y = npc.y + size / 2
+        reach = npc.interaction_range
+        
+        tiles = []
+        for tile_y in range(int((center_y - reach) // tile_size), int((center_y + reach) // tile_size) + 1):
+            for tile_x in range(int((center_x - reach) // tile_size), int((center_x + reach) // tile_size) + 1):
+                dx = (tile_x + 0.5) * tile_size - center_x
+                dy = (tile_y + 0.5) * tile_size - center_y
+                if dx * dx + dy * dy <= reach * reach:
+                    tiles.append((tile_x, tile_y))
+        return self.triggers[map_id].add(Trigger(TriggerType.NPC, npc), tiles)
+        
+    def add_trigger(self, map_id, trigger, tile_x, tile_y, width=1, height=1):
+        """Add a custom trigger covering a rectangle of tiles"""
+        return self.triggers[map_id].add_rect(trigger, tile_x, tile_y, width, height)
         
+    def close(self):
+        """Wait for background preloads, then close every map"""
+        for preloader in self.preloaders.values():
+            preloader.wait()
+        self.preloaders.clear()
+        for game_map in self.maps.values():
+            game_map.close()
+
     def get_current_map(self):
         """Get the currently active map"""
         return self.maps.get(self.current_map_id)
         
+    def query_triggers(self, x, y, player_size):
+        """Get the triggers under the player's footprint, cached until it covers other tiles"""
+        if not self.current_map_id:
+            return ()
+            
+        current_map = self.maps[self.current_map_id]
+        grid = self.triggers[self.current_map_id]
+        
+        # Footprint is a box around the player's centre
+        reach = player_size / 4
+        start_x = int((x - reach) // current_map.tile_size)
+        start_y = int((y - reach) // current_map.tile_size)
+        end_x = int((x + reach) // current_map.tile_size)
+        end_y = int((y + reach) // current_map.tile_size)
+        
+        cache_key = (self.current_map_id, grid.version, start_x, start_y, end_x, end_y)
+        if cache_key != self._trigger_cache_key:
+            self._trigger_cache_key = cache_key
+            self.active_triggers = grid.query(start_x, start_y, end_x, end_y)
+        return self.active_triggers
+        
+    def get_active(self, trigger_type):
+        """Get the payloads of the cached active triggers of one type"""
+        return [trigger.payload for trigger in self.active_triggers
+                if trigger.trigger_type == trigger_type]
+        
     def check_portal(self, x, y, player_size):
         """Check if there's a portal at the given position"""
         if not self.current_map_id or self.is_transitioning:
             return None
             
-        current_map = self.maps[self.current_map_id]
-        
-        # Check a box around the player's position for portals
-        check_points = [
-            (x, y),  # Center
-            (x - player_size/4, y - player_size/4),  # Top-left
-            (x + player_size/4, y - player_size/4),  # Top-right
-            (x - player_size/4, y + player_size/4),  # Bottom-left
-            (x + player_size/4, y + player_size/4)   # Bottom-right
-        ]
-        
-        for check_x, check_y in check_points:
-            tile_x = int(check_x // current_map.tile_size)
-            tile_y = int(check_y // current_map.tile_size)
-            
-            portal = self.portals.get((self.current_map_id, tile_x, tile_y))
-            if portal:
-                return portal
+        for trigger in self.query_triggers(x, y, player_size):
+            if trigger.trigger_type == TriggerType.PORTAL:
+                return trigger.payload
                 
         return None
         
+    def update_preload(self, x, y, view_width, view_height):
+        """Start warming the destination of any portal the player is approaching"""
+        if not self.current_map_id or self.is_transitioning:
+            return
+            
+        current_map = self.maps[self.current_map_id]
+        tile_x = int(x // current_map.tile_size)
+        tile_y = int(y // current_map.tile_size)
+        
+        nearby = set()
+        for (map_id, portal_x, portal_y), portal in self.portals.items():
+            if (map_id == self.current_map_id and
+                abs(portal_x - tile_x) <= self.preload_radius and
+                abs(portal_y - tile_y) <= self.preload_radius):
+                nearby.add(portal)
+                if portal not in self.preloaders:
+                    self.preloaders[portal] = MapPreloader(
+                        self.maps[portal.target_map_id],
+                        portal.target_x, portal.target_y,
+                        view_width, view_height,
+                        list(self.preload_steps)
+                    )
+                    
+        # Forget finished preloads the player walked away from, so they refresh next approach
+        for portal in list(self.preloaders):
+            if portal not in nearby and self.preloaders[portal].ready:
+                del self.preloaders[portal]
+                
     def start_transition(self, portal):
         """Start the portal transition process"""
         if not self.is_transitioning:
+            preloader = self.preloaders.get(portal)
+            if preloader and self.wait_for_preload:
+                preloader.wait()
+            if preloader and preloader.ready:
+                self.transition_duration = self.PRELOADED_TRANSITION_DURATION
+            else:
+                self.transition_duration = self.TRANSITION_DURATION
             self.is_transitioning = True
-            self.transition_timer = 1.0  # 1 second transition
+            self.transition_timer = self.transition_duration
             self.pending_portal = portal
             
     def update(self, dt):
@@ -83,6 +220,11 @@ class MapManager:
         if self.is_transitioning and self.transition_timer > 0:
             self.transition_timer -= dt
             if self.transition_timer <= 0 and self.pending_portal:
+                # Make sure a preload still running is not baking the map we switch to
+                preloader = self.preloaders.pop(self.pending_portal, None)
+                if preloader:
+                    preloader.wait()
+                    
                 # Complete the transition
                 self.current_map_id = self.pending_portal.target_map_id
                 target_pos = (self.pending_portal.target_x, self.pending_portal.target_y)
@@ -95,12 +237,13 @@ class MapManager:
     def get_transition_alpha(self):
         """Get the current transition overlay alpha value"""
         if self.is_transitioning:
-            if self.transition_timer > 0.5:
+            half = self.transition_duration / 2
+            if self.transition_timer > half:
                 # Fade out (0 -> 255)
-                return int(255 * (1.0 - (self.transition_timer - 0.5) * 2))
+                return int(255 * (1.0 - (self.transition_timer - half) / half))
             else:
                 # Fade in (255 -> 0)
-                return int(255 * (self.transition_timer * 2))
+                return int(255 * max(0, self.transition_timer) / half)
         return 0
         
     def draw(self, screen, camera_x=0, camera_y=0):
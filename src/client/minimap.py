@@ -0,0 +1,116 @@
+import pygame
+from ..common.tiles import TileType
+
+class Minimap:
+    """Overview of a map drawn from a cached surface holding one block of pixels per tile (or one pixel per block of tiles on huge maps)"""
+    TILE_COLORS = {
+        TileType.GRASS: (76, 140, 60),
+        TileType.WATER: (50, 90, 190),
+        TileType.WALL: (70, 60, 55),
+        TileType.STONE: (130, 130, 130),
+        TileType.SAND: (210, 190, 120),
+        TileType.PORTAL: (170, 60, 220),
+    }
+    UNKNOWN_COLOR = (10, 10, 10)  # Tiles that were never loaded
+    BORDER_COLOR = (200, 200, 200)
+    VIEW_COLOR = (255, 255, 255)
+    MAX_TILE_PIXELS = 4
+    MAX_SURFACE_SIZE = 1024  # Maps wider than this many tiles share one pixel between several tiles
+
+    def __init__(self, game_map, width=160, height=160, field_of_view=None):
+        self.game_map = game_map
+        self.field_of_view = field_of_view  # When set, only explored tiles are shown
+        self.width = width  # Size of the on-screen window in pixels
+        self.height = height
+        map_size = max(game_map.width, game_map.height)
+        self.tile_pixels = max(1, min(self.MAX_TILE_PIXELS, self.MAX_SURFACE_SIZE // map_size))
+        self.tiles_per_pixel = (map_size + self.MAX_SURFACE_SIZE - 1) // self.MAX_SURFACE_SIZE
+        self.surface_width = (game_map.width + self.tiles_per_pixel - 1) // self.tiles_per_pixel * self.tile_pixels
+        self.surface_height = (game_map.height + self.tiles_per_pixel - 1) // self.tiles_per_pixel * self.tile_pixels
+        self.scale = self.tile_pixels / (game_map.tile_size * self.tiles_per_pixel)  # Surface pixels per world pixel
+        self.surface = None
+        self.pending = {}  # Dictionary of {(tile_x, tile_y): Tile} changed since the last draw
+        game_map.tile_listeners.append(self._on_tile_changed)
+        if field_of_view:
+            field_of_view.explore_listeners.append(self._on_explored)
+
+    def _on_tile_changed(self, tile_x, tile_y, tile):
+        """Queue a changed tile to be repainted on the next draw"""
+        if self.surface is not None:
+            self.pending[(tile_x, tile_y)] = tile
+
+    def _on_explored(self, tiles):
+        """Queue tiles the player has just discovered"""
+        if self.surface is not None:
+            for tile_x, tile_y in tiles:
+                self.pending[(tile_x, tile_y)] = self.game_map._tile_at(tile_x, tile_y)
+
+    def _build(self):
+        """Paint every tile held in memory into the cached surface"""
+        self.surface = pygame.Surface((self.surface_width, self.surface_height))
+        self.surface.fill(self.UNKNOWN_COLOR)
+        if self.field_of_view:
+            for tile_x, tile_y in self.field_of_view.explored:
+                self._paint(tile_x, tile_y, self.game_map._tile_at(tile_x, tile_y))
+            return
+        for tile_x, tile_y, tile in self.game_map.iter_tiles():
+            self._paint(tile_x, tile_y, tile)
+
+    def _paint(self, tile_x, tile_y, tile):
+        """Paint the block of a single tile; downsampled maps take each pixel from the first of its tiles"""
+        if tile_x % self.tiles_per_pixel or tile_y % self.tiles_per_pixel:
+            return
+        if self.field_of_view and (tile_x, tile_y) not in self.field_of_view.explored:
+            return
+        color = self.TILE_COLORS.get(tile.tile_type, self.UNKNOWN_COLOR) if tile else self.UNKNOWN_COLOR
+        self.surface.fill(color, (tile_x // self.tiles_per_pixel * self.tile_pixels,
+                                  tile_y // self.tiles_per_pixel * self.tile_pixels,
+                                  self.tile_pixels, self.tile_pixels))
+
+    def refresh(self):
+        """Build the cache on first use, then repaint only the tiles that changed"""
+        if self.surface is None:
+            self._build()
+            self.pending.clear()
+            return
+        for (tile_x, tile_y), tile in self.pending.items():
+            self._paint(tile_x, tile_y, tile)
+        self.pending.clear()
+
+    def get_window(self, center_x, center_y):
+        """Get the area of the cached surface shown when centred on a world position"""
+        left = int(center_x * self.scale) - self.width // 2
+        top = int(center_y * self.scale) - self.height // 2
+        left = max(0, min(left, self.surface_width - self.width))
+        top = max(0, min(top, self.surface_height - self.height))
+        return pygame.Rect(left, top, min(self.width, self.surface_width), min(self.height, self.surface_height))
+
+    def get_world_rect(self, center_x, center_y):
+        """Get the world pixel rectangle covered by the window, for querying entity markers"""
+        window = self.get_window(center_x, center_y)
+        scale = 1 / self.scale
+        return pygame.Rect(window.x * scale, window.y * scale, window.width * scale, window.height * scale)
+
+    def draw(self, screen, x, y, center_x, center_y, view_rect=None, markers=()):
+        """Draw the window centred on a world position with (world_x, world_y, color) markers"""
+        self.refresh()
+        window = self.get_window(center_x, center_y)
+        scale = self.scale
+
+        # A fixed-size blit from the cache, whatever the size of the map
+        screen.blit(self.surface, (x, y), window)
+
+        if view_rect:
+            outline = pygame.Rect(x + view_rect.x * scale - window.x, y + view_rect.y * scale - window.y,
+                                  view_rect.width * scale, view_rect.height * scale)
+            pygame.draw.rect(screen, self.VIEW_COLOR, outline.clip((x, y, window.width, window.height)), 1)
+
+        marker_size = max(2, self.tile_pixels)
+        for world_x, world_y, color in markers:
+            marker_x = x + int(world_x * scale) - window.x
+            marker_y = y + int(world_y * scale) - window.y
+            if 0 <= marker_x - x < window.width and 0 <= marker_y - y < window.height:
+                screen.fill(color, (marker_x - marker_size // 2, marker_y - marker_size // 2,
+                                    marker_size, marker_size))
+
+        pygame.draw.rect(screen, self.BORDER_COLOR, (x - 1, y - 1, window.width + 2, window.height + 2), 1)
@@ -5,20 +5,24 @@ from src.common.constants import TILE_SIZE, PLAYER_SIZE
 from .sprite_manager import SpriteManager
 
 class NPC:
+    interaction_range = TILE_SIZE * 2  # 2 tiles range for interaction
+    animation_speed = 0.2  # Slower than player
+    sprite_manager = SpriteManager()  # Sprite sheets of every NPC type, loaded once and shared
+
+    __slots__ = ('x', 'y', 'npc_type', 'dialogue', 'is_talking', 'sprites_loaded', 'sprite',
+                 'animation_frame', 'animation_timer', 'idle_offset')
+
     def __init__(self, x, y, npc_type="villager"):
         self.x = x
         self.y = y
         self.npc_type = npc_type
         self.dialogue = []
-        self.interaction_range = TILE_SIZE * 2  # 2 tiles range for interaction
         self.is_talking = False
         
         # Animation properties
-        self.sprite_manager = SpriteManager()
         self.sprites_loaded = False
         self.animation_frame = 0
         self.animation_timer = 0
-        self.animation_speed = 0.2  # Slower than player
         self.idle_offset = 0  # For floating effect
         
         # Load sprites
@@ -26,6 +30,8 @@ class NPC:
         
     def _load_sprites(self):
         """Load NPC sprites from spritesheet."""
+        if f'npc_{self.npc_type}' in self.sprite_manager.spritesheets:
+            self.sprites_loaded = True
         if not self.sprites_loaded:
             # Get the absolute path to the sprite
             current_file = Path(__file__).resolve()
@@ -1,9 +1,11 @@
 import random
 from .npc import NPC
+from ..common.spatial_hash import SpatialHash
 
 class NPCSpawner:
     def __init__(self):
         self.npcs = []
+        self.npc_index = SpatialHash(64)  # NPC positions, so minimap markers only look at nearby ones
         self.npc_types = {
             "villager": {
                 "dialogues": [
@@ -44,13 +46,14 @@ class NPCSpawner:
             npc.add_dialogue(dialogue)
             
         self.npcs.append(npc)
+        self.npc_index.insert(npc, x, y)
         return npc
         
-    def update(self, player_x, player_y):
+    def update(self, active_npcs):
         """Update all NPCs"""
         for npc in self.npcs:
-            # Check for player interaction range
-            npc.is_talking = npc.can_interact(player_x, player_y)
+            # NPCs whose interaction trigger the player is standing in
+            npc.is_talking = npc in active_npcs
             
     def draw(self, screen, camera_x, camera_y):
         """Draw all NPCs"""
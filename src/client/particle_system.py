@@ -1,34 +1,110 @@
 import pygame
 import random
 import math
-
-class Particle:
-    def __init__(self, x, y, color, velocity=(0, 0), lifetime=1.0, size=3, gravity=0):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.velocity_x = velocity[0]
-        self.velocity_y = velocity[1]
-        self.lifetime = lifetime
-        self.max_lifetime = lifetime
-        self.size = size
-        self.gravity = gravity
-        self.alpha = 255
+import numpy as np
+from ..common.events import EFFECT, DEATH, SPAWN, PICKUP, LEVEL_UP
 
 class ParticleSystem:
-    def __init__(self):
-        self.particles = []
+    """Fixed-capacity particle pool kept in NumPy arrays, moved and culled as one batch"""
+    # Data type of each per-particle array; slots [0, count) are live
+    FIELDS = {
+        'x': np.float32, 'y': np.float32,
+        'velocity_x': np.float32, 'velocity_y': np.float32,
+        'gravity': np.float32,
+        'lifetime': np.float32, 'max_lifetime': np.float32,
+        'size': np.uint8,  # Radius in pixels
+        'color': np.uint16,  # Index into colors
+    }
+    ALPHA_BUCKETS = 16  # Fading particles snap to this many alpha levels so their sprites can be shared
+    
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.count = 0
+        self.arrays = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.FIELDS.items()}
+        self.colors = []  # RGB of each colour index
+        self.color_indices = {}  # Dictionary of {rgb: colour index}
+        self.sprites = {}  # Dictionary of {sprite key: pre-rendered particle}, see _sprite_keys
+        # Seeded from the shared generator so recorded sessions replay the same effects
+        self.rng = np.random.default_rng(random.getrandbits(32))
+        
+    def __len__(self):
+        return self.count
+        
+    def subscribe(self, event_bus):
+        """Play the effects of game events as each frame's batch is dispatched"""
+        event_bus.subscribe(EFFECT, self._on_effects)
+        event_bus.subscribe(DEATH, self._on_deaths)
+        event_bus.subscribe(SPAWN, self._on_spawns)
+        event_bus.subscribe(PICKUP, self._on_pickups)
+        event_bus.subscribe(LEVEL_UP, self._on_level_ups)
+        
+    def _on_effects(self, events):
+        for event in events:
+            if event['effect'] == 'slash':
+                self.create_slash_effect(event['x'], event['y'], event['direction'], event['color'])
+            elif event['effect'] == 'special':
+                self.create_special_attack_effect(event['x'], event['y'], event['color'])
+            else:
+                self.create_hit_effect(event['x'], event['y'], event['color'])
+                
+    def _on_deaths(self, events):
+        for event in events:
+            self.create_death_effect(event['x'], event['y'])
+            
+    def _on_spawns(self, events):
+        for event in events:
+            self.create_spawn_effect(event['x'], event['y'])
+            
+    def _on_pickups(self, events):
+        for event in events:
+            self.create_hit_effect(event['x'], event['y'], event['color'])
+            
+    def _on_level_ups(self, events):
+        for event in events:
+            self.create_special_attack_effect(event['x'], event['y'], color=(255, 215, 0))  # Gold
+        
+    def _get_color_index(self, color):
+        """Get the index of a colour, adding it to the palette on first use"""
+        color = tuple(color)
+        index = self.color_indices.get(color)
+        if index is None:
+            index = self.color_indices[color] = len(self.colors)
+            self.colors.append(color)
+        return index
+        
+    def emit(self, x, y, angles, speeds, lifetime_range, size_range, color, gravity=0, start_distance=0):
+        """Fill the next free slots with particles leaving a point at the given angles and speeds in one call;
+        particles that do not fit are dropped"""
+        n = min(len(angles), self.capacity - self.count)
+        if n <= 0:
+            return
+        start = self.count
+        end = start + n
+        self.count = end
+        cos = np.cos(angles[:n])
+        sin = np.sin(angles[:n])
+        speeds = speeds[:n]
+        a = self.arrays
+        a['x'][start:end] = x + cos * start_distance
+        a['y'][start:end] = y + sin * start_distance
+        a['velocity_x'][start:end] = cos * speeds
+        a['velocity_y'][start:end] = sin * speeds
+        a['gravity'][start:end] = gravity
+        lifetimes = self.rng.uniform(lifetime_range[0], lifetime_range[1], n)
+        a['lifetime'][start:end] = lifetimes
+        a['max_lifetime'][start:end] = lifetimes
+        a['size'][start:end] = self.rng.integers(size_range[0], size_range[1] + 1, n)
+        a['color'][start:end] = self._get_color_index(color)
+        
+    def clear(self):
+        """Remove every particle"""
+        self.count = 0
         
     def create_hit_effect(self, x, y, color=(255, 255, 255)):
         """Create a hit effect at the given position"""
         num_particles = 10
-        for _ in range(num_particles):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(50, 150)
-            velocity = (math.cos(angle) * speed, math.sin(angle) * speed)
-            lifetime = random.uniform(0.3, 0.6)
-            size = random.randint(2, 4)
-            self.particles.append(Particle(x, y, color, velocity, lifetime, size))
+        self.emit(x, y, self.rng.uniform(0, 2 * math.pi, num_particles),
+                  self.rng.uniform(50, 150, num_particles), (0.3, 0.6), (2, 4), color)
             
     def create_slash_effect(self, x, y, direction, color=(255, 255, 100)):
         """Create a slash effect in the given direction"""
@@ -41,92 +117,92 @@ class ParticleSystem:
         }.get(direction, 0)
         
         arc = math.pi/3  # 60-degree arc
-        for _ in range(num_particles):
-            angle = base_angle + random.uniform(-arc/2, arc/2)
-            speed = random.uniform(100, 200)
-            velocity = (math.cos(angle) * speed, math.sin(angle) * speed)
-            lifetime = random.uniform(0.2, 0.4)
-            size = random.randint(3, 6)
-            self.particles.append(Particle(x, y, color, velocity, lifetime, size))
+        self.emit(x, y, base_angle + self.rng.uniform(-arc/2, arc/2, num_particles),
+                  self.rng.uniform(100, 200, num_particles), (0.2, 0.4), (3, 6), color)
             
     def create_special_attack_effect(self, x, y, color=(0, 255, 255)):
         """Create a spinning attack effect"""
         num_particles = 30
-        for i in range(num_particles):
-            angle = (i / num_particles) * 2 * math.pi
-            speed = random.uniform(150, 250)
-            velocity = (math.cos(angle) * speed, math.sin(angle) * speed)
-            lifetime = random.uniform(0.5, 0.8)
-            size = random.randint(4, 7)
-            self.particles.append(Particle(x, y, color, velocity, lifetime, size))
+        self.emit(x, y, np.arange(num_particles) / num_particles * 2 * math.pi,
+                  self.rng.uniform(150, 250, num_particles), (0.5, 0.8), (4, 7), color)
             
     def create_death_effect(self, x, y, color=(150, 0, 0)):
         """Create a death explosion effect"""
         num_particles = 20
-        for _ in range(num_particles):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(50, 200)
-            velocity = (math.cos(angle) * speed, math.sin(angle) * speed)
-            lifetime = random.uniform(0.7, 1.2)
-            size = random.randint(3, 8)
-            particle = Particle(x, y, color, velocity, lifetime, size, gravity=200)
-            self.particles.append(particle)
+        self.emit(x, y, self.rng.uniform(0, 2 * math.pi, num_particles),
+                  self.rng.uniform(50, 200, num_particles), (0.7, 1.2), (3, 8), color, gravity=200)
             
     def create_spawn_effect(self, x, y, color=(200, 0, 0)):
         """Create a spawn effect"""
         num_particles = 25
-        for _ in range(num_particles):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(50, 150)
-            velocity = (math.cos(angle) * speed, math.sin(angle) * speed)
-            lifetime = random.uniform(0.5, 1.0)
-            size = random.randint(3, 6)
-            # Particles move inward for spawn effect
-            particle = Particle(
-                x + math.cos(angle) * 50,
-                y + math.sin(angle) * 50,
-                color,
-                (-velocity[0], -velocity[1]),
-                lifetime,
-                size
-            )
-            self.particles.append(particle)
+        # Particles start on a ring and move inward
+        self.emit(x, y, self.rng.uniform(0, 2 * math.pi, num_particles),
+                  -self.rng.uniform(50, 150, num_particles), (0.5, 1.0), (3, 6), color, start_distance=50)
 
     def update(self, dt):
-        """Update all particles"""
-        for particle in self.particles[:]:
-            # Update position
-            particle.x += particle.velocity_x * dt
-            particle.y += particle.velocity_y * dt
-            
-            # Apply gravity
-            particle.velocity_y += particle.gravity * dt
-            
-            # Update lifetime and alpha
-            particle.lifetime -= dt
-            particle.alpha = int((particle.lifetime / particle.max_lifetime) * 255)
-            
-            # Remove dead particles
-            if particle.lifetime <= 0:
-                self.particles.remove(particle)
+        """Move every particle, then swap the last live particles into the slots of the ones that expired"""
+        n = self.count
+        if n == 0:
+            return
+        a = {name: array[:n] for name, array in self.arrays.items()}
+        a['x'] += a['velocity_x'] * dt
+        a['y'] += a['velocity_y'] * dt
+        a['velocity_y'] += a['gravity'] * dt
+        a['lifetime'] -= dt
+        
+        expired = a['lifetime'] <= 0
+        expired_count = int(np.count_nonzero(expired))
+        if expired_count == 0:
+            return
+        live_count = n - expired_count
+        # Holes below the new count are filled from the live particles above it, one for one
+        holes = np.flatnonzero(expired[:live_count])
+        movers = live_count + np.flatnonzero(~expired[live_count:])
+        for array in self.arrays.values():
+            array[holes] = array[movers]
+        self.count = live_count
 
+    def _sprite_keys(self, color_indices, sizes, alpha_buckets):
+        """Pack (colour index, size, alpha bucket) into one integer key per particle"""
+        return (color_indices.astype(np.int64) * 256 + sizes) * (self.ALPHA_BUCKETS + 1) + alpha_buckets
+        
+    def _create_sprite(self, key):
+        """Render the circle of a sprite key"""
+        color_and_size, alpha_bucket = divmod(key, self.ALPHA_BUCKETS + 1)
+        color_index, size = divmod(color_and_size, 256)
+        sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+        alpha = alpha_bucket * 255 // self.ALPHA_BUCKETS
+        pygame.draw.circle(sprite, (*self.colors[color_index], alpha), (size, size), size)
+        self.sprites[key] = sprite
+        return sprite
+        
     def draw(self, screen, camera_x=0, camera_y=0):
-        """Draw all particles"""
-        for particle in self.particles:
-            # Create a surface for the particle with alpha channel
-            particle_surface = pygame.Surface((particle.size * 2, particle.size * 2), pygame.SRCALPHA)
-            
-            # Draw the particle with current alpha
-            pygame.draw.circle(
-                particle_surface,
-                (*particle.color, particle.alpha),
-                (particle.size, particle.size),
-                particle.size
-            )
-            
-            # Draw to screen with camera offset
-            screen.blit(
-                particle_surface,
-                (particle.x - particle.size - camera_x,
-                 particle.y - particle.size - camera_y)
-            )
\ No newline at end of file
+        """Draw every on-screen particle from cached sprites in one batched blit"""
+        n = self.count
+        if n == 0:
+            return
+        a = self.arrays
+        sizes = a['size'][:n].astype(np.int32)
+        screen_x = (a['x'][:n] - sizes - camera_x).astype(np.int32)
+        screen_y = (a['y'][:n] - sizes - camera_y).astype(np.int32)
+        alpha_buckets = np.ceil(a['lifetime'][:n] / a['max_lifetime'][:n] * self.ALPHA_BUCKETS).astype(np.int32)
+        
+        # Skip particles that are off screen or faded out
+        width, height = screen.get_size()
+        visible = ((screen_x > -sizes * 2) & (screen_x < width) &
+                   (screen_y > -sizes * 2) & (screen_y < height) & (alpha_buckets > 0))
+        if not visible.all():
+            screen_x = screen_x[visible]
+            screen_y = screen_y[visible]
+            keys = self._sprite_keys(a['color'][:n][visible], sizes[visible], alpha_buckets[visible])
+        else:
+            keys = self._sprite_keys(a['color'][:n], sizes, alpha_buckets)
+        
+        sprites = self.sprites
+        blits = []
+        for key, x, y in zip(keys.tolist(), screen_x.tolist(), screen_y.tolist()):
+            sprite = sprites.get(key)
+            if sprite is None:
+                sprite = self._create_sprite(key)
+            blits.append((sprite, (x, y)))
+        screen.blits(blits, False)
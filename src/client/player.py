@@ -4,11 +4,14 @@ import math
 import random
 from enum import Enum, auto
 from pathlib import Path
-from ..common.constants import PLAYER_SPEED, PLAYER_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT
-from ..common.tiles import Tile, TileType
+from ..common.constants import PLAYER_SPEED, PLAYER_SIZE, HITBOX_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT
+from ..common.collision import move_and_slide
+from ..common.tiles import Tile
 from .sprite_manager import SpriteManager
 from .inventory import Inventory
 from .items import ItemType
+from .projectile import ProjectilePool
+from ..common import events
 
 class Direction(Enum):
     DOWN = 0
@@ -35,7 +38,6 @@ class DamageType(Enum):
 
 class Player:
     # Constants
-    MAX_DAMAGE_NUMBERS = 50
     MANA_REGEN_RATE = 10  # Mana points per second
     
     def __init__(self, x, y, gender='male'):
@@ -69,8 +71,6 @@ class Player:
         self.is_hit = False
         self.knockback_distance = 0
         self.knockback_direction = (0, 0)
-        self.damage_numbers = []  # List of (damage, x, y, timer, color) tuples
-        self.damage_number_duration = 1.0  # How long damage numbers stay on screen
         
         # Attack properties
         self.current_attack = None
@@ -96,7 +96,7 @@ class Player:
         # Gun properties
         self.gun = None
         self.gun_cooldown = 0
-        self.projectiles = []
+        self.projectiles = ProjectilePool()
         
         # Dash attack properties
         self.dash_speed = 500
@@ -109,9 +109,10 @@ class Player:
         self.wave_lifetime = 0.5
         self.waves = []  # List of active wave attacks
         
-        # Reference to enemies and particle system (will be set by GameClient)
+        # Reference to enemies and the event bus (will be set by GameClient)
         self.current_enemies = []
-        self.particle_system = None
+        self.enemy_index = None  # SpatialHash of enemies; attacks fall back to current_enemies without it
+        self.events = None  # EventBus that combat effects are emitted to
         
         # Animation properties
         self.sprite_manager = SpriteManager()
@@ -155,11 +156,13 @@ class Player:
             self.sprite_manager.load_spritesheet('player', str(sprite_path), PLAYER_SIZE)
             self.sprites_loaded = True
         
-    def handle_input(self, game_map):
+    def handle_input(self, game_map, keys=None):
         """Handle keyboard input for player movement and actions."""
+        if keys is None:
+            keys = pygame.key.get_pressed()
+            
         # Only prevent movement during attack animation, not during knockback
         if not self.is_attacking and not self.current_attack:
-            keys = pygame.key.get_pressed()
             dx = 0
             dy = 0
 
@@ -193,25 +196,18 @@ class Player:
             current_tile = game_map.get_tile(self.x + PLAYER_SIZE/2, self.y + PLAYER_SIZE/2)
             movement_speed = self.speed
 
-            # Adjust speed for water tiles
-            if current_tile and current_tile.tile_type == TileType.WATER:
-                movement_speed *= 0.5  # 50% slower in water
+            # Adjust speed for slow terrain (50% slower in water)
+            if current_tile:
+                movement_speed *= current_tile.speed
 
             # Apply movement with adjusted speed
             new_x = self.x + (dx * movement_speed)
             new_y = self.y + (dy * movement_speed)
 
-            # Check new positions independently to allow sliding along walls
-            if game_map.is_walkable(new_x + PLAYER_SIZE/2, self.y + PLAYER_SIZE/2):
-                self.x = new_x
-                self.rect.x = new_x
-
-            if game_map.is_walkable(self.x + PLAYER_SIZE/2, new_y + PLAYER_SIZE/2):
-                self.y = new_y
-                self.rect.y = new_y
+            # Move the footprint one axis at a time to allow sliding along walls
+            self._slide(new_x - self.x, new_y - self.y, game_map)
 
         # Attack inputs
-        keys = pygame.key.get_pressed()
         if not self.current_attack:
             if keys[pygame.K_j] and self.attack_timers[AttackType.SLASH] <= 0:
                 self.slash_attack()
@@ -234,10 +230,8 @@ class Player:
             self.gun_cooldown -= dt
             
         # Update projectiles
-        for projectile in self.projectiles[:]:
-            projectile.update(dt, game_map, self.current_enemies)
-            if not projectile.alive:
-                self.projectiles.remove(projectile)
+        if game_map is not None:
+            self.projectiles.update(dt, game_map, self.current_enemies, self.enemy_index)
                 
         # Regenerate mana
         self.current_mana = min(self.max_mana, 
@@ -252,26 +246,19 @@ class Player:
         if self.current_attack:
             if self.current_attack == AttackType.DASH:
                 if self.dash_timer > 0:
-                    # Move in dash direction
-                    new_x = self.x + self.dash_direction[0] * self.dash_speed * dt
-                    new_y = self.y + self.dash_direction[1] * self.dash_speed * dt
-                    
-                    # Check if new position is walkable
-                    if game_map and game_map.is_walkable(new_x + PLAYER_SIZE/2, new_y + PLAYER_SIZE/2):
-                        self.x = new_x
-                        self.y = new_y
-                        self.rect.x = new_x
-                        self.rect.y = new_y
+                    # Move in dash direction, stopping (or sliding) at walls
+                    if game_map:
+                        self._slide(self.dash_direction[0] * self.dash_speed * dt,
+                                    self.dash_direction[1] * self.dash_speed * dt, game_map)
                         
                         # Create dash effect
-                        if self.particle_system:
-                            self.particle_system.create_hit_effect(
-                                self.rect.centerx, self.rect.centery,
-                                color=(255, 200, 0)  # Golden color for dash
-                            )
+                        if self.events:
+                            self.events.emit(events.EFFECT, effect='hit',
+                                             x=self.rect.centerx, y=self.rect.centery,
+                                             color=(255, 200, 0))  # Golden color for dash
                         
                         # Check for enemy hits
-                        for enemy in self.current_enemies:
+                        for enemy in self._enemies_in_rect(self.rect):
                             if enemy.is_alive and self.rect.colliderect(enemy.rect):
                                 enemy.take_damage(
                                     int(self.strength * 1.5),  # 50% more damage
@@ -304,29 +291,20 @@ class Player:
         # Handle knockback
         if self.knockback_distance > 0:
             move_distance = min(self.knockback_distance, 10 * dt)
-            new_x = self.x + self.knockback_direction[0] * move_distance
-            new_y = self.y + self.knockback_direction[1] * move_distance
+            dx = self.knockback_direction[0] * move_distance
+            dy = self.knockback_direction[1] * move_distance
             
-            # Check if new position is walkable
-            if game_map is None or game_map.is_walkable(new_x + PLAYER_SIZE/2, new_y + PLAYER_SIZE/2):
-                self.x = new_x
-                self.y = new_y
-                self.rect.x = new_x
-                self.rect.y = new_y
-            else:
+            if game_map is None:
+                self.x += dx
+                self.y += dy
+                self.rect.x = self.x
+                self.rect.y = self.y
+            elif any(self._slide(dx, dy, game_map)):
                 # If we hit a wall, stop knockback
                 self.knockback_distance = 0
             
             self.knockback_distance -= move_distance
         
-        # Update damage numbers
-        self.damage_numbers = [(dmg, x, y, timer - dt, color) 
-                             for dmg, x, y, timer, color in self.damage_numbers 
-                             if timer > 0]
-        # Limit the number of damage numbers
-        if len(self.damage_numbers) > self.MAX_DAMAGE_NUMBERS:
-            self.damage_numbers = self.damage_numbers[-self.MAX_DAMAGE_NUMBERS:]
-        
         # Update animation frame
         self.animation_timer += dt
         if self.animation_timer >= self.animation_speed:
@@ -336,8 +314,7 @@ class Player:
     def draw(self, screen, camera_x=0, camera_y=0):
         """Draw the player and any effects"""
         # Draw projectiles
-        for projectile in self.projectiles:
-            projectile.draw(screen, camera_x, camera_y)
+        self.projectiles.draw(screen, camera_x, camera_y)
             
         # Ensure sprites are loaded before drawing
         if not self.sprites_loaded:
@@ -372,46 +349,6 @@ class Player:
                     self.rect.y - camera_y
                 ))
                 
-            # Draw damage numbers with colors and effects
-            font = pygame.font.Font(None, 24)  # Slightly larger font
-            for damage, x, y, timer, color in self.damage_numbers:
-                # Float up and fade out with bounce effect
-                progress = (self.damage_number_duration - timer) / self.damage_number_duration
-                y_offset = -30 * progress  # Base upward movement
-                
-                # Add bounce effect
-                bounce = math.sin(progress * math.pi * 2) * 5 * (1 - progress)
-                y_offset += bounce
-                
-                # Scale based on damage (bigger numbers = bigger text)
-                scale = min(1.5, 1 + damage / 50)  # Max 1.5x size for big hits
-                
-                # Fade out
-                alpha = int(255 * (1 - progress))
-                
-                # Render with outline for better visibility
-                text = font.render(str(damage), True, color)
-                text = pygame.transform.scale(text, 
-                    (int(text.get_width() * scale), 
-                     int(text.get_height() * scale)))
-                
-                # Create outline
-                outline = font.render(str(damage), True, (0, 0, 0))
-                outline = pygame.transform.scale(outline, 
-                    (int(outline.get_width() * scale), 
-                     int(outline.get_height() * scale)))
-                
-                # Position for centered text
-                text_x = x - text.get_width()/2 - camera_x
-                text_y = y + y_offset - text.get_height()/2 - camera_y
-                
-                # Draw outline then text
-                for dx, dy in [(-1,-1), (-1,1), (1,-1), (1,1)]:
-                    outline.set_alpha(alpha)
-                    screen.blit(outline, (text_x + dx, text_y + dy))
-                text.set_alpha(alpha)
-                screen.blit(text, (text_x, text_y))
-                
             # Debug: draw attack hitbox when attacking
             if self.is_attacking and self.current_attack:
                 hitbox = self._get_attack_hitbox()
@@ -501,6 +438,17 @@ class Player:
             
         return False
         
+    def _slide(self, dx, dy, game_map):
+        """Move by (dx, dy), sliding the footprint along walls, returning (blocked_x, blocked_y)"""
+        inset = (PLAYER_SIZE - HITBOX_SIZE) / 2
+        x, y, blocked_x, blocked_y = move_and_slide(self.x + inset, self.y + inset, HITBOX_SIZE, HITBOX_SIZE,
+                                                    dx, dy, game_map.is_walkable_tile, game_map.tile_size)
+        self.x = x - inset
+        self.y = y - inset
+        self.rect.x = self.x
+        self.rect.y = self.y
+        return blocked_x, blocked_y
+
     def shoot(self):
         """Fire the equipped gun"""
         if not self.gun or self.gun_cooldown > 0:
@@ -516,9 +464,8 @@ class Player:
         else:  # Direction.DOWN
             direction = (0, 1)
             
-        # Create new projectile
-        from .projectile import Projectile
-        projectile = Projectile(
+        # Fire from a pooled slot
+        self.projectiles.spawn(
             self.rect.centerx,
             self.rect.centery,
             direction,
@@ -527,16 +474,14 @@ class Player:
             self.gun.stats['range']
         )
         
-        self.projectiles.append(projectile)
         self.gun_cooldown = self.gun.stats['cooldown']
         
         # Create muzzle flash effect
-        if self.particle_system:
-            self.particle_system.create_hit_effect(
-                self.rect.centerx + direction[0] * 20,
-                self.rect.centery + direction[1] * 20,
-                color=(255, 255, 0)
-            )
+        if self.events:
+            self.events.emit(events.EFFECT, effect='hit',
+                             x=self.rect.centerx + direction[0] * 20,
+                             y=self.rect.centery + direction[1] * 20,
+                             color=(255, 255, 0))
         
     def gain_xp(self, amount):
         """Add XP and check for level up"""
@@ -573,12 +518,8 @@ class Player:
         # Update current stats
         self.update_stats()
         
-        # Create level up effect
-        if self.particle_system:
-            self.particle_system.create_special_attack_effect(
-                self.rect.centerx, self.rect.centery,
-                color=(255, 215, 0)  # Gold color for level up
-            )
+        if self.events:
+            self.events.emit(events.LEVEL_UP, x=self.rect.centerx, y=self.rect.centery, level=self.level)
             
     def update_stats(self):
         """Update current stats based on base stats and equipment"""
@@ -601,6 +542,18 @@ class Player:
         # Reset to base stats
         self.update_stats()
                     
+    def _enemies_in_rect(self, rect):
+        """Get the enemies that may overlap a rectangle"""
+        if self.enemy_index is None:
+            return self.current_enemies
+        return self.enemy_index.query_rect(rect.x, rect.y, rect.width, rect.height)
+
+    def _enemies_in_radius(self, x, y, radius):
+        """Get the enemies that may be within a radius of a point"""
+        if self.enemy_index is None:
+            return self.current_enemies
+        return self.enemy_index.query_radius(x, y, radius)
+
     def _get_attack_hitbox(self):
         """Get the attack hitbox based on player direction"""
         if self.direction == Direction.LEFT:
@@ -627,14 +580,13 @@ class Player:
         attack_rect = self._get_attack_hitbox()
         
         # Create slash effect
-        if self.particle_system:
-            center_x = attack_rect.centerx
-            center_y = attack_rect.centery
-            self.particle_system.create_slash_effect(
-                center_x, center_y, self.direction.name)
+        if self.events:
+            self.events.emit(events.EFFECT, effect='slash',
+                             x=attack_rect.centerx, y=attack_rect.centery,
+                             color=(255, 255, 100), direction=self.direction.name)
         
         # Check for hits
-        for enemy in self.current_enemies:
+        for enemy in self._enemies_in_rect(attack_rect):
             if enemy.is_alive and attack_rect.colliderect(enemy.rect):
                 # Calculate knockback direction
                 dx = enemy.x - self.x
@@ -664,19 +616,21 @@ class Player:
         self.is_attacking = True
         
         # Create spin effect
-        if self.particle_system:
-            self.particle_system.create_special_attack_effect(
-                self.rect.centerx, self.rect.centery)
+        if self.events:
+            self.events.emit(events.EFFECT, effect='special',
+                             x=self.rect.centerx, y=self.rect.centery, color=(0, 255, 255))
         
         # Check for hits in all directions
-        for enemy in self.current_enemies:
+        spin_range = self.attack_range * 1.5  # Larger range for spin attack
+        for enemy in self._enemies_in_radius(self.x, self.y, spin_range):
             if enemy.is_alive:
                 dx = enemy.x - self.x
                 dy = enemy.y - self.y
-                distance = math.sqrt(dx**2 + dy**2)
+                distance_squared = dx**2 + dy**2
                 
-                if distance <= self.attack_range * 1.5:  # Larger range for spin attack
+                if distance_squared <= spin_range * spin_range:
                     # Calculate knockback direction
+                    distance = math.sqrt(distance_squared)
                     knockback_direction = (dx/distance, dy/distance) if distance > 0 else (1, 0)
                     
                     # Deal damage
@@ -739,11 +693,10 @@ class Player:
         })
         
         # Create wave effect
-        if self.particle_system:
-            self.particle_system.create_special_attack_effect(
-                self.rect.centerx, self.rect.centery,
-                color=(0, 200, 255)  # Light blue for wave attack
-            )
+        if self.events:
+            self.events.emit(events.EFFECT, effect='special',
+                             x=self.rect.centerx, y=self.rect.centery,
+                             color=(0, 200, 255))  # Light blue for wave attack
 
     def take_damage(self, damage, knockback_direction=None):
         """Take damage from an enemy and handle knockback"""
@@ -755,13 +708,9 @@ class Player:
         self.current_health -= actual_damage
         
         # Add damage number
-        self.damage_numbers.append((
-            actual_damage,
-            self.x + random.randint(-10, 10),
-            self.y - 20,
-            self.damage_number_duration,
-            DamageType.NORMAL.value
-        ))
+        if self.events:
+            self.events.emit(events.DAMAGE, target='player', x=self.x, y=self.y,
+                             amount=actual_damage, color=DamageType.NORMAL.value)
         
         # Apply knockback
         if knockback_direction:
@@ -783,11 +732,8 @@ class Player:
             wave['y'] += wave['direction'][1] * self.wave_speed * dt
             
             # Create particle trail
-            if self.particle_system:
-                self.particle_system.create_hit_effect(
-                    wave['x'], wave['y'],
-                    color=(0, 200, 255)
-                )
+            if self.events:
+                self.events.emit(events.EFFECT, effect='hit', x=wave['x'], y=wave['y'], color=(0, 200, 255))
             
             # Check for enemy hits
             wave_rect = pygame.Rect(
@@ -795,7 +741,7 @@ class Player:
                 40, 40
             )
             
-            for enemy in self.current_enemies:
+            for enemy in self._enemies_in_rect(wave_rect):
                 if (enemy.is_alive and 
                     enemy not in wave['hit_enemies'] and
                     wave_rect.colliderect(enemy.rect)):
@@ -1,80 +1,171 @@
 import pygame
 import math
-from ..common.constants import PLAYER_SIZE
-
-class Projectile:
-    def __init__(self, x, y, direction, speed, damage, range, color=(255, 255, 0)):
-        self.x = x
-        self.y = y
-        self.direction = direction  # Normalized vector (dx, dy)
-        self.speed = speed
-        self.damage = damage
-        self.range = range
-        self.color = color
-        self.distance_traveled = 0
-        self.alive = True
-        self.rect = pygame.Rect(x, y, 8, 8)  # Small projectile hitbox
-        
-    def update(self, dt, game_map, enemies):
-        """Update projectile position and check for collisions"""
-        if not self.alive:
-            return
-            
-        # Move projectile
-        dx = self.direction[0] * self.speed * dt
-        dy = self.direction[1] * self.speed * dt
-        
-        # Update position
-        self.x += dx
-        self.y += dy
-        self.rect.x = self.x
-        self.rect.y = self.y
-        
-        # Update distance traveled
-        self.distance_traveled += math.sqrt(dx*dx + dy*dy)
-        
-        # Check if out of range
-        if self.distance_traveled >= self.range:
-            self.alive = False
-            return
-            
-        # Check for wall collision
-        if not game_map.is_walkable(self.x + 4, self.y + 4):
-            self.alive = False
+import numpy as np
+from ..common.line_of_sight import segment_box_entry, batch_line_of_sight
+from ..common.collision import sweep_box
+
+class ProjectilePool:
+    """Preallocated projectile slots, moved and swept against walls and enemies as one batch"""
+    SIZE = 8  # Hitbox width and height in pixels
+    TRAIL_LENGTH = 20
+
+    # Data type of each per-projectile array; slots [0, count) are live
+    FIELDS = {
+        'x': np.float64, 'y': np.float64,  # Top-left corner of the hitbox
+        'dir_x': np.float64, 'dir_y': np.float64,  # Normalized direction
+        'speed': np.float64,
+        'damage': np.int32,
+        'range': np.float64,
+        'traveled': np.float64,
+    }
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.count = 0
+        self.arrays = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.FIELDS.items()}
+        self.arrays['color'] = np.zeros((capacity, 3), dtype=np.uint8)
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        """Double the capacity of every array"""
+        self.capacity *= 2
+        for name, array in self.arrays.items():
+            grown = np.zeros((self.capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:len(array)] = array
+            self.arrays[name] = grown
+
+    def spawn(self, x, y, direction, speed, damage, range, color=(255, 255, 0)):
+        """Fire a projectile from a position, returning its slot"""
+        if self.count == self.capacity:
+            self._grow()
+        index = self.count
+        self.count += 1
+        a = self.arrays
+        a['x'][index] = x
+        a['y'][index] = y
+        a['dir_x'][index] = direction[0]
+        a['dir_y'][index] = direction[1]
+        a['speed'][index] = speed
+        a['damage'][index] = damage
+        a['range'][index] = range
+        a['traveled'][index] = 0
+        a['color'][index] = color
+        return index
+
+    def remove(self, index):
+        """Remove a slot by moving the last projectile into it"""
+        last = self.count - 1
+        self.count = last
+        if index != last:
+            for array in self.arrays.values():
+                array[index] = array[last]
+
+    def clear(self):
+        """Remove every projectile"""
+        self.count = 0
+
+    def update(self, dt, game_map, enemies, enemy_index=None):
+        """Move every projectile along its path this frame, stopping at the first wall or enemy it crosses"""
+        n = self.count
+        if n == 0:
             return
-            
-        # Check for enemy collision
-        for enemy in enemies:
-            if enemy.is_alive and self.rect.colliderect(enemy.rect):
-                # Calculate knockback direction
-                dx = enemy.x - self.x
-                dy = enemy.y - self.y
+        a = {name: array[:n] for name, array in self.arrays.items()}
+        half = self.SIZE / 2
+        tile_size = game_map.tile_size
+
+        # Sweep the hitbox centre over this frame's step, cut short at the end of the range
+        step = np.minimum(a['speed'] * dt, a['range'] - a['traveled'])
+        start_x = a['x'] + half
+        start_y = a['y'] + half
+        end_x = start_x + a['dir_x'] * step
+        end_y = start_y + a['dir_y'] * step
+
+        # One vectorized pass finds the few paths that cross a wall this frame; only those
+        # sweep their hitbox against the tiles to find where it first touches. The walkable grid
+        # starts at grid_origin, so the paths are traced relative to it
+        offset_x = game_map.grid_origin[0] * tile_size
+        offset_y = game_map.grid_origin[1] * tile_size
+        crossing_wall = ~batch_line_of_sight(start_x - offset_x, start_y - offset_y, end_x - offset_x,
+                                             end_y - offset_y, ~game_map.get_walkable_grid(), tile_size)
+
+        dead = []
+        for index in range(n):
+            segment = (float(start_x[index]), float(start_y[index]), float(end_x[index]), float(end_y[index]))
+            hit_fraction = 1.0
+            if crossing_wall[index]:
+                hit_fraction = sweep_box(float(a['x'][index]), float(a['y'][index]), self.SIZE, self.SIZE,
+                                         segment[2] - segment[0], segment[3] - segment[1],
+                                         game_map.is_walkable_tile, tile_size)
+                if hit_fraction == 1.0:
+                    hit_fraction = 0.0  # The hitbox started out touching the wall its centre runs into
+
+            enemy, enemy_fraction = self._first_enemy(segment, enemies, enemy_index, half)
+            if enemy is not None and enemy_fraction <= hit_fraction:
+                hit_fraction = enemy_fraction
+                hit_x = segment[0] + (segment[2] - segment[0]) * hit_fraction - half
+                hit_y = segment[1] + (segment[3] - segment[1]) * hit_fraction - half
+
+                # Knock the enemy away from where it was hit
+                dx = enemy.x - hit_x
+                dy = enemy.y - hit_y
                 length = math.sqrt(dx*dx + dy*dy)
                 if length > 0:
                     knockback_direction = (dx/length, dy/length)
                 else:
-                    knockback_direction = self.direction
-                
-                # Deal damage to enemy
-                enemy.take_damage(self.damage, knockback_direction, (255, 255, 0))
-                self.alive = False
-                return
-                
+                    knockback_direction = (float(a['dir_x'][index]), float(a['dir_y'][index]))
+                enemy.take_damage(int(a['damage'][index]), knockback_direction, (255, 255, 0))
+
+            # Advance to the hit point, or the end of the step
+            a['x'][index] += (segment[2] - segment[0]) * hit_fraction
+            a['y'][index] += (segment[3] - segment[1]) * hit_fraction
+            a['traveled'][index] += step[index] * hit_fraction
+            if hit_fraction < 1.0 or a['traveled'][index] >= a['range'][index]:
+                dead.append(index)
+
+        # Highest slot first, so the projectile swapped into a freed slot is always a live one
+        for index in reversed(dead):
+            self.remove(index)
+
+    def _first_enemy(self, segment, enemies, enemy_index, radius):
+        """Get the first living enemy a segment (thickened by a radius) enters, and the fraction where"""
+        if enemy_index is not None:
+            # The index returns what the segment passes through, nearest first
+            for enemy in enemy_index.query_ray(*segment, radius):
+                if enemy.is_alive:
+                    rect = enemy.rect
+                    entry = segment_box_entry(*segment, rect.left - radius, rect.top - radius,
+                                              rect.right + radius, rect.bottom + radius)
+                    return enemy, entry if entry is not None else 0.0
+            return None, None
+
+        first, first_entry = None, None
+        for enemy in enemies:
+            if not enemy.is_alive:
+                continue
+            rect = enemy.rect
+            entry = segment_box_entry(*segment, rect.left - radius, rect.top - radius,
+                                      rect.right + radius, rect.bottom + radius)
+            if entry is not None and (first_entry is None or entry < first_entry):
+                first, first_entry = enemy, entry
+        return first, first_entry
+
     def draw(self, screen, camera_x, camera_y):
-        """Draw the projectile"""
-        if not self.alive:
+        """Draw every projectile with its trail"""
+        n = self.count
+        if n == 0:
             return
-            
-        # Draw projectile trail
-        trail_length = 20
-        end_x = self.x - self.direction[0] * trail_length
-        end_y = self.y - self.direction[1] * trail_length
-        
-        # Draw trail (semi-transparent)
-        pygame.draw.line(screen, (*self.color, 128),
-                        (self.x - camera_x + 4, self.y - camera_y + 4),
-                        (end_x - camera_x + 4, end_y - camera_y + 4), 3)
-        
-        # Draw projectile
-        pygame.draw.circle(screen, self.color,
-                         (int(self.x - camera_x + 4), int(self.y - camera_y + 4)), 4)
\ No newline at end of file
+        half = self.SIZE / 2
+        a = self.arrays
+        for x, y, dir_x, dir_y, color in zip(a['x'][:n].tolist(), a['y'][:n].tolist(), a['dir_x'][:n].tolist(),
+                                             a['dir_y'][:n].tolist(), a['color'][:n].tolist()):
+            screen_x = x - camera_x + half
+            screen_y = y - camera_y + half
+
+            # Draw trail (semi-transparent)
+            pygame.draw.line(screen, (*color, 128), (screen_x, screen_y),
+                             (screen_x - dir_x * self.TRAIL_LENGTH, screen_y - dir_y * self.TRAIL_LENGTH), 3)
+
+            # Draw projectile
+            pygame.draw.circle(screen, color, (int(screen_x), int(screen_y)), 4)
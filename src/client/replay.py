@@ -0,0 +1,184 @@
+import pygame
+import argparse
+import gzip
+import os
+import random
+import struct
+import time
+import zlib
+
+MAGIC = b"MRPL"
+VERSION = 1
+
+# Keys the simulation reads while held, stored as one bit each
+RECORDED_KEYS = (
+    pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN,
+    pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s,
+    pygame.K_j, pygame.K_k, pygame.K_l, pygame.K_u, pygame.K_SPACE, pygame.K_e,
+)
+KEY_BITS = {key: 1 << index for index, key in enumerate(RECORDED_KEYS)}
+
+# Event types the game handles, stored by index
+EVENT_TYPES = (pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN)
+EVENT_INDEX = {event_type: index for index, event_type in enumerate(EVENT_TYPES)}
+
+HEADER = struct.Struct("<4sHQ")  # Magic, version, random seed
+FRAME = struct.Struct("<BdIH")  # Tag, dt, held key bits, event count
+EVENT = struct.Struct("<BIhh")  # Event type index, key or button, x, y
+END = struct.Struct("<BII")  # Tag, frame count, state checksum
+FRAME_TAG = 0
+END_TAG = 1
+
+class KeyState:
+    """Held keys rebuilt from a recording, read like pygame.key.get_pressed()"""
+    def __init__(self, bits):
+        self.bits = bits
+
+    def __getitem__(self, key):
+        return bool(self.bits & KEY_BITS.get(key, 0))
+
+def state_checksum(client):
+    """Get a checksum of the simulation state, to tell whether a replay ended where its recording did"""
+    player = client.player
+    state = (
+        client.map_manager.current_map_id,
+        player.x, player.y, player.current_health, player.current_mana, player.xp, player.level,
+        sorted((enemy.enemy_type, enemy.x, enemy.y, enemy.current_health) for enemy in client.enemies),
+        sorted((item.x, item.y) for item in client.items),
+    )
+    return zlib.crc32(repr(state).encode())
+
+def start_session(seed):
+    """Seed the shared random number generator and create a game client that can be replayed"""
+    from .main import GameClient
+    from .streaming_map import StreamingGameMap
+    random.seed(seed)
+    client = GameClient()
+    client.map_manager.wait_for_preload = True
+    for game_map in client.map_manager.maps.values():
+        if isinstance(game_map, StreamingGameMap):
+            game_map.wait_for_loads = True
+    return client
+
+class Recorder:
+    """Writes a session's seed and every simulation step's dt, held keys and events to a compressed replay file"""
+    def __init__(self, path, seed):
+        self.file = gzip.open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed))
+        self.frames = 0
+
+    def record(self, dt, events, keys):
+        """Write the input of one simulation step"""
+        events = [event for event in events if event.type in EVENT_INDEX]
+        bits = 0
+        for key, bit in KEY_BITS.items():
+            if keys[key]:
+                bits |= bit
+        parts = [FRAME.pack(FRAME_TAG, dt, bits, len(events))]
+        for event in events:
+            code = getattr(event, 'key', getattr(event, 'button', 0))
+            x, y = getattr(event, 'pos', (0, 0))
+            parts.append(EVENT.pack(EVENT_INDEX[event.type], code, x, y))
+        self.file.write(b"".join(parts))
+        self.frames += 1
+
+    def close(self, client):
+        """Finish the file with the frame count and the final state checksum"""
+        self.file.write(END.pack(END_TAG, self.frames, state_checksum(client)))
+        self.file.close()
+
+class Replay:
+    """The seed, frames and final checksum of a replay file"""
+    def __init__(self, path):
+        with gzip.open(path, "rb") as file:
+            data = file.read()
+        magic, version, self.seed = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay")
+        self.frames = []  # List of (dt, KeyState, events)
+        self.checksum = None
+        offset = HEADER.size
+        while offset < len(data):
+            if data[offset] == END_TAG:
+                _, _, self.checksum = END.unpack_from(data, offset)
+                break
+            _, dt, bits, event_count = FRAME.unpack_from(data, offset)
+            offset += FRAME.size
+            events = []
+            for _ in range(event_count):
+                type_index, code, x, y = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                events.append(self._make_event(EVENT_TYPES[type_index], code, x, y))
+            self.frames.append((dt, KeyState(bits), events))
+
+    @staticmethod
+    def _make_event(event_type, code, x, y):
+        """Rebuild a pygame event"""
+        if event_type in (pygame.KEYDOWN, pygame.KEYUP):
+            return pygame.event.Event(event_type, key=code, mod=0, unicode="")
+        if event_type == pygame.MOUSEBUTTONDOWN:
+            return pygame.event.Event(event_type, button=code, pos=(x, y))
+        return pygame.event.Event(event_type)
+
+    def play(self, render=False):
+        """Run the recorded session as fast as possible, returning its timings and whether it ended in the recorded state"""
+        client = start_session(self.seed)
+        simulate_time = 0.0
+        render_time = 0.0
+        frames = 0
+        for dt, keys, events in self.frames:
+            start = time.perf_counter()
+            client.handle_events(events)
+            client.update(dt, keys)
+            simulate_time += time.perf_counter() - start
+            if render:
+                start = time.perf_counter()
+                client.render()
+                render_time += time.perf_counter() - start
+            frames += 1
+            if not client.running:
+                break
+        checksum = state_checksum(client)
+        client.close()
+        return {
+            'frames': frames,
+            'simulate_ms': simulate_time * 1000 / max(1, frames),
+            'render_ms': render_time * 1000 / max(1, frames),
+            'checksum': checksum,
+            'matches': self.checksum is None or checksum == self.checksum,
+        }
+
+def record(path, seed):
+    """Play the game normally while recording it to a replay file"""
+    client = start_session(seed)
+    recorder = Recorder(path, seed)
+    try:
+        client.run(recorder)
+    finally:
+        recorder.close(client)
+        client.close()
+
+if __name__ == "__main__":
+    # Run from the project root: python -m src.client.replay record session.rpl
+    parser = argparse.ArgumentParser(description="Record a play session or replay one headless")
+    parser.add_argument("mode", choices=["record", "play"])
+    parser.add_argument("path")
+    parser.add_argument("--seed", type=int, help="Random seed of a new recording (random by default)")
+    parser.add_argument("--render", action="store_true", help="Also draw every replayed frame, off screen")
+    args = parser.parse_args()
+
+    if args.mode == "record":
+        record(args.path, args.seed if args.seed is not None else random.getrandbits(32))
+    else:
+        # Replays never open a window
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+        replay = Replay(args.path)
+        result = replay.play(args.render)
+        print(f"{result['frames']} frames: simulate {result['simulate_ms']:.2f} ms/frame, "
+              f"render {result['render_ms']:.2f} ms/frame")
+        if result['matches']:
+            print(f"Final state matches the recording (checksum {result['checksum']:08x})")
+        else:
+            print(f"Error: final state {result['checksum']:08x} differs from the recorded {replay.checksum:08x}")
+            raise SystemExit(1)
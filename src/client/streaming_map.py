@@ -0,0 +1,172 @@
+from .map import GameMap
+from .chunks import ChunkStore, ChunkStreamer, bake_chunk
+
+class StreamingGameMap(GameMap):
+    """A GameMap backed by a ChunkStore that only keeps chunks near the view resident"""
+    def __init__(self, store, memory_budget=64 * 1024 * 1024, view_margin=1, prefetch_distance=2):
+        if not isinstance(store, ChunkStore):
+            store = ChunkStore(store)
+        self.store = store
+        self.streamer = ChunkStreamer(store, memory_budget)
+        self.view_margin = view_margin  # Chunks kept loaded around the view
+        self.prefetch_distance = prefetch_distance  # Chunks loaded ahead of movement
+        self.wait_for_loads = False  # Load the margin synchronously and skip prefetching, so residency never depends on thread timing
+        super().__init__(store.width, store.height, store.tile_size)
+        self.chunk_size = store.chunk_size
+        self.grid_size = (0, 0)  # The walkable and opaque grids follow the chunks around the view (see set_focus)
+
+    def _create_tiles(self):
+        """Tiles are loaded chunk by chunk in set_focus instead of up front"""
+        self.tiles = None
+
+    def _tile_at(self, tile_x, tile_y):
+        """Get the tile at a tile coordinate, or None if it is outside the map or not loaded"""
+        if not (0 <= tile_x < self.width and 0 <= tile_y < self.height):
+            return None
+        chunk = self.streamer.chunks.get((tile_x // self.chunk_size, tile_y // self.chunk_size))
+        if chunk is None:
+            return None
+        return chunk.tiles[tile_y - chunk.origin_y][tile_x - chunk.origin_x]
+
+    def _store_tile(self, tile_x, tile_y, tile):
+        """Place a tile in its resident chunk and mark the chunk for write-back"""
+        if not (0 <= tile_x < self.width and 0 <= tile_y < self.height):
+            return False
+        chunk = self.streamer.chunks.get((tile_x // self.chunk_size, tile_y // self.chunk_size))
+        if chunk is None:
+            return False
+        chunk.tiles[tile_y - chunk.origin_y][tile_x - chunk.origin_x] = tile
+        chunk.dirty = True
+        return True
+
+    def invalidate_chunk(self, chunk_x, chunk_y):
+        """Force a chunk to be baked again the next time it is drawn"""
+        chunk = self.streamer.chunks.get((chunk_x, chunk_y))
+        if chunk:
+            chunk.baked = None
+
+    def get_baked_chunk(self, chunk_x, chunk_y):
+        """Get the baked surface of a resident chunk, or None while it is loading"""
+        chunk = self.streamer.chunks.get((chunk_x, chunk_y))
+        if chunk is None:
+            return None
+        if chunk.baked is None:
+            chunk.baked = bake_chunk(self, chunk_x, chunk_y)
+        return chunk.baked
+
+    def iter_tiles(self):
+        """Yield (tile_x, tile_y, tile) for every tile in the resident chunks"""
+        for chunk in list(self.streamer.chunks.values()):
+            for row_index, row in enumerate(chunk.tiles):
+                for col_index, tile in enumerate(row):
+                    yield chunk.origin_x + col_index, chunk.origin_y + row_index, tile
+
+    def _iter_grid_tiles(self):
+        """Yield (tile_x, tile_y, tile) for every resident tile the walkable and opaque grids cover"""
+        first_x = self.grid_origin[0] // self.chunk_size
+        first_y = self.grid_origin[1] // self.chunk_size
+        last_x = (self.grid_origin[0] + self.grid_size[0] - 1) // self.chunk_size
+        last_y = (self.grid_origin[1] + self.grid_size[1] - 1) // self.chunk_size
+        for chunk_y in range(first_y, last_y + 1):
+            for chunk_x in range(first_x, last_x + 1):
+                chunk = self.streamer.chunks.get((chunk_x, chunk_y))
+                if chunk is None:
+                    continue
+                for row_index, row in enumerate(chunk.tiles):
+                    for col_index, tile in enumerate(row):
+                        yield chunk.origin_x + col_index, chunk.origin_y + row_index, tile
+
+    def _move_grids(self, chunks):
+        """Make the walkable and opaque grids cover the bounding box of a set of chunk keys,
+        dropping them to be rebuilt when that box moves"""
+        first_x = min(chunk_x for chunk_x, chunk_y in chunks)
+        first_y = min(chunk_y for chunk_x, chunk_y in chunks)
+        last_x = max(chunk_x for chunk_x, chunk_y in chunks)
+        last_y = max(chunk_y for chunk_x, chunk_y in chunks)
+        origin = (first_x * self.chunk_size, first_y * self.chunk_size)
+        size = (min((last_x + 1) * self.chunk_size, self.width) - origin[0],
+                min((last_y + 1) * self.chunk_size, self.height) - origin[1])
+        if (origin, size) != (self.grid_origin, self.grid_size):
+            self.grid_origin = origin
+            self.grid_size = size
+            self.walkable_grid = None
+            self.opaque_grid = None
+
+    def _chunk_range(self, left, top, right, bottom):
+        """Get the set of chunk keys overlapping a pixel rectangle"""
+        chunk_pixels = self.chunk_size * self.tile_size
+        start_x = max(0, int(left // chunk_pixels))
+        end_x = min(self.store.chunks_x - 1, int(right // chunk_pixels))
+        start_y = max(0, int(top // chunk_pixels))
+        end_y = min(self.store.chunks_y - 1, int(bottom // chunk_pixels))
+        return {(chunk_x, chunk_y)
+                for chunk_y in range(start_y, end_y + 1)
+                for chunk_x in range(start_x, end_x + 1)}
+
+    def _on_chunk_loaded(self, chunk):
+        """Calculate transitions for a new chunk and its neighbours' edges, and announce its tiles"""
+        for y in range(chunk.origin_y, chunk.origin_y + chunk.height):
+            for x in range(chunk.origin_x, chunk.origin_x + chunk.width):
+                self._update_tile_transitions(x, y)
+                self._notify_tile_changed(x, y, self._tile_at(x, y))
+        self.version += 1
+
+        # Tiles just outside the chunk can now see across the border
+        left = chunk.origin_x - 1
+        right = chunk.origin_x + chunk.width
+        top = chunk.origin_y - 1
+        bottom = chunk.origin_y + chunk.height
+        for x in range(chunk.origin_x, right):
+            self._refresh_tile(x, top)
+            self._refresh_tile(x, bottom)
+        for y in range(chunk.origin_y, bottom):
+            self._refresh_tile(left, y)
+            self._refresh_tile(right, y)
+
+    def set_focus(self, camera_x, camera_y, view_width, view_height, velocity_x=0, velocity_y=0):
+        """Load chunks around the view, prefetch ahead of movement and evict the rest"""
+        loaded = self.streamer.poll()
+        for chunk in loaded:
+            self._on_chunk_loaded(chunk)
+
+        # Chunks on screen must be resident this frame, the margin around them can stream in
+        visible = self._chunk_range(camera_x, camera_y,
+                                    camera_x + view_width, camera_y + view_height)
+        margin = self.view_margin * self.chunk_size * self.tile_size
+        needed = self._chunk_range(camera_x - margin, camera_y - margin,
+                                   camera_x + view_width + margin, camera_y + view_height + margin)
+        # Grids hold just those chunks, so their memory depends on the view rather than the world
+        self._move_grids(needed)
+
+        for key in sorted(needed):
+            if key in self.streamer.chunks:
+                continue
+            if key in visible or self.wait_for_loads:
+                chunk = self.streamer.load_now(key)
+                self._on_chunk_loaded(chunk)
+                loaded.append(chunk)
+            else:
+                self.streamer.request(key, ChunkStreamer.PRIORITY_NEEDED)
+
+        # Prefetch the band of chunks the view is moving towards
+        prefetch = set()
+        if (velocity_x or velocity_y) and not self.wait_for_loads:
+            ahead = self.prefetch_distance * self.chunk_size * self.tile_size
+            shift_x = ahead if velocity_x > 0 else -ahead if velocity_x < 0 else 0
+            shift_y = ahead if velocity_y > 0 else -ahead if velocity_y < 0 else 0
+            prefetch = self._chunk_range(camera_x + shift_x, camera_y + shift_y,
+                                         camera_x + view_width + shift_x,
+                                         camera_y + view_height + shift_y) - needed
+            for key in prefetch:
+                self.streamer.request(key, ChunkStreamer.PRIORITY_PREFETCH)
+
+        self.streamer.touch(needed)
+        evicted = self.streamer.evict(needed | prefetch)
+        
+        # Spawn points only cover resident chunks
+        if loaded or evicted:
+            self.spawn_table = None
+
+    def close(self):
+        """Write back edited chunks and stop background loading"""
+        self.streamer.close()
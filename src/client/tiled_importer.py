@@ -0,0 +1,378 @@
+import base64
+import sys
+import gzip
+import hashlib
+import json
+import pickle
+import zlib
+import xml.etree.ElementTree as ET
+from array import array
+from pathlib import Path
+from .map import GameMap
+from ..common.tiles import TileType
+
+# Bump when the compiled layout changes so stale caches are ignored
+FORMAT_VERSION = 2
+
+# Tiled stores flip/rotation flags in the top bits of each gid
+GID_MASK = 0x0FFFFFFF
+
+MAPS_DIR = Path(__file__).resolve().parent.parent / 'assets' / 'maps'  # Tiled maps here are loaded by the game
+DEFAULT_CACHE_DIR = MAPS_DIR / '.cache'
+
+class CompiledMap:
+    """Game-ready data extracted from a Tiled map"""
+    def __init__(self, width, height, tile_size, tiles, overrides=None,
+                 portals=None, npcs=None, spawns=None, entrances=None, dependencies=None):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.tiles = tiles  # Row-major TileType values, one byte per tile
+        self.overrides = overrides or {}  # Dictionary of {(tile_x, tile_y): (walkable, speed)}
+        self.portals = portals or []  # List of (x, y, target_map_id, target_x, target_y)
+        self.npcs = npcs or []  # List of (x, y, npc_type)
+        self.spawns = spawns or []  # List of (x, y, enemy_type)
+        self.entrances = entrances or []  # List of (x, y, source_map_id, source_x, source_y)
+        self.dependencies = dependencies or []  # List of (path, sha1) of the source files
+
+    def to_bytes(self):
+        """Serialize into the compact cached form"""
+        override_keys = array('i')
+        override_walkable = bytearray()
+        override_speed = array('d')
+        for (tile_x, tile_y), (walkable, speed) in self.overrides.items():
+            override_keys.extend((tile_x, tile_y))
+            override_walkable.append(2 if walkable is None else int(walkable))
+            override_speed.append(-1.0 if speed is None else speed)
+
+        return pickle.dumps({
+            'version': FORMAT_VERSION,
+            'size': (self.width, self.height, self.tile_size),
+            'tiles': bytes(self.tiles),
+            'override_keys': override_keys.tobytes(),
+            'override_walkable': bytes(override_walkable),
+            'override_speed': override_speed.tobytes(),
+            'portals': self.portals,
+            'npcs': self.npcs,
+            'spawns': self.spawns,
+            'entrances': self.entrances,
+            'dependencies': self.dependencies,
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Load the cached form, returning None if it was written by another format version"""
+        record = pickle.loads(data)
+        if record.get('version') != FORMAT_VERSION:
+            return None
+
+        override_keys = array('i')
+        override_keys.frombytes(record['override_keys'])
+        override_speed = array('d')
+        override_speed.frombytes(record['override_speed'])
+        overrides = {}
+        for index, walkable in enumerate(record['override_walkable']):
+            key = (override_keys[index * 2], override_keys[index * 2 + 1])
+            speed = override_speed[index]
+            overrides[key] = (None if walkable == 2 else bool(walkable),
+                              None if speed < 0 else speed)
+
+        width, height, tile_size = record['size']
+        return cls(width, height, tile_size, record['tiles'], overrides,
+                   record['portals'], record['npcs'], record['spawns'], record['entrances'],
+                   record['dependencies'])
+
+    def build_map(self):
+        """Create a GameMap from the compiled data"""
+        game_map = GameMap(self.width, self.height, self.tile_size, grid=self.tiles)
+        for (tile_x, tile_y), (walkable, speed) in self.overrides.items():
+            tile = game_map._tile_at(tile_x, tile_y)
+            if tile is None:
+                continue
+            if walkable is not None:
+                tile.walkable = walkable
+            if speed is not None:
+                tile.speed = speed
+        game_map.spawn_points = list(self.spawns)
+        return game_map
+
+def _hash_file(path):
+    with open(path, 'rb') as source_file:
+        return hashlib.sha1(source_file.read()).hexdigest()
+
+def load_tiled_map(path, cache_dir=DEFAULT_CACHE_DIR):
+    """Load a Tiled map, compiling it only if the cached copy is missing or stale"""
+    # Keyed by the source hash, so startup reads one binary file instead of parsing
+    path = Path(path).resolve()
+    cache_path = Path(cache_dir) / f'{_hash_file(path)}.v{FORMAT_VERSION}.bin'
+
+    if cache_path.exists():
+        try:
+            with open(cache_path, 'rb') as cache_file:
+                compiled = CompiledMap.from_bytes(cache_file.read())
+            # External tilesets are not part of the key, check they are unchanged
+            if compiled and all(Path(dependency).exists() and _hash_file(dependency) == digest
+                                for dependency, digest in compiled.dependencies):
+                return compiled
+        except (OSError, pickle.UnpicklingError, KeyError, ValueError) as e:
+            print(f"Error reading compiled map {cache_path}: {e}")
+
+    compiled = TiledImporter(path).compile()
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_suffix('.tmp')
+        with open(temp_path, 'wb') as cache_file:
+            cache_file.write(compiled.to_bytes())
+        temp_path.replace(cache_path)
+    except OSError as e:
+        print(f"Error writing compiled map {cache_path}: {e}")
+    return compiled
+
+def _parse_value(value, value_type):
+    """Convert a Tiled property value to a Python value"""
+    if value_type == 'bool':
+        return value if isinstance(value, bool) else str(value).lower() == 'true'
+    if value_type == 'int':
+        return int(value)
+    if value_type == 'float':
+        return float(value)
+    return value
+
+def _tile_type_from_name(name):
+    """Match a Tiled type/class or terrain name to a TileType"""
+    if not name:
+        return None
+    return TileType.__members__.get(str(name).upper())
+
+class TiledImporter:
+    """Parses a Tiled map (JSON .tmj/.json or XML .tmx) and compiles it into a CompiledMap"""
+    # Tileset tiles map to terrain through their type/class or a "terrain" property
+    # naming a TileType (e.g. "water"). Optional tile properties are "walkable" (bool)
+    # and "speed" (movement multiplier).
+    #
+    # Objects are read by type/class:
+    #   portal - properties target_map, target_x, target_y (pixels)
+    #   npc    - optional property npc_type (defaults to villager)
+    #   spawn  - enemy spawn point, optional property enemy_type
+    #   entrance - arrival point of a portal added to another map, properties
+    #              source_map, source_x, source_y (pixels)
+    def __init__(self, path):
+        self.path = Path(path)
+        self.dependencies = []
+        self.tile_info = {}  # Dictionary of {gid: (tile_type, walkable, speed)}
+
+    def compile(self):
+        """Parse the source map and produce its compiled form"""
+        if self.path.suffix == '.tmx':
+            data = self._read_tmx(self.path)
+        else:
+            data = self._read_json(self.path)
+
+        if data.get('infinite'):
+            raise ValueError(f"Infinite Tiled maps are not supported: {self.path}")
+
+        width = data['width']
+        height = data['height']
+        for tileset in data['tilesets']:
+            self._add_tileset(tileset)
+
+        # The top-most non-empty tile of each cell decides its terrain
+        cells = [0] * (width * height)
+        portals, npcs, spawns, entrances = [], [], [], []
+        for layer in data['layers']:
+            if layer['type'] == 'tilelayer':
+                for index, gid in enumerate(layer['data'][:width * height]):
+                    gid &= GID_MASK
+                    if gid:
+                        cells[index] = gid
+            elif layer['type'] == 'objectgroup':
+                self._read_objects(layer['objects'], portals, npcs, spawns, entrances)
+
+        tiles = bytearray(width * height)
+        overrides = {}
+        for index, gid in enumerate(cells):
+            tile_type, walkable, speed = self.tile_info.get(gid, (None, None, None))
+            tiles[index] = (tile_type or TileType.GRASS).value
+            if walkable is not None or speed is not None:
+                overrides[(index % width, index // width)] = (walkable, speed)
+
+        dependencies = [(str(path), _hash_file(path)) for path in self.dependencies]
+        return CompiledMap(width, height, data['tilewidth'], bytes(tiles), overrides,
+                           portals, npcs, spawns, entrances, dependencies)
+
+    def _add_tileset(self, tileset):
+        """Record the terrain and properties of each tile in a tileset"""
+        first_gid = tileset['firstgid']
+        if 'source' in tileset:
+            source = (self.path.parent / tileset['source']).resolve()
+            self.dependencies.append(source)
+            if source.suffix == '.tsx':
+                tileset = self._tmx_tileset(ET.parse(source).getroot())
+            else:
+                with open(source) as tileset_file:
+                    tileset = self._json_tileset(json.load(tileset_file))
+
+        default_type = _tile_type_from_name(tileset.get('properties', {}).get('terrain'))
+        for tile in tileset.get('tiles', []):
+            properties = tile.get('properties', {})
+            tile_type = (_tile_type_from_name(properties.get('terrain')) or
+                         _tile_type_from_name(tile.get('type')) or
+                         default_type)
+            self.tile_info[first_gid + tile['id']] = (
+                tile_type,
+                properties.get('walkable'),
+                properties.get('speed')
+            )
+
+    def _read_objects(self, objects, portals, npcs, spawns, entrances):
+        """Sort map objects into portals, NPCs, spawn points and entrances"""
+        for obj in objects:
+            kind = (obj.get('type') or '').lower()
+            properties = obj.get('properties', {})
+            x, y = obj['x'], obj['y']
+            if obj.get('gid'):
+                y -= obj.get('height', 0)  # Tile objects are anchored at their bottom
+            if kind == 'portal':
+                portals.append((x, y, properties['target_map'],
+                                properties['target_x'], properties['target_y']))
+            elif kind == 'npc':
+                npcs.append((x, y, properties.get('npc_type', 'villager')))
+            elif kind == 'spawn':
+                spawns.append((x, y, properties.get('enemy_type')))
+            elif kind == 'entrance':
+                entrances.append((x, y, properties['source_map'],
+                                  properties['source_x'], properties['source_y']))
+
+    # JSON format
+
+    def _json_properties(self, properties):
+        return {prop['name']: _parse_value(prop['value'], prop.get('type', 'string'))
+                for prop in properties or []}
+
+    def _read_json(self, path):
+        """Read a .tmj/.json map into the common layout"""
+        with open(path) as map_file:
+            data = json.load(map_file)
+
+        layers = []
+        pending = list(data['layers'])
+        while pending:
+            layer = pending.pop(0)
+            if layer['type'] == 'group':
+                pending[:0] = layer.get('layers', [])
+            elif layer['type'] == 'tilelayer':
+                layers.append({'type': 'tilelayer', 'data': self._json_layer_data(layer)})
+            elif layer['type'] == 'objectgroup':
+                layers.append({'type': 'objectgroup', 'objects': [
+                    dict(obj, type=obj.get('class') or obj.get('type'),
+                         properties=self._json_properties(obj.get('properties')))
+                    for obj in layer.get('objects', [])
+                ]})
+
+        tilesets = []
+        for tileset in data.get('tilesets', []):
+            tilesets.append(self._json_tileset(tileset))
+
+        return {'width': data['width'], 'height': data['height'], 'tilewidth': data['tilewidth'],
+                'infinite': data.get('infinite', False), 'layers': layers, 'tilesets': tilesets}
+
+    def _json_tileset(self, tileset):
+        if 'source' in tileset:
+            return tileset
+        return {
+            'firstgid': tileset.get('firstgid', 1),
+            'properties': self._json_properties(tileset.get('properties')),
+            'tiles': [{'id': tile['id'],
+                       'type': tile.get('class') or tile.get('type'),
+                       'properties': self._json_properties(tile.get('properties'))}
+                      for tile in tileset.get('tiles', [])]
+        }
+
+    def _json_layer_data(self, layer):
+        data = layer.get('data', [])
+        if layer.get('encoding') == 'base64':
+            return self._decode_base64(data, layer.get('compression', ''))
+        return data
+
+    # XML format
+
+    def _tmx_properties(self, element):
+        properties = {}
+        container = element.find('properties')
+        if container is not None:
+            for prop in container.findall('property'):
+                value = prop.get('value')
+                if value is None:
+                    value = prop.text or ''
+                properties[prop.get('name')] = _parse_value(value, prop.get('type', 'string'))
+        return properties
+
+    def _tmx_tileset(self, element):
+        return {
+            'firstgid': int(element.get('firstgid', 1)),
+            'properties': self._tmx_properties(element),
+            'tiles': [{'id': int(tile.get('id')),
+                       'type': tile.get('class') or tile.get('type'),
+                       'properties': self._tmx_properties(tile)}
+                      for tile in element.findall('tile')]
+        }
+
+    def _read_tmx(self, path):
+        """Read a .tmx map into the common layout"""
+        root = ET.parse(path).getroot()
+
+        tilesets = []
+        for element in root.findall('tileset'):
+            if element.get('source'):
+                tilesets.append({'firstgid': int(element.get('firstgid')),
+                                 'source': element.get('source')})
+            else:
+                tilesets.append(self._tmx_tileset(element))
+
+        # Only top-level layers and the contents of groups, not object groups inside tilesets
+        layers = []
+        pending = list(root)
+        while pending:
+            element = pending.pop(0)
+            if element.tag == 'group':
+                pending[:0] = list(element)
+            elif element.tag == 'layer':
+                layers.append({'type': 'tilelayer', 'data': self._tmx_layer_data(element.find('data'))})
+            elif element.tag == 'objectgroup':
+                objects = []
+                for obj in element.findall('object'):
+                    objects.append({
+                        'type': obj.get('class') or obj.get('type'),
+                        'x': float(obj.get('x', 0)),
+                        'y': float(obj.get('y', 0)),
+                        'height': float(obj.get('height', 0)),
+                        'gid': int(obj.get('gid', 0)),
+                        'properties': self._tmx_properties(obj)
+                    })
+                layers.append({'type': 'objectgroup', 'objects': objects})
+
+        return {'width': int(root.get('width')), 'height': int(root.get('height')),
+                'tilewidth': int(root.get('tilewidth')),
+                'infinite': root.get('infinite') == '1', 'layers': layers, 'tilesets': tilesets}
+
+    def _tmx_layer_data(self, data):
+        encoding = data.get('encoding')
+        if encoding == 'csv':
+            return [int(value) for value in data.text.replace('\n', '').split(',') if value.strip()]
+        if encoding == 'base64':
+            return self._decode_base64(data.text.strip(), data.get('compression', ''))
+        return [int(tile.get('gid', 0)) for tile in data.findall('tile')]
+
+    def _decode_base64(self, text, compression):
+        raw = base64.b64decode(text)
+        if compression == 'zlib':
+            raw = zlib.decompress(raw)
+        elif compression == 'gzip':
+            raw = gzip.decompress(raw)
+        elif compression:
+            raise ValueError(f"Unsupported Tiled layer compression: {compression}")
+        gids = array('I')
+        gids.frombytes(raw)
+        if sys.byteorder == 'big':  # Tiled writes little-endian gids
+            gids.byteswap()
+        return list(gids)
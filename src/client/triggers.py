@@ -0,0 +1,53 @@
+from enum import Enum, auto
+
+class TriggerType(Enum):
+    PORTAL = auto()  # Payload is a Portal
+    NPC = auto()     # Payload is an NPC the player can talk to
+    AREA = auto()    # Payload is free-form data for scripted areas
+
+class Trigger:
+    def __init__(self, trigger_type, payload=None):
+        self.trigger_type = trigger_type
+        self.payload = payload
+        self.tiles = []  # Tile coordinates this trigger covers, set by TriggerGrid
+
+class TriggerGrid:
+    """Per-tile index of the triggers placed on a map"""
+    def __init__(self):
+        self.cells = {}  # Dictionary of {(tile_x, tile_y): [Trigger]}
+        self.version = 0  # Bumped on every change so cached queries can be dropped
+
+    def add(self, trigger, tiles):
+        """Place a trigger on the given tile coordinates"""
+        trigger.tiles = list(tiles)
+        for tile in trigger.tiles:
+            self.cells.setdefault(tile, []).append(trigger)
+        self.version += 1
+        return trigger
+
+    def add_rect(self, trigger, tile_x, tile_y, width=1, height=1):
+        """Place a trigger on a rectangle of tiles"""
+        return self.add(trigger, [(x, y)
+                                  for y in range(tile_y, tile_y + height)
+                                  for x in range(tile_x, tile_x + width)])
+
+    def remove(self, trigger):
+        """Remove a trigger from every tile it covers"""
+        for tile in trigger.tiles:
+            cell = self.cells.get(tile)
+            if cell and trigger in cell:
+                cell.remove(trigger)
+                if not cell:
+                    del self.cells[tile]
+        trigger.tiles = []
+        self.version += 1
+
+    def query(self, start_x, start_y, end_x, end_y):
+        """Get the unique triggers on an inclusive rectangle of tiles, in placement order"""
+        found = []
+        for y in range(start_y, end_y + 1):
+            for x in range(start_x, end_x + 1):
+                for trigger in self.cells.get((x, y), ()):
+                    if trigger not in found:
+                        found.append(trigger)
+        return tuple(found)
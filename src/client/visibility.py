@@ -0,0 +1,123 @@
+import pygame
+import numpy as np
+from ..common.fov import compute_fov
+
+class FieldOfView:
+    """Cached field of view of the player on one map, with a per-chunk fog-of-war overlay"""
+    UNSEEN_COLOR = (0, 0, 0, 255)
+    EXPLORED_COLOR = (0, 0, 0, 160)  # Remembered tiles stay dimmed
+    VISIBLE_COLOR = (0, 0, 0, 0)
+
+    def __init__(self, game_map, radius=12):
+        self.game_map = game_map
+        self.radius = radius  # Sight radius in tiles
+        self.visible = set()
+        self.explored = set()
+        self._cache_key = None  # (tile_x, tile_y, map version) the visible set was computed for
+        self.fog_chunks = {}  # Dictionary of {(chunk_x, chunk_y): Surface}
+        self.pending = set()  # Tiles whose fog changed since the overlay was last drawn
+        self.explore_listeners = []  # Callbacks given the set of tiles seen for the first time
+        self.visible_mask = None  # NumPy copy of the visible set for batch queries
+        self._mask_tiles = None  # (xs, ys, cache key) of the tiles currently set in visible_mask
+
+    def update(self, x, y):
+        """Recompute the visible tiles around a pixel position, returning True if they changed"""
+        tile_x = int(x // self.game_map.tile_size)
+        tile_y = int(y // self.game_map.tile_size)
+        cache_key = (tile_x, tile_y, self.game_map.version)
+        if cache_key == self._cache_key:
+            return False
+        self._cache_key = cache_key
+
+        visible = compute_fov(tile_x, tile_y, self.radius, self.game_map.is_opaque_tile)
+        self.pending |= visible ^ self.visible
+        discovered = visible - self.explored
+        self.explored |= discovered
+        self.visible = visible
+        if discovered:
+            for listener in self.explore_listeners:
+                listener(discovered)
+        return True
+
+    def is_visible(self, tile_x, tile_y):
+        """Check whether a tile is currently in view"""
+        return (tile_x, tile_y) in self.visible
+
+    def get_visible_mask(self):
+        """Get the visible tiles as a (height, width) boolean NumPy array"""
+        if self.visible_mask is None:
+            self.visible_mask = np.zeros((self.game_map.height, self.game_map.width), dtype=bool)
+        if self._mask_tiles is not None:
+            if self._mask_tiles[2] == self._cache_key:
+                return self.visible_mask
+            self.visible_mask[self._mask_tiles[1], self._mask_tiles[0]] = False
+
+        # Clear the previous view and set the new one rather than rebuilding the whole array
+        tiles = np.array([tile for tile in self.visible
+                          if 0 <= tile[0] < self.game_map.width and 0 <= tile[1] < self.game_map.height],
+                         dtype=np.intp).reshape(-1, 2)
+        self.visible_mask[tiles[:, 1], tiles[:, 0]] = True
+        self._mask_tiles = (tiles[:, 0], tiles[:, 1], self._cache_key)
+        return self.visible_mask
+
+    def can_see(self, x, y):
+        """Check whether a pixel position is currently in view"""
+        return (int(x // self.game_map.tile_size), int(y // self.game_map.tile_size)) in self.visible
+
+    def _fog_color(self, tile):
+        """Get the overlay colour of a tile"""
+        if tile in self.visible:
+            return self.VISIBLE_COLOR
+        if tile in self.explored:
+            return self.EXPLORED_COLOR
+        return self.UNSEEN_COLOR
+
+    def _build_fog_chunk(self, chunk_x, chunk_y):
+        """Paint the overlay of a whole chunk"""
+        tile_size = self.game_map.tile_size
+        chunk_size = self.game_map.chunk_size
+        surface = pygame.Surface((chunk_size * tile_size, chunk_size * tile_size), pygame.SRCALPHA)
+        surface.fill(self.UNSEEN_COLOR)
+
+        # Only tiles that were ever seen differ from the unseen fill
+        start_x = chunk_x * chunk_size
+        start_y = chunk_y * chunk_size
+        for tile_y in range(start_y, start_y + chunk_size):
+            for tile_x in range(start_x, start_x + chunk_size):
+                if (tile_x, tile_y) in self.explored:
+                    surface.fill(self._fog_color((tile_x, tile_y)),
+                                 ((tile_x - start_x) * tile_size, (tile_y - start_y) * tile_size,
+                                  tile_size, tile_size))
+        return surface
+
+    def _apply_pending(self):
+        """Repaint the changed tiles of chunks that already have an overlay"""
+        tile_size = self.game_map.tile_size
+        chunk_size = self.game_map.chunk_size
+        for tile_x, tile_y in self.pending:
+            surface = self.fog_chunks.get((tile_x // chunk_size, tile_y // chunk_size))
+            if surface:
+                surface.fill(self._fog_color((tile_x, tile_y)),
+                             ((tile_x % chunk_size) * tile_size, (tile_y % chunk_size) * tile_size,
+                              tile_size, tile_size))
+        self.pending.clear()
+
+    def draw(self, screen, camera_x=0, camera_y=0):
+        """Draw the fog overlay over the visible chunks"""
+        self._apply_pending()
+
+        chunk_pixels = self.game_map.chunk_size * self.game_map.tile_size
+        chunks_x = (self.game_map.width + self.game_map.chunk_size - 1) // self.game_map.chunk_size
+        chunks_y = (self.game_map.height + self.game_map.chunk_size - 1) // self.game_map.chunk_size
+        start_x = max(0, camera_x // chunk_pixels)
+        end_x = min(chunks_x, (camera_x + screen.get_width()) // chunk_pixels + 1)
+        start_y = max(0, camera_y // chunk_pixels)
+        end_y = min(chunks_y, (camera_y + screen.get_height()) // chunk_pixels + 1)
+
+        for chunk_y in range(start_y, end_y):
+            for chunk_x in range(start_x, end_x):
+                surface = self.fog_chunks.get((chunk_x, chunk_y))
+                if surface is None:
+                    surface = self._build_fog_chunk(chunk_x, chunk_y)
+                    self.fog_chunks[(chunk_x, chunk_y)] = surface
+                screen.blit(surface, (chunk_x * chunk_pixels - camera_x, chunk_y * chunk_pixels - camera_y))
@@ -0,0 +1,62 @@
+LOD_FULL = 'full'
+LOD_REDUCED = 'reduced'
+LOD_DORMANT = 'dormant'
+
+class AIScheduler:
+    """Picks how often each entity thinks from its distance to the nearest player, spreading the work over frames"""
+    def __init__(self, full_range=450, reduced_range=1200, reduced_interval=4):
+        self.full_range = full_range  # Pixels within which entities think every frame
+        self.reduced_range = reduced_range  # Pixels within which they think every reduced_interval frames
+        self.reduced_interval = reduced_interval
+        self.frame = 0
+        self.phases = {}  # Dictionary of {entity: frame offset}, handed out round robin
+        self.next_phase = 0
+        self.pending_dt = {}  # Dictionary of {entity: seconds since it last thought}
+        self.counts = {LOD_FULL: 0, LOD_REDUCED: 0, LOD_DORMANT: 0}  # Entities per level this tick
+
+    def begin_tick(self):
+        """Start a new frame of scheduling"""
+        self.frame += 1
+        for level in self.counts:
+            self.counts[level] = 0
+
+    def get_level(self, x, y, targets, awake=False):
+        """Get the level of detail for a position given the (x, y) of every player"""
+        if awake or not targets:
+            return LOD_FULL
+        distance_squared = min((target_x - x) ** 2 + (target_y - y) ** 2 for target_x, target_y in targets)
+        if distance_squared <= self.full_range * self.full_range:
+            return LOD_FULL
+        if distance_squared <= self.reduced_range * self.reduced_range:
+            return LOD_REDUCED
+        return LOD_DORMANT
+
+    def schedule(self, entity, dt, x, y, targets, awake=False):
+        """Get (level, think_dt): think_dt is the time to think over this frame, or None to skip thinking"""
+        level = self.get_level(x, y, targets, awake)
+        self.counts[level] += 1
+        if level == LOD_DORMANT:
+            # Dormant entities only tick their timers and owe no thinking time on waking
+            self.pending_dt.pop(entity, None)
+            return level, None
+
+        think_dt = self.pending_dt.pop(entity, 0) + dt
+        if level == LOD_REDUCED:
+            phase = self.phases.get(entity)
+            if phase is None:
+                phase = self.phases[entity] = self.next_phase
+                self.next_phase = (self.next_phase + 1) % self.reduced_interval
+            if (self.frame + phase) % self.reduced_interval:
+                self.pending_dt[entity] = think_dt
+                return level, None
+        return level, think_dt
+
+    def forget(self, entity):
+        """Drop an entity's schedule"""
+        self.phases.pop(entity, None)
+        self.pending_dt.pop(entity, None)
+
+    def clear(self):
+        """Drop every schedule"""
+        self.phases.clear()
+        self.pending_dt.clear()
@@ -0,0 +1,79 @@
+import math
+
+SKIN = 1e-3  # Gap in pixels left between a box and the wall it stops against
+
+def overlapped_tiles(x, y, width, height, tile_size):
+    """Get the inclusive range of tiles a box overlaps; a box only touching a tile's edge does not overlap it"""
+    return (int(x // tile_size), int(y // tile_size),
+            int(math.ceil((x + width) / tile_size)) - 1, int(math.ceil((y + height) / tile_size)) - 1)
+
+def box_is_clear(x, y, width, height, is_walkable, tile_size):
+    """Check that every tile a box overlaps is walkable"""
+    start_x, start_y, end_x, end_y = overlapped_tiles(x, y, width, height, tile_size)
+    for tile_y in range(start_y, end_y + 1):
+        for tile_x in range(start_x, end_x + 1):
+            if not is_walkable(tile_x, tile_y):
+                return False
+    return True
+
+def sweep_box(x, y, width, height, dx, dy, is_walkable, tile_size):
+    """Get the fraction (0 to 1) of a move a box makes before it touches an unwalkable tile"""
+    if not dx and not dy:
+        return 1.0
+    # Tiles the box already overlaps never block it, so anything pushed into a wall can walk out
+    start_x, start_y, end_x, end_y = overlapped_tiles(x, y, width, height, tile_size)
+    region = overlapped_tiles(min(x, x + dx), min(y, y + dy), width + abs(dx), height + abs(dy), tile_size)
+
+    # Sweep the box centre against each tile grown by half the box (open intervals, so sliding
+    # along a wall the box only touches is free)
+    centre_x = x + width / 2
+    centre_y = y + height / 2
+    first = 1.0
+    for tile_y in range(region[1], region[3] + 1):
+        for tile_x in range(region[0], region[2] + 1):
+            if start_x <= tile_x <= end_x and start_y <= tile_y <= end_y:
+                continue
+            if is_walkable(tile_x, tile_y):
+                continue
+            entry = _entry_fraction(centre_x, centre_y, dx, dy,
+                                    tile_x * tile_size - width / 2, tile_y * tile_size - height / 2,
+                                    (tile_x + 1) * tile_size + width / 2, (tile_y + 1) * tile_size + height / 2)
+            if entry is not None and entry < first:
+                first = entry
+    return first
+
+def move_and_slide(x, y, width, height, dx, dy, is_walkable, tile_size):
+    """Move a box one axis at a time so it slides along walls, returning (x, y, blocked_x, blocked_y)"""
+    blocked_x = blocked_y = False
+    if dx:
+        fraction = sweep_box(x, y, width, height, dx, 0, is_walkable, tile_size)
+        if fraction < 1.0:
+            blocked_x = True
+            dx = dx * fraction - math.copysign(SKIN, dx) if dx * fraction else 0
+        x += dx
+    if dy:
+        fraction = sweep_box(x, y, width, height, 0, dy, is_walkable, tile_size)
+        if fraction < 1.0:
+            blocked_y = True
+            dy = dy * fraction - math.copysign(SKIN, dy) if dy * fraction else 0
+        y += dy
+    return x, y, blocked_x, blocked_y
+
+def _entry_fraction(origin_x, origin_y, dx, dy, left, top, right, bottom):
+    """Get the fraction of a move where a point enters the inside of a box, or None if it never does"""
+    t_enter = 0.0
+    t_exit = 1.0
+    for origin, delta, low, high in ((origin_x, dx, left, right), (origin_y, dy, top, bottom)):
+        if delta == 0:
+            if origin <= low or origin >= high:
+                return None
+            continue
+        t_low = (low - origin) / delta
+        t_high = (high - origin) / delta
+        if t_low > t_high:
+            t_low, t_high = t_high, t_low
+        t_enter = max(t_enter, t_low)
+        t_exit = min(t_exit, t_high)
+        if t_enter >= t_exit:
+            return None
+    return t_enter
@@ -6,13 +6,23 @@ SERVER_PORT = 8765
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 60
+SIMULATION_RATE = 60  # Fixed simulation steps per second, whatever the display rate
+MAX_SIMULATION_STEPS = 5  # Steps run per rendered frame at most; time beyond that is dropped
 
 # Player settings
 PLAYER_SPEED = 5
 PLAYER_SIZE = 32
+HITBOX_SIZE = 24  # Square footprint, centred in the sprite, that actors collide with walls by
 
 # Map settings
 TILE_SIZE = 32  # Size of each tile in pixels
+CHUNK_SIZE = 16  # Size of each map chunk in tiles
+
+# Enemy settings
+BATCH_ENEMY_AI = False  # Simulate enemies in NumPy batches through EnemyManager
+AI_FULL_RANGE = 450  # Pixels from a player within which enemies think every frame
+AI_REDUCED_RANGE = 1200  # Pixels within which they think every AI_REDUCED_INTERVAL frames; beyond, only timers tick
+AI_REDUCED_INTERVAL = 4
 
 # Combat settings
 ATTACK_RANGE = 60
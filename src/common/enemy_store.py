@@ -0,0 +1,431 @@
+import math
+import random
+import numpy as np
+from .line_of_sight import batch_tile_line_of_sight
+
+SKIN = 1e-3  # Gap left against walls, as in collision.SKIN
+
+def compile_behaviour(table):
+    """Number the states of a behaviour table (see client.enemy_behaviour) for EnemyStore.update"""
+    names = list(table["states"])
+    states = []
+    for name in names:
+        state_table = table["states"][name]
+        states.append({
+            'action': state_table.get("action"),
+            'enter': state_table.get("enter"),
+            'think_interval': state_table.get("think_interval", 0),
+            'transitions': [(guard, names.index(target)) for guard, target in state_table.get("transitions", ())],
+        })
+    return {'initial': names.index(table["initial"]), 'states': states}
+
+class EnemyStore:
+    """Structure-of-arrays enemy state, simulated for every enemy at once with NumPy"""
+    # Field name -> dtype of the per-enemy arrays
+    FIELDS = {
+        'x': np.float64,
+        'y': np.float64,
+        'speed': np.float64,
+        'attack_range': np.float64,
+        'aggro_range': np.float64,
+        'health': np.float64,
+        'max_health': np.float64,
+        'flee_health': np.float64,
+        'attack_timer': np.float64,
+        'hit_timer': np.float64,
+        'aggro_timer': np.float64,
+        'aggro_duration': np.float64,
+        'knockback_distance': np.float64,
+        'knockback_x': np.float64,
+        'knockback_y': np.float64,
+        'last_seen_x': np.float64,
+        'last_seen_y': np.float64,
+        'animation_timer': np.float64,
+        'animation_speed': np.float64,
+        'animation_frame': np.int32,
+        'frame_count': np.int32,
+        'behaviour': np.int32,  # Index into the compiled behaviours given to update
+        'state': np.int32,  # Index of the state in its behaviour table
+        'state_time': np.float64,
+        'think_timer': np.float64,
+        'home_x': np.float64,
+        'home_y': np.float64,
+        'patrol_x': np.float64,
+        'patrol_y': np.float64,
+        'patrol_radius': np.float64,
+        'patrol_speed': np.float64,
+        'patrol_time': np.float64,
+        'idle_time': np.float64,
+        'stuck_timer': np.float64,
+        'stuck_cooldown': np.float64,
+        'last_x': np.float64,
+        'last_y': np.float64,
+        'alive': np.bool_,
+        'aggroed': np.bool_,
+        'has_last_seen': np.bool_,
+        'has_patrol': np.bool_,
+        'facing_left': np.bool_,
+        'is_hit': np.bool_,
+        'moved': np.bool_,
+    }
+
+    # Tuning copied from the object path, which this must match
+    KNOCKBACK_SPEED = 10  # Pixels per second, as in Enemy.update
+    ARRIVE_RADIUS = 8  # Pixels, as enemy_behaviour.HOME_RADIUS
+    FLEE_DISTANCE = 100  # Pixels ahead of a fleeing enemy it runs for, as in enemy_behaviour
+    STUCK_THRESHOLD = 0.5  # Seconds, as Enemy.stuck_threshold
+    STUCK_COOLDOWN = 1.0  # Seconds between unsticking attempts, as in Enemy._move_toward
+
+    def __init__(self, capacity=256, size=32, hitbox=None):
+        self.capacity = capacity
+        self.count = 0
+        self.size = size  # Width and height of an enemy in pixels
+        self.hitbox = hitbox or size  # Centred square footprint that collides with walls
+        self.grid_origin = (0, 0)  # Tile coordinate of the walkable grid's top-left corner, set by update
+        self.arrays = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.FIELDS.items()}
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        """Double the capacity of every array"""
+        self.capacity *= 2
+        for name, array in self.arrays.items():
+            grown = np.zeros(self.capacity, dtype=array.dtype)
+            grown[:len(array)] = array
+            self.arrays[name] = grown
+
+    def add(self, **values):
+        """Append an enemy, returning its slot; fields not given start at zero"""
+        if self.count == self.capacity:
+            self._grow()
+        index = self.count
+        self.count += 1
+        for name, array in self.arrays.items():
+            array[index] = values.get(name, 0)
+        return index
+
+    def remove(self, index):
+        """Remove a slot by moving the last enemy into it, returning the slot that moved (or None)"""
+        last = self.count - 1
+        self.count = last
+        if index == last:
+            return None
+        for array in self.arrays.values():
+            array[index] = array[last]
+        return last
+
+    def clear(self):
+        """Remove every enemy"""
+        self.count = 0
+
+    @staticmethod
+    def _sample(grid, tile_x, tile_y):
+        """Sample a (height, width) boolean tile grid at tile coordinates; outside the grid is False"""
+        height, width = grid.shape
+        inside = (tile_x >= 0) & (tile_x < width) & (tile_y >= 0) & (tile_y < height)
+        result = np.zeros(tile_x.shape, dtype=bool)
+        result[inside] = grid[tile_y[inside], tile_x[inside]]
+        return result
+
+    def _walkable(self, walkable, tile_x, tile_y):
+        """Sample the walkable grid at tile coordinates of the map; outside the grid is False"""
+        return self._sample(walkable, tile_x - self.grid_origin[0], tile_y - self.grid_origin[1])
+
+    def _lookup(self, grid, x, y, tile_size):
+        """Sample a (height, width) boolean tile grid at pixel positions; outside the grid is False"""
+        return self._sample(grid, np.floor(x / tile_size).astype(np.intp), np.floor(y / tile_size).astype(np.intp))
+
+    def _sweep_axis(self, position, other, delta, walkable, tile_size, vertical):
+        """Clip one axis of a move of hitboxes at the first unwalkable tile, as collision.move_and_slide
+        does, returning (delta, blocked). Moves must be shorter than a tile"""
+        hitbox = self.hitbox
+        start = np.floor(position / tile_size).astype(np.intp)
+        end = np.ceil((position + hitbox) / tile_size).astype(np.intp) - 1
+        row_start = np.floor(other / tile_size).astype(np.intp)
+        row_end = np.ceil((other + hitbox) / tile_size).astype(np.intp) - 1
+
+        # The one tile line a move can newly enter, and how far along the move the box touches it
+        forward = delta > 0
+        line = np.where(forward, end + 1, start - 1)
+        reached = np.where(forward,
+                           np.ceil((position + hitbox + delta) / tile_size).astype(np.intp) - 1 >= line,
+                           np.floor((position + delta) / tile_size).astype(np.intp) <= line)
+        edge = np.where(forward, line * tile_size - hitbox / 2, (line + 1) * tile_size + hitbox / 2)
+        fraction = np.maximum((edge - (position + hitbox / 2)) / np.where(delta != 0, delta, 1), 0.0)
+
+        if vertical:
+            wall = ~self._walkable(walkable, row_start, line) | ~self._walkable(walkable, row_end, line)
+        else:
+            wall = ~self._walkable(walkable, line, row_start) | ~self._walkable(walkable, line, row_end)
+        blocked = (delta != 0) & reached & wall & (fraction < 1.0)
+        clipped = delta * fraction
+        clipped = np.where(clipped != 0, clipped - np.copysign(SKIN, delta), 0.0)
+        return np.where(blocked, clipped, delta), blocked
+
+    def _slide(self, x, y, dx, dy, walkable, tile_size):
+        """Move hitboxes one axis at a time so they slide along walls, returning (x, y, blocked_x, blocked_y)"""
+        inset = (self.size - self.hitbox) / 2
+        box_x = x + inset
+        box_y = y + inset
+        dx, blocked_x = self._sweep_axis(box_x, box_y, dx, walkable, tile_size, False)
+        box_x = box_x + dx
+        dy, blocked_y = self._sweep_axis(box_y, box_x, dy, walkable, tile_size, True)
+        box_y = box_y + dy
+        return box_x - inset, box_y - inset, blocked_x, blocked_y
+
+    def _guards(self, a, distance, sees):
+        """Evaluate every transition guard of enemy_behaviour for every enemy"""
+        return {
+            'sees_player': sees,
+            'was_hit': a['is_hit'],
+            'idle_expired': a['state_time'] >= a['idle_time'],
+            'reached_patrol_point': (~a['has_patrol'] | (a['state_time'] >= a['patrol_time']) |
+                                     (np.hypot(a['patrol_x'] - a['x'], a['patrol_y'] - a['y']) <= self.ARRIVE_RADIUS)),
+            'low_health': a['health'] <= a['max_health'] * a['flee_health'],
+            'in_attack_range': distance <= a['attack_range'],
+            'out_of_attack_range': distance > a['attack_range'],
+            'out_of_aggro_range': distance >= a['aggro_range'],
+            'lost_player': ~a['aggroed'],
+            'at_home': np.hypot(a['home_x'] - a['x'], a['home_y'] - a['y']) <= self.ARRIVE_RADIUS,
+        }
+
+    def _pick_patrol_point(self, a, slot, walkable, tile_size):
+        """Choose a random walkable point near home, drawing from the shared generator like the object path"""
+        angle = random.uniform(0, math.pi * 2)
+        distance = random.uniform(0, a['patrol_radius'][slot])
+        x = a['home_x'][slot] + math.cos(angle) * distance
+        y = a['home_y'][slot] + math.sin(angle) * distance
+        tile_x = int((x + self.size/2) // tile_size) - self.grid_origin[0]
+        tile_y = int((y + self.size/2) // tile_size) - self.grid_origin[1]
+        height, width = walkable.shape
+        a['has_patrol'][slot] = 0 <= tile_x < width and 0 <= tile_y < height and walkable[tile_y, tile_x]
+        a['patrol_x'][slot] = x
+        a['patrol_y'][slot] = y
+
+    def update(self, dt, target_x, target_y, walkable, tile_size, visible=None, flow_field=None, opaque=None,
+               behaviours=(), on_attack=None, grid_origin=(0, 0)):
+        """Advance timers, knockback, behaviour states and movement of every enemy, returning the slots that attacked"""
+        # walkable, visible and opaque are (height, width) boolean tile grids; walkable and opaque
+        # start at the grid_origin tile, visible covers the whole map. Line of sight
+        # comes from visible, else from tracing each enemy's tile centre to the target's
+        # through opaque, else is assumed. behaviours holds the compile_behaviour tables the
+        # 'behaviour' field indexes. A FlowField toward the target steers chasing enemies inside
+        # it whose goal is the target's tile; the rest head straight for their goal (the target,
+        # or where it was last seen), as no paths are planned.
+        # on_attack(slot) is called for each attacking enemy, in slot order with the random
+        # patrol picks, so the shared generator is drawn from in the same order as enemies
+        # updated one by one
+        n = self.count
+        if n == 0:
+            return np.zeros(0, dtype=np.intp)
+        a = {name: array[:n] for name, array in self.arrays.items()}
+        half = self.size / 2
+        alive = a['alive']
+        self.grid_origin = grid_origin
+
+        # Timers
+        counting = alive & (a['attack_timer'] > 0)
+        a['attack_timer'][counting] -= dt
+        hit = alive & (a['hit_timer'] > 0)
+        a['hit_timer'][hit] -= dt
+        a['is_hit'][hit & (a['hit_timer'] <= 0)] = False
+
+        # Knockback replaces the behaviour while it lasts, and stops at walls
+        knocked = alive & (a['knockback_distance'] > 0)
+        step = np.where(knocked, np.minimum(a['knockback_distance'], self.KNOCKBACK_SPEED * dt), 0.0)
+        new_x, new_y, blocked_x, blocked_y = self._slide(a['x'], a['y'], a['knockback_x'] * step,
+                                                         a['knockback_y'] * step, walkable, tile_size)
+        a['x'][knocked] = new_x[knocked]
+        a['y'][knocked] = new_y[knocked]
+        a['knockback_distance'][knocked & (blocked_x | blocked_y)] = 0
+        a['knockback_distance'][knocked] -= step[knocked]
+
+        active = alive & ~knocked
+        dx = target_x - a['x']
+        dy = target_y - a['y']
+        distance = np.sqrt(dx * dx + dy * dy)
+        if visible is not None:
+            in_sight = self._lookup(visible, a['x'] + half, a['y'] + half, tile_size)
+        elif opaque is not None:
+            offset_x = grid_origin[0] * tile_size
+            offset_y = grid_origin[1] * tile_size
+            in_sight = batch_tile_line_of_sight(a['x'] + half - offset_x, a['y'] + half - offset_y,
+                                                target_x + half - offset_x, target_y + half - offset_y,
+                                                opaque, tile_size)
+        else:
+            in_sight = np.ones(n, dtype=bool)
+        sees = in_sight & (distance < a['aggro_range'])
+
+        # Behaviour states: check transitions when it is time to think
+        a['state_time'][active] += dt
+        a['think_timer'][active] -= dt
+        thinking = active & (a['think_timer'] <= 0)
+        guards = self._guards(a, distance, sees)
+        next_state = a['state'].copy()
+        entered = np.zeros(n, dtype=bool)
+        for index, behaviour in enumerate(behaviours):
+            uses = thinking & (a['behaviour'] == index)
+            for state_index, state in enumerate(behaviour['states']):
+                pending = uses & (a['state'] == state_index)
+                if not pending.any():
+                    continue
+                a['think_timer'][pending] = state['think_interval']
+                for guard, target in state['transitions']:
+                    fire = pending & guards[guard]
+                    next_state[fire] = target
+                    entered |= fire
+                    pending &= ~fire
+        a['state'][:] = next_state
+        a['state_time'][entered] = 0
+
+        # Enter actions, and the masks of the enemies running each action
+        picking = np.zeros(n, dtype=bool)
+        actions = {name: np.zeros(n, dtype=bool) for name in ('chase', 'attack', 'flee', 'patrol', 'return_home')}
+        for index, behaviour in enumerate(behaviours):
+            uses = active & (a['behaviour'] == index)
+            for state_index, state in enumerate(behaviour['states']):
+                in_state = uses & (a['state'] == state_index)
+                entering = in_state & entered
+                a['think_timer'][entering] = state['think_interval']
+                if state['enter'] == 'aggro':
+                    # Being hit gives the target away even out of sight
+                    a['aggroed'] |= entering
+                    a['aggro_timer'][entering] = a['aggro_duration'][entering]
+                    a['last_seen_x'][entering] = target_x
+                    a['last_seen_y'][entering] = target_y
+                    a['has_last_seen'] |= entering
+                elif state['enter'] == 'calm':
+                    a['aggroed'][entering] = False
+                    a['has_last_seen'][entering] = False
+                elif state['enter'] == 'pick_patrol_point':
+                    picking |= entering
+                if state['action']:
+                    actions[state['action']] |= in_state
+
+        # Chasing and attacking keep aggro while the target is seen, and forget it once it runs out
+        refreshing = actions['chase'] | actions['attack']
+        seen = refreshing & sees
+        a['aggroed'] |= seen
+        a['aggro_timer'][seen] = a['aggro_duration'][seen]
+        a['last_seen_x'][seen] = target_x
+        a['last_seen_y'][seen] = target_y
+        a['has_last_seen'] |= seen
+        losing = refreshing & ~sees & a['aggroed']
+        a['aggro_timer'][losing] -= dt
+        expired = losing & (a['aggro_timer'] <= 0)
+        a['aggroed'][expired] = False
+        a['has_last_seen'][expired] = False
+
+        # Patrol picks and attacks both draw random numbers, so run them in slot order
+        attacking = (actions['attack'] & (a['attack_timer'] <= 0) & (distance <= a['attack_range']) & in_sight)
+        for slot in np.flatnonzero(picking | attacking):
+            if picking[slot]:
+                self._pick_patrol_point(a, slot, walkable, tile_size)
+            elif on_attack is not None:
+                on_attack(slot)
+
+        # Goals and facing of every action that moves
+        chasing = actions['chase'] & a['aggroed']
+        a['facing_left'][chasing | actions['attack']] = (target_x < a['x'])[chasing | actions['attack']]
+        moving = chasing & (distance > a['attack_range'])
+        goal_x = np.where(in_sight, target_x, a['last_seen_x'])
+        goal_y = np.where(in_sight, target_y, a['last_seen_y'])
+        speed_scale = np.ones(n)
+        if flow_field is not None and flow_field.target is not None:
+            tile_x = np.floor((a['x'] + half) / tile_size).astype(np.intp)
+            tile_y = np.floor((a['y'] + half) / tile_size).astype(np.intp)
+            step_x, step_y, flowing = flow_field.lookup_steps(tile_x, tile_y)
+            # The field only leads to the target's tile, not to where an unseen target was last seen
+            flowing &= ((np.floor((goal_x + half) / tile_size) == flow_field.target[0]) &
+                        (np.floor((goal_y + half) / tile_size) == flow_field.target[1]))
+            goal_x = np.where(flowing, (tile_x + step_x) * tile_size + tile_size/2 - half, goal_x)
+            goal_y = np.where(flowing, (tile_y + step_y) * tile_size + tile_size/2 - half, goal_y)
+
+        fleeing = actions['flee']
+        a['facing_left'][fleeing] = (target_x > a['x'])[fleeing]
+        away_x = a['x'] - target_x
+        away_y = a['y'] - target_y
+        away = np.sqrt(away_x * away_x + away_y * away_y)
+        away = np.where(away != 0, away, 1)
+        goal_x = np.where(fleeing, a['x'] + away_x / away * self.FLEE_DISTANCE, goal_x)
+        goal_y = np.where(fleeing, a['y'] + away_y / away * self.FLEE_DISTANCE, goal_y)
+        moving |= fleeing
+
+        patrolling = actions['patrol'] & a['has_patrol']
+        a['facing_left'][patrolling] = (a['patrol_x'] < a['x'])[patrolling]
+        goal_x = np.where(patrolling, a['patrol_x'], goal_x)
+        goal_y = np.where(patrolling, a['patrol_y'], goal_y)
+        returning = actions['return_home']
+        a['facing_left'][returning] = (a['home_x'] < a['x'])[returning]
+        goal_x = np.where(returning, a['home_x'], goal_x)
+        goal_y = np.where(returning, a['home_y'], goal_y)
+        wandering = patrolling | returning
+        speed_scale[wandering] = a['patrol_speed'][wandering]
+        moving |= wandering
+
+        self._move_toward(a, moving, goal_x, goal_y, speed_scale, dt, walkable, tile_size)
+        return np.flatnonzero(attacking)
+
+    def _move_toward(self, a, moving, goal_x, goal_y, speed_scale, dt, walkable, tile_size):
+        """Step enemies toward their goals as Enemy._move_toward does, trying alternative directions
+        when the direct one is blocked and backing off walls when stuck"""
+        n = len(moving)
+        goal_dx = goal_x - a['x']
+        goal_dy = goal_y - a['y']
+        length = np.sqrt(goal_dx * goal_dx + goal_dy * goal_dy)
+        moving = moving & (length > 0)
+        safe_length = np.where(moving, length, 1)
+        goal_dx = goal_dx / safe_length
+        goal_dy = goal_dy / safe_length
+
+        # Stuck when the enemy has not moved a pixel from where it last made progress
+        still = moving & (np.abs(a['x'] - a['last_x']) < 1) & (np.abs(a['y'] - a['last_y']) < 1)
+        a['stuck_timer'][still] += dt
+        progressed = moving & ~still
+        a['stuck_timer'][progressed] = 0
+        a['last_x'][progressed] = a['x'][progressed]
+        a['last_y'][progressed] = a['y'][progressed]
+        unsticking = moving & (a['stuck_timer'] >= self.STUCK_THRESHOLD) & (a['stuck_cooldown'] <= 0)
+        a['stuck_cooldown'][unsticking] = self.STUCK_COOLDOWN
+        cooling = moving & (a['stuck_cooldown'] > 0)
+        a['stuck_cooldown'][cooling] -= dt
+
+        # Candidate moves in order of preference, each tried from where the last one left off
+        zero = np.zeros(n)
+        normal = [(goal_dx, goal_dy), (goal_dx, zero), (zero, goal_dy), (-goal_dy, goal_dx), (goal_dy, -goal_dx)]
+        stuck = [(-goal_dy, goal_dx), (goal_dy, -goal_dx), (-goal_dx, -goal_dy), (goal_dx, zero), (zero, goal_dy)]
+        pending = moving.copy()
+        moved = np.zeros(n, dtype=bool)
+        for (normal_x, normal_y), (stuck_x, stuck_y) in zip(normal, stuck):
+            if not pending.any():
+                break
+            move_x = np.where(unsticking, stuck_x, normal_x) * a['speed'] * speed_scale * dt
+            move_y = np.where(unsticking, stuck_y, normal_y) * a['speed'] * speed_scale * dt
+            new_x, new_y, _, _ = self._slide(a['x'], a['y'], move_x, move_y, walkable, tile_size)
+            progress = pending & ((np.abs(new_x - a['x']) > 0.01) | (np.abs(new_y - a['y']) > 0.01))
+            a['x'][pending] = new_x[pending]
+            a['y'][pending] = new_y[pending]
+            moved |= progress
+            pending &= ~progress
+        a['moved'][:] = moved
+
+        # Walk animation advances only for enemies that moved
+        a['animation_timer'][moved] += dt
+        advance = moved & (a['animation_timer'] >= a['animation_speed'])
+        a['animation_timer'][advance] = 0
+        a['animation_frame'][advance] = (a['animation_frame'][advance] + 1) % np.maximum(a['frame_count'][advance], 1)
+
+class StoreField:
+    """Descriptor exposing one EnemyStore array element as an attribute of a view object"""
+    def __init__(self, field, convert=float):
+        self.field = field
+        self.convert = convert
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        return self.convert(view.store.arrays[self.field][view.slot])
+
+    def __set__(self, view, value):
+        view.store.arrays[self.field][view.slot] = value
@@ -0,0 +1,101 @@
+import json
+
+# Event types. Events are plain dictionaries of JSON-friendly values with their type under 'type',
+# so the batches handed to subscribers can go to the network as they are
+DAMAGE = "damage"  # x, y, amount, color, target ('player' or 'enemy')
+DEATH = "death"  # x, y, kind (enemy type), exp
+SPAWN = "spawn"  # x, y, kind (enemy type)
+PICKUP = "pickup"  # x, y, item (name), color
+LEVEL_UP = "level_up"  # x, y, level
+EFFECT = "effect"  # x, y, effect ('hit', 'slash' or 'special'), color, and direction for slashes
+
+class EventBus:
+    """Queues game events as they happen and hands them to subscribers in one batch per type, once a frame"""
+    def __init__(self):
+        self.queue = []  # Events emitted since the last dispatch, in order
+        self.subscribers = {}  # Dictionary of {event_type: [handler(events)]}
+        self.all_subscribers = []  # Handlers given every dispatched event, in order
+        self.coalesce_keys = {}  # Dictionary of {event_type: key(event)}
+
+    def subscribe(self, event_type, handler):
+        """Call handler(events) with each frame's batch of one event type"""
+        self.subscribers.setdefault(event_type, []).append(handler)
+
+    def subscribe_all(self, handler):
+        """Call handler(events) with each frame's events of every type"""
+        self.all_subscribers.append(handler)
+
+    def coalesce(self, event_type, key):
+        """Merge events of a type queued in the same frame that share key(event) into the first one,
+        counting the merged events in its 'count'"""
+        self.coalesce_keys[event_type] = key
+
+    def emit(self, event_type, **fields):
+        """Queue an event for the next dispatch"""
+        fields['type'] = event_type
+        self.queue.append(fields)
+
+    def clear(self):
+        """Drop every queued event"""
+        self.queue = []
+
+    def dispatch(self):
+        """Hand the queued events to their subscribers; events emitted while dispatching wait for the next frame"""
+        queue, self.queue = self.queue, []
+
+        events = []
+        batches = {}  # Dictionary of {event_type: [event]}, in the order types were first emitted
+        merged = {}  # Dictionary of {(event_type, key): first event}
+        for event in queue:
+            event_type = event['type']
+            key = self.coalesce_keys.get(event_type)
+            if key is not None:
+                merge_key = (event_type, key(event))
+                first = merged.get(merge_key)
+                if first is not None:
+                    first['count'] = first.get('count', 1) + 1
+                    continue
+                merged[merge_key] = event
+            events.append(event)
+            batches.setdefault(event_type, []).append(event)
+
+        for event_type, batch in batches.items():
+            for handler in self.subscribers.get(event_type, ()):
+                handler(batch)
+        for handler in self.all_subscribers:
+            handler(events)
+
+def cell_key(cell_size, *fields):
+    """Get a coalesce key that merges events in the same cell of a grid whose given fields are equal"""
+    def key(event):
+        return (int(event['x'] // cell_size), int(event['y'] // cell_size)) + tuple(event[field] for field in fields)
+    return key
+
+class EventCounter:
+    """Counts dispatched events per type, over the last frame and in total"""
+    def __init__(self):
+        self.last_frame = {}  # Dictionary of {event_type: count}
+        self.totals = {}  # Dictionary of {event_type: count}
+
+    def __call__(self, events):
+        self.last_frame = {}
+        for event in events:
+            event_type = event['type']
+            count = event.get('count', 1)
+            self.last_frame[event_type] = self.last_frame.get(event_type, 0) + count
+            self.totals[event_type] = self.totals.get(event_type, 0) + count
+
+def encode_events(events):
+    """Serialize a batch of events into a network message"""
+    return json.dumps({'type': 'events', 'events': events}, separators=(',', ':'))
+
+def decode_events(message):
+    """Get the batch of events out of a network message"""
+    try:
+        data = json.loads(message)
+    except ValueError as e:
+        print(f"Error decoding events: {e}")
+        return []
+    if data.get('type') != 'events':
+        return []
+    return data.get('events', [])
@@ -0,0 +1,116 @@
+import heapq
+import math
+import numpy as np
+from .pathfinding import NEIGHBOURS
+
+class FlowField:
+    """Dijkstra costs toward one target tile over a square window, shared by every enemy chasing it"""
+    def __init__(self, radius=12):
+        self.radius = radius  # Half the window size in tiles
+        size = radius * 2 + 1
+        self.target = None
+        self._cache_key = None  # (tile_x, tile_y, map version) the field was computed for
+        self.origin_x = 0  # Tile coordinate of the window's top-left corner
+        self.origin_y = 0
+        self.costs = np.full((size, size), np.inf)
+        self.step_x = np.zeros((size, size), dtype=np.int8)  # Move toward the target from each tile
+        self.step_y = np.zeros((size, size), dtype=np.int8)
+
+    def update(self, tile_x, tile_y, is_walkable, map_version=None):
+        """Recompute the field when the target changes tile (or the map changes), returning True if it did"""
+        cache_key = (tile_x, tile_y, map_version)
+        if cache_key == self._cache_key:
+            return False
+        self._cache_key = cache_key
+        self.compute(tile_x, tile_y, is_walkable)
+        return True
+
+    def compute(self, tile_x, tile_y, is_walkable):
+        """Run Dijkstra outward from the target tile, then point every tile at its cheapest neighbour"""
+        size = self.radius * 2 + 1
+        self.target = (tile_x, tile_y)
+        self.origin_x = tile_x - self.radius
+        self.origin_y = tile_y - self.radius
+
+        walkable = np.zeros((size, size), dtype=bool)
+        for local_y in range(size):
+            for local_x in range(size):
+                walkable[local_y, local_x] = is_walkable(self.origin_x + local_x, self.origin_y + local_y)
+
+        costs = np.full((size, size), np.inf)
+        start = (self.radius, self.radius)
+        costs[start[1], start[0]] = 0.0
+        heap = [(0.0, start)]
+        while heap:
+            cost, (local_x, local_y) = heapq.heappop(heap)
+            if cost > costs[local_y, local_x]:
+                continue
+            for dx, dy, step in NEIGHBOURS:
+                next_x = local_x + dx
+                next_y = local_y + dy
+                if not (0 <= next_x < size and 0 <= next_y < size) or not walkable[next_y, next_x]:
+                    continue
+                # Diagonal moves may not cut the corner of an unwalkable tile
+                if dx and dy and not (walkable[local_y, next_x] and walkable[next_y, local_x]):
+                    continue
+                new_cost = cost + step
+                if new_cost < costs[next_y, next_x]:
+                    costs[next_y, next_x] = new_cost
+                    heapq.heappush(heap, (new_cost, (next_x, next_y)))
+        self.costs = costs
+
+        # For every tile at once, pick the neighbour that leads to the target most cheaply
+        padded_costs = np.pad(costs, 1, constant_values=np.inf)
+        padded_walkable = np.pad(walkable, 1, constant_values=False)
+        best = np.full((size, size), np.inf)
+        step_x = np.zeros((size, size), dtype=np.int8)
+        step_y = np.zeros((size, size), dtype=np.int8)
+        for dx, dy, step in NEIGHBOURS:
+            candidate = padded_costs[1 + dy:1 + dy + size, 1 + dx:1 + dx + size] + step
+            if dx and dy:
+                open_corner = (padded_walkable[1:1 + size, 1 + dx:1 + dx + size] &
+                               padded_walkable[1 + dy:1 + dy + size, 1:1 + size])
+                candidate = np.where(open_corner, candidate, np.inf)
+            better = candidate < best
+            best[better] = candidate[better]
+            step_x[better] = dx
+            step_y[better] = dy
+        unreachable = ~np.isfinite(costs)
+        step_x[unreachable] = 0
+        step_y[unreachable] = 0
+        step_x[start[1], start[0]] = 0
+        step_y[start[1], start[0]] = 0
+        self.step_x = step_x
+        self.step_y = step_y
+
+    def cost(self, tile_x, tile_y):
+        """Get the path cost from a tile to the target, or infinity outside the field"""
+        local_x = tile_x - self.origin_x
+        local_y = tile_y - self.origin_y
+        if 0 <= local_x < self.costs.shape[1] and 0 <= local_y < self.costs.shape[0]:
+            return float(self.costs[local_y, local_x])
+        return math.inf
+
+    def next_tile(self, tile_x, tile_y):
+        """Get the neighbouring tile to move to, or None at the target, outside the field or with no route"""
+        local_x = tile_x - self.origin_x
+        local_y = tile_y - self.origin_y
+        if not (0 <= local_x < self.step_x.shape[1] and 0 <= local_y < self.step_x.shape[0]):
+            return None
+        step_x = int(self.step_x[local_y, local_x])
+        step_y = int(self.step_y[local_y, local_x])
+        if not (step_x or step_y):
+            return None
+        return (tile_x + step_x, tile_y + step_y)
+
+    def lookup_steps(self, tile_x, tile_y):
+        """Vectorized next_tile for arrays of tiles, returning (step_x, step_y, valid) arrays"""
+        local_x = tile_x - self.origin_x
+        local_y = tile_y - self.origin_y
+        size = self.step_x.shape[0]
+        inside = (local_x >= 0) & (local_x < size) & (local_y >= 0) & (local_y < size)
+        step_x = np.zeros(tile_x.shape, dtype=np.int8)
+        step_y = np.zeros(tile_x.shape, dtype=np.int8)
+        step_x[inside] = self.step_x[local_y[inside], local_x[inside]]
+        step_y[inside] = self.step_y[local_y[inside], local_x[inside]]
+        return step_x, step_y, (step_x != 0) | (step_y != 0)
@@ -0,0 +1,59 @@
+# Multipliers (xx, xy, yx, yy) mapping octant-local coordinates onto the map
+OCTANTS = (
+    (1, 0, 0, 1),
+    (0, 1, 1, 0),
+    (0, -1, 1, 0),
+    (-1, 0, 0, 1),
+    (-1, 0, 0, -1),
+    (0, -1, -1, 0),
+    (0, 1, -1, 0),
+    (1, 0, 0, -1),
+)
+
+def compute_fov(origin_x, origin_y, radius, is_opaque):
+    """Get the set of (tile_x, tile_y) visible from a tile, using recursive shadowcasting"""
+    visible = {(origin_x, origin_y)}
+    for transform in OCTANTS:
+        _cast_light(visible, origin_x, origin_y, radius, 1, 1.0, 0.0, transform, is_opaque)
+    return visible
+
+def _cast_light(visible, origin_x, origin_y, radius, row, start_slope, end_slope, transform, is_opaque):
+    """Scan one octant row by row, recursing past each wall to light the gap beside it"""
+    if start_slope < end_slope:
+        return
+    xx, xy, yx, yy = transform
+    radius_squared = radius * radius
+    next_start_slope = start_slope
+
+    for distance in range(row, radius + 1):
+        delta_y = -distance
+        blocked = False
+        for delta_x in range(-distance, 1):
+            # Slopes of the tile's left and right edges as seen from the origin
+            left_slope = (delta_x - 0.5) / (delta_y + 0.5)
+            right_slope = (delta_x + 0.5) / (delta_y - 0.5)
+            if start_slope < right_slope:
+                continue
+            if end_slope > left_slope:
+                break
+
+            tile_x = origin_x + delta_x * xx + delta_y * xy
+            tile_y = origin_y + delta_x * yx + delta_y * yy
+            if delta_x * delta_x + delta_y * delta_y < radius_squared:
+                visible.add((tile_x, tile_y))
+
+            opaque = is_opaque(tile_x, tile_y)
+            if blocked:
+                if opaque:
+                    next_start_slope = right_slope
+                else:
+                    blocked = False
+                    start_slope = next_start_slope
+            elif opaque and distance < radius:
+                # Everything behind this wall is shadowed; light the rows past it separately
+                blocked = True
+                _cast_light(visible, origin_x, origin_y, radius, distance + 1,
+                            start_slope, left_slope, transform, is_opaque)
+                next_start_slope = right_slope
+        if blocked:
+            break
@@ -0,0 +1,163 @@
+import math
+import numpy as np
+
+def traverse_cells(start_x, start_y, end_x, end_y, cell_size):
+    """Yield every grid cell a segment passes through, in order (Amanatides-Woo traversal)"""
+    cell_x = int(start_x // cell_size)
+    cell_y = int(start_y // cell_size)
+    last_x = int(end_x // cell_size)
+    last_y = int(end_y // cell_size)
+    yield cell_x, cell_y
+
+    dx = end_x - start_x
+    dy = end_y - start_y
+    step_x = 1 if dx > 0 else -1
+    step_y = 1 if dy > 0 else -1
+
+    # Fraction of the segment until the next vertical and horizontal cell edge, and per cell
+    if dx:
+        t_max_x = ((cell_x + (1 if dx > 0 else 0)) * cell_size - start_x) / dx
+        t_delta_x = cell_size / abs(dx)
+    else:
+        t_max_x = t_delta_x = math.inf
+    if dy:
+        t_max_y = ((cell_y + (1 if dy > 0 else 0)) * cell_size - start_y) / dy
+        t_delta_y = cell_size / abs(dy)
+    else:
+        t_max_y = t_delta_y = math.inf
+
+    while (cell_x, cell_y) != (last_x, last_y):
+        if t_max_x < t_max_y:
+            if t_max_x > 1:
+                break
+            cell_x += step_x
+            t_max_x += t_delta_x
+        else:
+            if t_max_y > 1:
+                break
+            cell_y += step_y
+            t_max_y += t_delta_y
+        yield cell_x, cell_y
+
+def segment_box_entry(start_x, start_y, end_x, end_y, left, top, right, bottom):
+    """Get the fraction along a segment where it enters a box, or None if it misses (slab test)"""
+    t_enter = 0.0
+    t_exit = 1.0
+    for start, delta, low, high in ((start_x, end_x - start_x, left, right),
+                                    (start_y, end_y - start_y, top, bottom)):
+        if delta == 0:
+            if start < low or start > high:
+                return None
+            continue
+        t_low = (low - start) / delta
+        t_high = (high - start) / delta
+        if t_low > t_high:
+            t_low, t_high = t_high, t_low
+        t_enter = max(t_enter, t_low)
+        t_exit = min(t_exit, t_high)
+        if t_enter > t_exit:
+            return None
+    return t_enter
+
+def has_line_of_sight(start_x, start_y, end_x, end_y, is_opaque, tile_size):
+    """Check that no tile after the starting one is opaque along a segment between pixel positions"""
+    cells = traverse_cells(start_x, start_y, end_x, end_y, tile_size)
+    next(cells)  # The viewer's own tile never blocks
+    for tile_x, tile_y in cells:
+        if is_opaque(tile_x, tile_y):
+            return False
+    return True
+
+def tile_line_of_sight(start_x, start_y, end_x, end_y, is_opaque, tile_size):
+    """Check line of sight between the tiles of two pixel positions, from tile centre to centre"""
+    # Tracing between centres makes the answer depend on the tiles alone, so it can be shared
+    # by every viewer on a tile
+    half = tile_size / 2
+    return has_line_of_sight((start_x // tile_size) * tile_size + half, (start_y // tile_size) * tile_size + half,
+                             (end_x // tile_size) * tile_size + half, (end_y // tile_size) * tile_size + half,
+                             is_opaque, tile_size)
+
+class LineOfSightCache:
+    """Tile-to-tile line of sight answers, memoized for the current tick"""
+    def __init__(self, is_opaque, tile_size):
+        self.is_opaque = is_opaque
+        self.tile_size = tile_size
+        self.results = {}  # Dictionary of {(start_tile, end_tile): bool}
+        self.hits = 0
+        self.misses = 0
+
+    def begin_tick(self):
+        """Forget the previous tick's answers (the map or the actors may have changed)"""
+        self.results.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def check(self, start_x, start_y, end_x, end_y):
+        """Check line of sight between the tiles of two pixel positions, from tile centre to centre"""
+        start = (int(start_x // self.tile_size), int(start_y // self.tile_size))
+        end = (int(end_x // self.tile_size), int(end_y // self.tile_size))
+        key = (start, end)
+        result = self.results.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = tile_line_of_sight(start_x, start_y, end_x, end_y, self.is_opaque, self.tile_size)
+        self.results[key] = result
+        return result
+
+def batch_line_of_sight(start_x, start_y, end_x, end_y, opaque, tile_size):
+    """has_line_of_sight for arrays of segments against a (height, width) opacity grid"""
+    # Every segment takes one traversal step per loop iteration, so the loop runs for the
+    # longest segment's tile count rather than once per segment
+    start_x = np.asarray(start_x, dtype=np.float64)
+    start_y = np.asarray(start_y, dtype=np.float64)
+    end_x = np.broadcast_to(np.asarray(end_x, dtype=np.float64), start_x.shape)
+    end_y = np.broadcast_to(np.asarray(end_y, dtype=np.float64), start_x.shape)
+    height, width = opaque.shape
+
+    cell_x = np.floor(start_x / tile_size).astype(np.intp)
+    cell_y = np.floor(start_y / tile_size).astype(np.intp)
+    last_x = np.floor(end_x / tile_size).astype(np.intp)
+    last_y = np.floor(end_y / tile_size).astype(np.intp)
+    steps = np.abs(last_x - cell_x) + np.abs(last_y - cell_y)
+
+    dx = end_x - start_x
+    dy = end_y - start_y
+    step_x = np.where(dx > 0, 1, -1)
+    step_y = np.where(dy > 0, 1, -1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_max_x = np.where(dx != 0, ((cell_x + (dx > 0)) * tile_size - start_x) / dx, np.inf)
+        t_max_y = np.where(dy != 0, ((cell_y + (dy > 0)) * tile_size - start_y) / dy, np.inf)
+        t_delta_x = np.where(dx != 0, tile_size / np.abs(dx), np.inf)
+        t_delta_y = np.where(dy != 0, tile_size / np.abs(dy), np.inf)
+
+    clear = np.ones(start_x.shape, dtype=bool)
+    for step in range(int(steps.max(initial=0))):
+        active = clear & (step < steps)
+        if not active.any():
+            break
+        along_x = active & (t_max_x < t_max_y)
+        along_y = active & ~along_x
+        cell_x = np.where(along_x, cell_x + step_x, cell_x)
+        t_max_x = np.where(along_x, t_max_x + t_delta_x, t_max_x)
+        cell_y = np.where(along_y, cell_y + step_y, cell_y)
+        t_max_y = np.where(along_y, t_max_y + t_delta_y, t_max_y)
+
+        # Cells outside the grid block sight
+        inside = (cell_x >= 0) & (cell_x < width) & (cell_y >= 0) & (cell_y < height)
+        blocked = active & ~inside
+        check = active & inside
+        blocked[check] = opaque[cell_y[check], cell_x[check]]
+        clear &= ~blocked
+    return clear
+
+def batch_tile_line_of_sight(start_x, start_y, end_x, end_y, opaque, tile_size):
+    """tile_line_of_sight for arrays of segments against a (height, width) opacity grid"""
+    half = tile_size / 2
+    return batch_line_of_sight(np.floor_divide(start_x, tile_size) * tile_size + half,
+                               np.floor_divide(start_y, tile_size) * tile_size + half,
+                               np.floor_divide(end_x, tile_size) * tile_size + half,
+                               np.floor_divide(end_y, tile_size) * tile_size + half,
+                               opaque, tile_size)
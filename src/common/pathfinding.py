@@ -0,0 +1,98 @@
+import heapq
+import math
+from collections import OrderedDict
+
+SQRT2 = math.sqrt(2)
+
+# (dx, dy, cost) of the eight moves between tiles
+NEIGHBOURS = (
+    (1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+    (1, 1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (-1, -1, SQRT2),
+)
+
+def octile_distance(start_x, start_y, end_x, end_y):
+    """Exact cost between two tiles on an open 8-connected grid"""
+    dx = abs(end_x - start_x)
+    dy = abs(end_y - start_y)
+    return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
+
+def find_path(start, goal, is_walkable, max_nodes=4000):
+    """A* from one tile to another, returning the tiles after start up to goal, or None"""
+    if start == goal:
+        return []
+    if not is_walkable(*goal):
+        return None
+
+    goal_x, goal_y = goal
+    open_heap = [(octile_distance(*start, goal_x, goal_y), 0, 0.0, start)]
+    came_from = {start: None}
+    cost_so_far = {start: 0.0}
+    counter = 0  # Tie breaker so the heap never compares tiles
+    expanded = 0
+
+    while open_heap:
+        _, _, cost, current = heapq.heappop(open_heap)
+        if current == goal:
+            path = []
+            while current != start:
+                path.append(current)
+                current = came_from[current]
+            path.reverse()
+            return path
+        if cost > cost_so_far[current]:
+            continue  # Stale entry for a tile already reached more cheaply
+
+        expanded += 1
+        if expanded > max_nodes:
+            return None
+
+        current_x, current_y = current
+        for dx, dy, step in NEIGHBOURS:
+            next_x = current_x + dx
+            next_y = current_y + dy
+            if not is_walkable(next_x, next_y):
+                continue
+            # Diagonal moves may not cut the corner of an unwalkable tile
+            if dx and dy and not (is_walkable(current_x + dx, current_y) and is_walkable(current_x, current_y + dy)):
+                continue
+            new_cost = cost + step
+            neighbour = (next_x, next_y)
+            if new_cost < cost_so_far.get(neighbour, math.inf):
+                cost_so_far[neighbour] = new_cost
+                came_from[neighbour] = current
+                counter += 1
+                priority = new_cost + octile_distance(next_x, next_y, goal_x, goal_y)
+                heapq.heappush(open_heap, (priority, counter, new_cost, neighbour))
+    return None
+
+class PathPlanner:
+    """Queue of path requests, answered a few per tick so searches spread across frames"""
+    def __init__(self, searches_per_tick=4, max_nodes=4000):
+        self.searches_per_tick = searches_per_tick
+        self.max_nodes = max_nodes  # Node expansions allowed per search
+        self.requests = OrderedDict()  # Dictionary of {owner: (start, goal, callback)}, oldest first
+
+    def __len__(self):
+        return len(self.requests)
+
+    def request(self, owner, start, goal, callback):
+        """Ask for a path; a newer request from the same owner replaces its queued one in place"""
+        self.requests[owner] = (start, goal, callback)
+
+    def cancel(self, owner):
+        """Drop an owner's queued request"""
+        self.requests.pop(owner, None)
+
+    def is_pending(self, owner):
+        """Check whether an owner has a request waiting"""
+        return owner in self.requests
+
+    def clear(self):
+        """Drop every queued request"""
+        self.requests.clear()
+
+    def update(self, is_walkable):
+        """Run up to the per-tick budget of searches, handing each result (or None) to its callback"""
+        for _ in range(min(self.searches_per_tick, len(self.requests))):
+            owner, (start, goal, callback) = self.requests.popitem(last=False)
+            callback(find_path(start, goal, is_walkable, self.max_nodes))
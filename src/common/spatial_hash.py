@@ -0,0 +1,117 @@
+import math
+from .line_of_sight import traverse_cells, segment_box_entry
+
+class SpatialHash:
+    """Uniform grid index of entity bounding boxes for radius, rectangle and ray queries"""
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}  # Dictionary of {(cell_x, cell_y): {entity: None}}, kept in insertion order
+        self.bounds = {}  # Dictionary of {entity: (x, y, width, height)}
+        self.cell_ranges = {}  # Dictionary of {entity: (start_x, start_y, end_x, end_y)} of occupied cells
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def __contains__(self, entity):
+        return entity in self.bounds
+
+    def _cell_range(self, x, y, width, height):
+        """Get the inclusive range of cells a box overlaps"""
+        return (int(x // self.cell_size), int(y // self.cell_size),
+                int((x + width) // self.cell_size), int((y + height) // self.cell_size))
+
+    def insert(self, entity, x, y, width=0, height=0):
+        """Add an entity with its bounding box"""
+        if entity in self.bounds:
+            self.remove(entity)
+        cell_range = self._cell_range(x, y, width, height)
+        start_x, start_y, end_x, end_y = cell_range
+        for cell_y in range(start_y, end_y + 1):
+            for cell_x in range(start_x, end_x + 1):
+                self.cells.setdefault((cell_x, cell_y), {})[entity] = None
+        self.bounds[entity] = (x, y, width, height)
+        self.cell_ranges[entity] = cell_range
+
+    def update(self, entity, x, y, width=0, height=0):
+        """Move an entity, only touching the grid when it crosses into different cells"""
+        cell_range = self.cell_ranges.get(entity)
+        if cell_range is None or cell_range != self._cell_range(x, y, width, height):
+            self.insert(entity, x, y, width, height)
+        else:
+            self.bounds[entity] = (x, y, width, height)
+
+    def remove(self, entity):
+        """Remove an entity from the index"""
+        cell_range = self.cell_ranges.pop(entity, None)
+        if cell_range is None:
+            return
+        del self.bounds[entity]
+        start_x, start_y, end_x, end_y = cell_range
+        for cell_y in range(start_y, end_y + 1):
+            for cell_x in range(start_x, end_x + 1):
+                cell = self.cells.get((cell_x, cell_y))
+                if cell is not None:
+                    cell.pop(entity, None)
+                    if not cell:
+                        del self.cells[(cell_x, cell_y)]
+
+    def clear(self):
+        """Remove every entity"""
+        self.cells.clear()
+        self.bounds.clear()
+        self.cell_ranges.clear()
+
+    def _candidates(self, start_x, start_y, end_x, end_y):
+        """Yield each entity in an inclusive range of cells once"""
+        seen = set()
+        for cell_y in range(start_y, end_y + 1):
+            for cell_x in range(start_x, end_x + 1):
+                for entity in self.cells.get((cell_x, cell_y), ()):
+                    if entity not in seen:
+                        seen.add(entity)
+                        yield entity
+
+    def query_rect(self, x, y, width, height):
+        """Get the entities whose bounding box overlaps a rectangle"""
+        right = x + width
+        bottom = y + height
+        found = []
+        for entity in self._candidates(*self._cell_range(x, y, width, height)):
+            entity_x, entity_y, entity_width, entity_height = self.bounds[entity]
+            if (entity_x <= right and x <= entity_x + entity_width and
+                    entity_y <= bottom and y <= entity_y + entity_height):
+                found.append(entity)
+        return found
+
+    def query_radius(self, x, y, radius):
+        """Get the entities whose bounding box comes within a radius of a point"""
+        radius_squared = radius * radius
+        found = []
+        for entity in self._candidates(*self._cell_range(x - radius, y - radius, radius * 2, radius * 2)):
+            entity_x, entity_y, entity_width, entity_height = self.bounds[entity]
+            # Distance from the point to the closest point of the box
+            dx = max(entity_x - x, 0, x - (entity_x + entity_width))
+            dy = max(entity_y - y, 0, y - (entity_y + entity_height))
+            if dx * dx + dy * dy <= radius_squared:
+                found.append(entity)
+        return found
+
+    def query_ray(self, start_x, start_y, end_x, end_y, radius=0):
+        """Get the entities a segment (thickened by a radius) passes through, nearest first"""
+        found = []
+        seen = set()
+        spread = int(math.ceil(radius / self.cell_size)) if radius > 0 else 0
+        for cell_x, cell_y in traverse_cells(start_x, start_y, end_x, end_y, self.cell_size):
+            for entity in self._candidates(cell_x - spread, cell_y - spread,
+                                           cell_x + spread, cell_y + spread):
+                if entity in seen:
+                    continue
+                seen.add(entity)
+                entity_x, entity_y, entity_width, entity_height = self.bounds[entity]
+                hit = segment_box_entry(start_x, start_y, end_x, end_y,
+                                        entity_x - radius, entity_y - radius,
+                                        entity_x + entity_width + radius, entity_y + entity_height + radius)
+                if hit is not None:
+                    found.append((hit, entity))
+        found.sort(key=lambda pair: pair[0])
+        return [entity for _, entity in found]
@@ -20,6 +20,11 @@ class Tile:
         TileType.PORTAL: ['portal.png'],  # We'll need to create this sprite
     }
 
+    # Tile types drawn every frame from an animation cycle instead of a baked sprite
+    ANIMATIONS = {
+        TileType.WATER: ['water_{}.png'.format(i) for i in range(4)],
+    }
+
     # Transition tiles mapping
     TRANSITIONS = {
         (TileType.GRASS, TileType.SAND): 'grass_sand_{}.png',
@@ -29,31 +34,80 @@ class Tile:
         (TileType.STONE, TileType.WALL): 'stone_wall_{}.png',
     }
 
-    def __init__(self, tile_type: TileType):
+    # Movement speed multiplier on each tile type
+    SPEED_MODIFIERS = {
+        TileType.WATER: 0.5,
+    }
+
+    # Bit assigned to each neighbour direction in a transition mask
+    TRANSITION_BITS = {
+        'top': 1,
+        'right': 2,
+        'bottom': 4,
+        'left': 8,
+    }
+
+    # Cache of (transition key, mask) -> tuple of sprite names
+    _transition_sprite_cache = {}
+
+    __slots__ = ('tile_type', 'sprite_name', 'walkable', 'opaque', 'speed', 'animated', 'transitions',
+                 'transition_sprites')
+
+    def __init__(self, tile_type: TileType, rng=None):
         self.tile_type = tile_type
-        self.sprite_name = random.choice(self.TILE_SPRITES[tile_type])
+        self.sprite_name = (rng or random).choice(self.TILE_SPRITES[tile_type])  # From rng if given, else the shared generator
         self.walkable = tile_type not in [TileType.WATER, TileType.WALL]  # Portals are walkable
-        self.animation_frame = 0
-        self.transition = None
-        self.transition_direction = None
+        self.opaque = tile_type == TileType.WALL  # Blocks line of sight
+        self.speed = self.SPEED_MODIFIERS.get(tile_type, 1.0)
+        self.animated = tile_type in self.ANIMATIONS
+        self.transitions = {}  # Dictionary of {(tile_type, neighbor_type): mask}
+        self.transition_sprites = ()
 
-    def update_animation(self):
-        """Update animation frame for animated tiles (like water)"""
-        if self.tile_type == TileType.WATER:
-            self.animation_frame = (self.animation_frame + 1) % 4
-            self.sprite_name = f'water_{self.animation_frame}.png'
+    def get_animation_sprite(self, frame):
+        """Get the sprite name for a map-wide animation frame (like water)"""
+        frames = self.ANIMATIONS.get(self.tile_type)
+        if frames:
+            return frames[frame % len(frames)]
+        return self.sprite_name
 
     def set_transition(self, neighbor_type, direction):
-        """Set transition to another tile type in the specified direction"""
+        """Add a transition to another tile type in the specified direction"""
         key = (self.tile_type, neighbor_type)
         if key in self.TRANSITIONS:
-            self.transition = key
-            self.transition_direction = direction
+            self.transitions[key] = self.transitions.get(key, 0) | self.TRANSITION_BITS[direction]
+            self.transition_sprites = self._build_transition_sprites()
             return True
         return False
 
-    def get_transition_sprite(self):
-        """Get the transition sprite name if any"""
-        if self.transition and self.transition_direction:
-            return self.TRANSITIONS[self.transition].format(self.transition_direction)
-        return None
\ No newline at end of file
+    def clear_transitions(self):
+        """Remove all transitions from this tile"""
+        self.transitions = {}
+        self.transition_sprites = ()
+
+    @property
+    def transition_mask(self):
+        """Combined 4-bit mask of every direction with a transition"""
+        mask = 0
+        for direction_mask in self.transitions.values():
+            mask |= direction_mask
+        return mask
+
+    def _build_transition_sprites(self):
+        """Resolve the transition masks into the sprite names to draw"""
+        sprites = ()
+        for key, mask in self.transitions.items():
+            sprites += self.get_mask_sprites(key, mask)
+        return sprites
+
+    @classmethod
+    def get_mask_sprites(cls, key, mask):
+        """Get the sprite names for a transition key and direction mask"""
+        cache_key = (key, mask)
+        sprites = cls._transition_sprite_cache.get(cache_key)
+        if sprites is None:
+            pattern = cls.TRANSITIONS[key]
+            sprites = tuple(pattern.format(direction)
+                            for direction, bit in cls.TRANSITION_BITS.items()
+                            if mask & bit)
+            cls._transition_sprite_cache[cache_key] = sprites
+        return sprites
@@ -0,0 +1,152 @@
+import numpy as np
+from .tiles import TileType
+
+class WorldGenerator:
+    """Seeded procedural terrain, generated with whole-array NumPy operations"""
+    def __init__(self, seed=0, base_scale=64, octaves=5, persistence=0.5,
+                 water_level=0.32, sand_level=0.36, stone_level=0.66, wall_level=0.74,
+                 desert_moisture=0.3, river_width=0.012):
+        self.seed = seed
+        self.base_scale = base_scale  # Tiles between lattice points of the first octave
+        self.octaves = octaves
+        self.persistence = persistence  # Amplitude falloff per octave
+
+        # Biome thresholds on normalized elevation and moisture
+        self.water_level = water_level
+        self.sand_level = sand_level
+        self.stone_level = stone_level
+        self.wall_level = wall_level
+        self.desert_moisture = desert_moisture
+        self.river_width = river_width  # Band of the river noise that becomes water
+
+    def generate(self, width, height):
+        """Generate a (height, width) grid of TileType values"""
+        rng = np.random.default_rng(self.seed)
+        elevation = self.fractal_noise(width, height, rng)
+        moisture = self.fractal_noise(width, height, rng, base_scale=self.base_scale * 2)
+        rivers = self.fractal_noise(width, height, rng, base_scale=self.base_scale * 2, octaves=3)
+
+        grid = np.full((height, width), TileType.GRASS.value, dtype=np.uint8)
+        grid[moisture < self.desert_moisture] = TileType.SAND.value
+        grid[elevation < self.sand_level] = TileType.SAND.value
+        grid[elevation < self.water_level] = TileType.WATER.value
+        grid[elevation > self.stone_level] = TileType.STONE.value
+        grid[elevation > self.wall_level] = TileType.WALL.value
+
+        # Rivers follow a contour of their own noise field through the lowlands
+        river = (np.abs(rivers - 0.5) < self.river_width) & (elevation < self.stone_level)
+        grid[river] = TileType.WATER.value
+
+        self.ensure_connected(grid)
+        return grid
+
+    def fractal_noise(self, width, height, rng, base_scale=None, octaves=None):
+        """Sum octaves of value noise, normalized to the 0..1 range"""
+        base_scale = base_scale or self.base_scale
+        octaves = octaves or self.octaves
+
+        total = np.zeros((height, width), dtype=np.float32)
+        amplitude = 1.0
+        scale = float(base_scale)
+        for _ in range(octaves):
+            total += self.value_noise(width, height, max(scale, 1.0), rng) * amplitude
+            amplitude *= self.persistence
+            scale /= 2
+
+        total -= total.min()
+        peak = total.max()
+        if peak > 0:
+            total /= peak
+        return total
+
+    @staticmethod
+    def value_noise(width, height, scale, rng):
+        """Smoothly interpolated random lattice values with the given feature size"""
+        lattice_w = int(width / scale) + 2
+        lattice_h = int(height / scale) + 2
+        lattice = rng.random((lattice_h, lattice_w), dtype=np.float32)
+
+        x = np.arange(width, dtype=np.float32) / scale
+        y = np.arange(height, dtype=np.float32) / scale
+        x0 = x.astype(np.int32)
+        y0 = y.astype(np.int32)
+
+        # Smoothstep the fractional parts so lattice edges do not show
+        fx = x - x0
+        fy = y - y0
+        fx = fx * fx * (3 - 2 * fx)
+        fy = (fy * fy * (3 - 2 * fy))[:, None]
+
+        top = lattice[y0][:, x0] * (1 - fx) + lattice[y0][:, x0 + 1] * fx
+        bottom = lattice[y0 + 1][:, x0] * (1 - fx) + lattice[y0 + 1][:, x0 + 1] * fx
+        return top * (1 - fy) + bottom * fy
+
+    @staticmethod
+    def walkable_mask(grid):
+        """Tiles the player can stand on (water is traversable, walls are not)"""
+        return grid != TileType.WALL.value
+
+    def ensure_connected(self, grid, fill=TileType.WALL):
+        """Fill every walkable region except the largest, returning the number of tiles filled"""
+        walkable = self.walkable_mask(grid)
+        height, width = walkable.shape
+
+        # Horizontal runs of walkable tiles, in row-major order
+        padded = np.zeros((height, width + 2), dtype=np.int8)
+        padded[:, 1:-1] = walkable
+        edges = np.diff(padded, axis=1)
+        run_rows, run_starts = np.nonzero(edges == 1)
+        _, run_ends = np.nonzero(edges == -1)
+        if len(run_starts) == 0:
+            return 0
+        run_lengths = run_ends - run_starts
+
+        # Pair every run with the runs it overlaps on the row above
+        row_first = np.searchsorted(run_rows, np.arange(height + 1))
+        pair_a = []
+        pair_b = []
+        for y in range(1, height):
+            above = slice(row_first[y - 1], row_first[y])
+            current = slice(row_first[y], row_first[y + 1])
+            if above.start == above.stop or current.start == current.stop:
+                continue
+            low = np.searchsorted(run_ends[above], run_starts[current], side='right')
+            high = np.searchsorted(run_starts[above], run_ends[current], side='left')
+            counts = np.maximum(high - low, 0)
+            if not counts.any():
+                continue
+            ids = np.arange(current.start, current.stop)
+            pair_b.append(np.repeat(ids, counts))
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            pair_a.append(above.start + np.repeat(low, counts) + offsets)
+
+        labels = np.arange(len(run_starts))
+        if pair_a:
+            labels = self._connected_labels(labels, np.concatenate(pair_a), np.concatenate(pair_b))
+
+        # Keep the region with the most tiles
+        sizes = np.bincount(labels, weights=run_lengths)
+        main = np.argmax(sizes)
+        cell_labels = np.repeat(labels, run_lengths)
+        cells = np.flatnonzero(walkable)
+        isolated = cells[cell_labels != main]
+        grid.flat[isolated] = fill.value
+        return len(isolated)
+
+    @staticmethod
+    def _connected_labels(labels, a, b):
+        """Label connected components by hooking to the smaller label and pointer jumping"""
+        while True:
+            label_a = labels[a]
+            label_b = labels[b]
+            differ = label_a != label_b
+            if not differ.any():
+                return labels
+            low = np.minimum(label_a[differ], label_b[differ])
+            high = np.maximum(label_a[differ], label_b[differ])
+            np.minimum.at(labels, high, low)
+            while True:
+                jumped = labels[labels]
+                if np.array_equal(jumped, labels):
+                    break
+                labels = jumped
@@ -0,0 +1,85 @@
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+# Sprites need a display mode, but not a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+from src.common.tiles import Tile, TileType
+from src.client.enemy import Enemy
+from src.client.item import Item, ItemType, ItemDrop
+from src.client.npc import NPC
+from src.client.particle_system import ParticleSystem
+from src.client.projectile import ProjectilePool
+
+class Record:
+    """Object holding one pool slot's fields as attributes, the reference layout of a pooled entity"""
+    def __init__(self, fields):
+        self.__dict__.update(fields)
+
+def with_dict(cls):
+    """Get a copy of a slotted class whose instances keep their attributes in a __dict__, as a reference layout"""
+    namespace = {name: value for name, value in vars(cls).items()
+                 if name != '__slots__' and name not in cls.__slots__}
+    return type(cls.__name__, cls.__bases__, namespace)
+
+def measure(factory, count):
+    """Get the Python heap bytes held per entity when count of them are alive at once"""
+    factory(0)  # Warm up caches shared by every entity so they are not charged to the first
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    held = after - before - sys.getsizeof(entities)
+    del entities
+    return held / count
+
+def slot_bytes(pool):
+    """Get the array bytes of one slot of a preallocated pool"""
+    return sum(array.nbytes for array in pool.arrays.values()) / pool.capacity
+
+def slot_record(pool):
+    """Get a factory of Records holding the fields of a pool's slots"""
+    return lambda i: Record({name: array[i].tolist() for name, array in pool.arrays.items()})
+
+def benchmark_entity_memory(count):
+    """Print the bytes per entity of every hot entity type, in a __dict__ reference layout and as stored now"""
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    potion = Item("Health Potion", ItemType.POTION, "Restores 50 health", "health_potion.png", {"healing": 50})
+    print(f"Bytes per entity at {count} entities")
+    print(f"{'':<12}{'__dict__':>10}{'now':>10}")
+
+    # Slotted classes, against copies of themselves that keep a __dict__
+    factories = {
+        Enemy: lambda cls, i: cls(i % 100 * 32, i // 100 * 32, "goblin" if i % 2 else "zombie"),
+        ItemDrop: lambda cls, i: cls(potion, i, i),
+        Tile: lambda cls, i: cls(TileType.GRASS),
+        NPC: lambda cls, i: cls(i, i),
+    }
+    for cls, factory in factories.items():
+        reference = with_dict(cls)
+        dict_bytes = measure(lambda i: factory(reference, i), count)
+        now_bytes = measure(lambda i: factory(cls, i), count)
+        print(f"{cls.__name__:<12}{dict_bytes:>10.0f}{now_bytes:>10.0f}")
+
+    # Pooled entities live in preallocated arrays rather than objects, so they are counted per pool
+    # slot, against one object per entity holding the same fields
+    projectiles = ProjectilePool(count)
+    for i in range(count):
+        projectiles.spawn(i, i, (1, 0), 500, 10, 400)
+    particles = ParticleSystem(count)
+    for name, pool in (("Projectile", projectiles), ("Particle", particles)):
+        print(f"{name:<12}{measure(slot_record(pool), count):>10.0f}{slot_bytes(pool):>10.0f} per pool slot")
+
+if __name__ == "__main__":
+    # Run from the project root: python -m src.tools.benchmark_entity_memory
+    parser = argparse.ArgumentParser(description="Measure the memory held per game entity")
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+    benchmark_entity_memory(args.count)
@@ -0,0 +1,126 @@
+import argparse
+import os
+import random
+import sys
+
+# Sprites need a display mode, but not a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+from src.common.constants import PLAYER_SIZE
+from src.common.flow_field import FlowField
+from src.common.pathfinding import PathPlanner
+from src.client.map import GameMap
+from src.client.enemy import Enemy
+from src.client.enemy_manager import EnemyManager
+
+class Target:
+    """Stand-in player walking a fixed loop and soaking up attacks"""
+    ROUTE = [(5, 3), (25, 3), (25, 20), (5, 20)]  # Tiles at the corners of the loop
+    SPEED = 120
+
+    def __init__(self, tile_size):
+        self.tile_size = tile_size
+        self.x = self.ROUTE[0][0] * tile_size
+        self.y = self.ROUTE[0][1] * tile_size
+        self.leg = 1
+        self.damage_taken = 0
+
+    def walk(self, dt):
+        goal_x = self.ROUTE[self.leg][0] * self.tile_size
+        goal_y = self.ROUTE[self.leg][1] * self.tile_size
+        dx = goal_x - self.x
+        dy = goal_y - self.y
+        length = (dx * dx + dy * dy) ** 0.5
+        step = self.SPEED * dt
+        if length <= step:
+            self.x, self.y = goal_x, goal_y
+            self.leg = (self.leg + 1) % len(self.ROUTE)
+        else:
+            self.x += dx / length * step
+            self.y += dy / length * step
+
+    def take_damage(self, damage, knockback_direction=None):
+        self.damage_taken += damage
+
+def simulate(batch, game_map, seed, count, steps, dt):
+    """Run one path from a seed, returning every step's snapshot of (state, aggro, facing, health, x, y) per enemy"""
+    random.seed(seed)
+    manager = EnemyManager() if batch else None
+    # The object path gets a planner that is never run, since batch enemies plan no paths
+    path_planner = PathPlanner()
+    flow_field = FlowField(radius=12)
+    target = Target(game_map.tile_size)
+
+    spawn_points = [(x * game_map.tile_size, y * game_map.tile_size)
+                    for x, y, tile in game_map.iter_tiles() if game_map.is_walkable_tile(x, y)]
+    enemies = []
+    for _ in range(count):
+        x, y = random.choice(spawn_points)
+        enemy_type = random.choice(list(Enemy.ENEMY_TYPES))
+        enemies.append(manager.create(x, y, enemy_type) if batch else Enemy(x, y, enemy_type))
+
+    snapshots = []
+    for step in range(steps):
+        target.walk(dt)
+        # Hit one enemy now and then, so knockback, being hit and fleeing come up
+        if step % 45 == 0:
+            enemy = enemies[step // 45 % count]
+            enemy.take_damage(random.randint(5, 20), (random.choice((-1, 1)), 0))
+
+        flow_field.update(int((target.x + PLAYER_SIZE/2) // game_map.tile_size),
+                          int((target.y + PLAYER_SIZE/2) // game_map.tile_size),
+                          game_map.is_walkable_tile, (id(game_map), game_map.version))
+        if batch:
+            manager.update(dt, target, game_map, None, flow_field)
+        else:
+            for enemy in enemies:
+                enemy.update(dt, target, game_map, None, path_planner, flow_field)
+        snapshots.append([(enemy.state.name, enemy.is_aggroed, enemy.facing_left, enemy.current_health,
+                           enemy.x, enemy.y) for enemy in enemies])
+    return snapshots, target.damage_taken
+
+def compare_enemy_ai(seed, count, steps, tolerance):
+    """Run the object and batch enemy AI on the same map and seed, printing where they part ways"""
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    game_map = GameMap(40, 40)
+    dt = 1 / 60
+
+    objects, object_damage = simulate(False, game_map, seed, count, steps, dt)
+    batches, batch_damage = simulate(True, game_map, seed, count, steps, dt)
+
+    first = None
+    mismatched = 0
+    largest_gap = 0.0
+    for step, (object_step, batch_step) in enumerate(zip(objects, batches)):
+        for index, (expected, actual) in enumerate(zip(object_step, batch_step)):
+            gap = max(abs(expected[4] - actual[4]), abs(expected[5] - actual[5]))
+            largest_gap = max(largest_gap, gap)
+            if expected[:4] != actual[:4] or gap > tolerance:
+                mismatched += 1
+                if first is None:
+                    first = (step, index, expected, actual)
+
+    print(f"{count} enemies over {steps} steps: {mismatched} of {count * steps} enemy steps differ, "
+          f"largest position gap {largest_gap:.6f} px, damage dealt {object_damage} (object) "
+          f"and {batch_damage} (batch)")
+    if first is None and object_damage == batch_damage:
+        print("Batch AI matches the object AI")
+        return True
+    if first:
+        step, index, expected, actual = first
+        print(f"Error: first difference at step {step}, enemy {index}: object {expected}, batch {actual}")
+    else:
+        print("Error: the paths dealt different damage")
+    return False
+
+if __name__ == "__main__":
+    # Run from the project root: python -m src.tools.compare_enemy_ai
+    parser = argparse.ArgumentParser(description="Check that batch enemy AI behaves like the object path")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--count", type=int, default=40)
+    parser.add_argument("--steps", type=int, default=1200)
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="Position difference allowed, in pixels")
+    args = parser.parse_args()
+    if not compare_enemy_ai(args.seed, args.count, args.steps, args.tolerance):
+        sys.exit(1)
@@ -0,0 +1,29 @@
+import argparse
+import time
+from pathlib import Path
+from src.common.worldgen import WorldGenerator
+from src.client.chunks import ChunkStore
+
+def generate_world(width, height, seed, output):
+    """Generate a procedural world and save it as a chunked world for StreamingGameMap"""
+    start = time.perf_counter()
+    generator = WorldGenerator(seed=seed)
+    grid = generator.generate(width, height)
+    generated = time.perf_counter()
+
+    ChunkStore.save_grid(grid, output)
+    saved = time.perf_counter()
+
+    print(f"Generated {width}x{height} world in {generated - start:.2f}s, "
+          f"saved {output} in {saved - generated:.2f}s")
+
+if __name__ == "__main__":
+    # Run from the project root: python -m src.tools.generate_world
+    parser = argparse.ArgumentParser(description="Generate a procedural world")
+    parser.add_argument("--width", type=int, default=2048)
+    parser.add_argument("--height", type=int, default=2048)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path,
+                        default=Path(__file__).parent.parent / 'assets' / 'maps' / 'wilds')
+    args = parser.parse_args()
+    generate_world(args.width, args.height, args.seed, args.output)